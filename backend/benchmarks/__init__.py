@@ -0,0 +1,5 @@
+# Benchmark scripts; run from backend/ with `python -m benchmarks.<name>`
+import os
+
+# Never point a benchmark at the deployed database by accident
+os.environ.setdefault("DATABASE_URL", "sqlite:///./benchmark.db")
@@ -0,0 +1,76 @@
+"""
+Checkout creation latency and double-click dedup against the fake Stripe.
+
+Starts benchmarks/fake_stripe.py with a configurable latency/failure rate
+and the API pointed at it, then sends bursts of checkout requests in which
+every (user, plan, amount) is submitted several times concurrently, the
+way a double-clicked button would.
+
+Usage:
+    cd backend
+    python -m benchmarks.bench_checkout [--users 200] [--repeats 3] [--latency-ms 300]
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.common import percentile, run_server
+
+
+async def burst(base_url, users, repeats):
+    latencies = []
+    statuses = {}
+    limits = httpx.Limits(max_connections=200)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=limits) as client:
+        async def checkout(user_id):
+            start = time.perf_counter()
+            response = await client.post("/api/payments/create-checkout-session", json={
+                "user_id": user_id, "plan_id": 1, "plan_name": "Monthly", "amount": 999,
+            })
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(checkout(u) for u in range(1, users + 1) for _ in range(repeats)))
+        elapsed = time.perf_counter() - started
+    return elapsed, latencies, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    fake_env = {
+        "FAKE_STRIPE_LATENCY_MS": str(args.latency_ms),
+        "FAKE_STRIPE_FAILURE_RATE": str(args.failure_rate),
+    }
+    with run_server(fake_env, app="benchmarks.fake_stripe:app") as stripe_url:
+        api_env = {
+            "STRIPE_API_BASE": stripe_url,
+            "STRIPE_SECRET_KEY": "sk_test_fake",
+            "STRIPE_MAX_CONNECTIONS": str(args.users),
+            "LOG_LEVEL": "WARNING",
+        }
+        with run_server(api_env) as api_url:
+            elapsed, latencies, statuses = asyncio.run(burst(api_url, args.users, args.repeats))
+            stats = httpx.get(f"{stripe_url}/_stats").json()
+
+    total = args.users * args.repeats
+    print(f"requests sent:        {total} ({args.users} users x {args.repeats} clicks)")
+    print(f"responses:            {statuses}")
+    print(f"throughput:           {total / elapsed:.0f} req/s")
+    print(f"latency p50/p99:      {percentile(latencies, 50) * 1e3:.0f} / {percentile(latencies, 99) * 1e3:.0f} ms")
+    print(f"stripe calls made:    {stats['requests']}")
+    print(f"sessions created:     {stats['created']}")
+
+
+if __name__ == "__main__":
+    main()
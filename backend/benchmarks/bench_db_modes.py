@@ -0,0 +1,82 @@
+"""
+Concurrent requests/sec for /auth/login and /premium/status/{user_id}
+with the sync (threadpool) and async (aiosqlite) database modes.
+
+Both modes run the same uvicorn server against the same local SQLite file.
+bcrypt runs at cost 4 so the database path, not hashing, dominates login.
+
+Usage:
+    cd backend
+    python -m benchmarks.bench_db_modes [--concurrency 64] [--duration 5]
+"""
+
+import argparse
+import asyncio
+import os
+
+import bcrypt
+
+DB_URL = "sqlite:///./bench_db_modes.db"
+os.environ["DATABASE_URL"] = DB_URL
+
+from benchmarks.common import drive, percentile, run_server  # noqa: E402
+from database import Base, SessionLocal, engine  # noqa: E402
+from models import PremiumPlan, User  # noqa: E402
+
+PASSWORD = "benchmark-password"
+
+
+def seed():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    plan = PremiumPlan(name="Monthly", price=999, duration_days=30, description="bench")
+    db.add(plan)
+    db.flush()
+    db.add(User(
+        username="bench",
+        email="bench@example.com",
+        password_hash=bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(rounds=4)).decode(),
+        premium_status="active",
+        plan_id=plan.id,
+    ))
+    db.commit()
+    db.close()
+
+
+ENDPOINTS = {
+    "/auth/login": lambda c: c.post("/auth/login", json={"username": "bench", "password": PASSWORD}),
+    "/premium/status/1": lambda c: c.get("/premium/status/1"),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    seed()
+    print(f"{'mode':<6} {'endpoint':<20} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for mode in ("sync", "async"):
+        env = {
+            "DATABASE_URL": DB_URL,
+            "DB_ASYNC": "true" if mode == "async" else "false",
+            "BCRYPT_ROUNDS": "4",
+            "HASH_MAX_QUEUE": str(args.concurrency),
+            "RATE_LIMIT_ENABLED": "false",
+        }
+        with run_server(env) as base_url:
+            for name, request in ENDPOINTS.items():
+                rps, latencies, errors = asyncio.run(
+                    drive(base_url, request, args.concurrency, args.duration)
+                )
+                print(
+                    f"{mode:<6} {name:<20} {rps:>9.0f} "
+                    f"{percentile(latencies, 50) * 1e3:>8.1f} "
+                    f"{percentile(latencies, 99) * 1e3:>8.1f} {errors:>7}"
+                )
+
+
+if __name__ == "__main__":
+    main()
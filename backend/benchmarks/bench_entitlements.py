@@ -0,0 +1,67 @@
+"""
+Database round trips per subscription-status call.
+
+Counts SQL statements for single and bulk status lookups (cold and warm
+entitlement cache) and for subscribing. Before the joined query, a status
+check cost 2 SELECTs (user, then plan) and subscribing cost 2 SELECTs, an
+UPDATE and a refresh SELECT.
+
+Usage:
+    cd backend
+    python -m benchmarks.bench_entitlements
+"""
+
+import logging
+import os
+
+os.environ["DATABASE_URL"] = "sqlite:///./bench_entitlements.db"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from benchmarks.common import QueryCounter  # noqa: E402
+from cache import cache  # noqa: E402
+from database import Base, SessionLocal, engine  # noqa: E402
+from models import PremiumPlan, User  # noqa: E402
+
+USERS = 100
+
+
+def seed():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(PremiumPlan(name="Monthly", price=999, duration_days=30, description="Monthly"))
+    db.add_all(
+        User(username=f"user{i}", email=f"user{i}@example.com", password_hash="x", plan_id=1)
+        for i in range(USERS)
+    )
+    db.commit()
+    db.close()
+
+
+def run():
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    seed()
+    queries = QueryCounter(engine)
+    client = TestClient(main.app)
+    cache.clear()
+
+    def measure(label, call):
+        queries.reset()
+        call().raise_for_status()
+        print(f"{label:<38} {queries.reset():>3} statements")
+
+    ids = list(range(1, USERS + 1))
+    measure("GET /premium/status/1 (cold)", lambda: client.get("/premium/status/1"))
+    measure("GET /premium/status/1 (warm)", lambda: client.get("/premium/status/1"))
+    measure("POST /premium/subscribe/2/1", lambda: client.post("/premium/subscribe/2/1"))
+    measure("GET /premium/status/2 (after write)", lambda: client.get("/premium/status/2"))
+    cache.clear()
+    measure(f"POST /premium/status x{USERS} (cold)", lambda: client.post("/premium/status", json={"user_ids": ids}))
+    measure(f"POST /premium/status x{USERS} (warm)", lambda: client.post("/premium/status", json={"user_ids": ids}))
+
+
+if __name__ == "__main__":
+    run()
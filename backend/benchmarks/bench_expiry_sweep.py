@@ -0,0 +1,112 @@
+"""
+Subscription expiry sweep over a large synthetic users table on SQLite.
+
+Seeds --users users (mostly free; some active and lapsed, some active and
+current), then runs the chunked sweep with and without the
+(premium_status, plan_expiry) index. Reports total sweep time and how long
+each chunk's transaction held the database write lock.
+
+Usage:
+    cd backend
+    python -m benchmarks.bench_expiry_sweep [--users 1000000] [--chunk-size 1000]
+"""
+
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+os.environ["DATABASE_URL"] = "sqlite:///./bench_expiry.db"
+
+from sqlalchemy import text, update  # noqa: E402
+
+from database import Base, engine  # noqa: E402
+from expire_subscriptions import _expire_chunk, ensure_expiry_index, sweep_expired_subscriptions  # noqa: E402
+from models import User  # noqa: E402
+
+INDEX_NAME = "ix_users_premium_status_plan_expiry"
+
+
+def seed(users, lapsed_share, active_share):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    table = User.__table__
+    lapsed = 0
+    chunk = 50_000
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        for start in range(0, users, chunk):
+            rows = []
+            for i in range(start, min(start + chunk, users)):
+                roll = rng.random()
+                if roll < lapsed_share:
+                    status, expiry = "active", now - timedelta(days=rng.randint(1, 365))
+                    lapsed += 1
+                elif roll < lapsed_share + active_share:
+                    status, expiry = "active", now + timedelta(days=rng.randint(1, 365))
+                else:
+                    status, expiry = "free", None
+                rows.append({
+                    "username": f"user{i}", "email": f"user{i}@example.com", "password_hash": "x",
+                    "premium_status": status, "plan_id": 1 if expiry else None, "plan_expiry": expiry,
+                })
+            conn.execute(table.insert(), rows)
+    print(f"seeded {users} users ({lapsed} lapsed) in {time.perf_counter() - started:.1f}s")
+    return now
+
+
+def reset(now):
+    """Put swept users back to active so the next run has the same work."""
+    with engine.begin() as conn:
+        conn.execute(
+            update(User)
+            .where(User.premium_status == "expired", User.plan_expiry < now)
+            .values(premium_status="active")
+        )
+
+
+def plan(now, chunk_size):
+    stmt = _expire_chunk(now, chunk_size).compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {stmt}")).all()
+    return "; ".join(row[-1] for row in rows)
+
+
+def report(label, result):
+    print(
+        f"{label:<14} expired {result['expired']:>7} in {result['chunks']:>4} chunks  "
+        f"total {result['seconds']:6.2f}s  "
+        f"lock per chunk avg {result['chunk_avg_seconds'] * 1000:6.1f}ms  "
+        f"max {result['chunk_max_seconds'] * 1000:6.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--lapsed", type=float, default=0.1, help="share of users with a lapsed plan")
+    parser.add_argument("--active", type=float, default=0.1, help="share of users with a current plan")
+    args = parser.parse_args()
+
+    now = seed(args.users, args.lapsed, args.active)
+
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP INDEX IF EXISTS {INDEX_NAME}"))
+    print(f"plan without index: {plan(now, args.chunk_size)}")
+    report("without index", sweep_expired_subscriptions(now=now, chunk_size=args.chunk_size, pause=0))
+    # Nothing left to expire: what most periodic runs look like
+    report("  idle sweep", sweep_expired_subscriptions(now=now, chunk_size=args.chunk_size, pause=0))
+    reset(now)
+
+    ensure_expiry_index()
+    print(f"plan with index:    {plan(now, args.chunk_size)}")
+    report("with index", sweep_expired_subscriptions(now=now, chunk_size=args.chunk_size, pause=0))
+    report("  idle sweep", sweep_expired_subscriptions(now=now, chunk_size=args.chunk_size, pause=0))
+
+
+if __name__ == "__main__":
+    main()
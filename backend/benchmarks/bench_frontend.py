@@ -0,0 +1,156 @@
+"""
+Bytes on the wire and request counts for the frontend and large JSON.
+
+A simulated browser (HTTP cache honouring Cache-Control max-age, ETag and
+Last-Modified revalidation; no Cache-Control means revalidate) walks the
+pages twice: a first visit with an empty cache and a repeat visit with the
+cache from the first. Compared:
+
+- before: frontend/ as served by a plain static file server (Starlette
+  StaticFiles: ETag/Last-Modified, no Cache-Control, no compression)
+- after: the static_assets.py build mounted by main.py (fingerprinted,
+  immutable assets; br/gzip variants; HTML revalidated by ETag)
+
+Then GET /api/tips/page with and without Accept-Encoding: gzip (GZip
+middleware), including the in-process time per response.
+
+Usage:
+    cd backend
+    python -m benchmarks.bench_frontend [--tips 1000]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import re
+import tempfile
+import time
+
+import httpx
+
+DB_URL = "sqlite:///./bench_frontend.db"
+BUILD_DIR = tempfile.mkdtemp(prefix="medbuddy-frontend-")
+os.environ.update({
+    "DATABASE_URL": DB_URL,
+    "LOG_LEVEL": "WARNING",
+    "EXPIRY_SWEEP_INTERVAL": "0",
+    "RATE_LIMIT_ENABLED": "false",
+    "SERVE_FRONTEND": "true",
+    "FRONTEND_BUILD_DIR": BUILD_DIR,
+    "FRONTEND_MOUNT_PATH": "/app",
+})
+
+import static_assets  # noqa: E402
+from database import Base, SessionLocal, engine  # noqa: E402
+from models import HealthTip  # noqa: E402
+
+PAGES = ["index.html", "symptom.html", "login.html", "signup.html", "premium.html", "index.html"]
+_LOCAL_REFERENCE = re.compile(r"""\b(?:href|src)\s*=\s*["']([^"'#?:]+\.(?:css|js))["']""")
+
+
+class Browser:
+    """Just enough of a browser HTTP cache to count requests and bytes."""
+
+    def __init__(self, client, accept_encoding="br, gzip"):
+        self.client = client
+        self.accept_encoding = accept_encoding
+        self.cache = {}
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.requests = 0
+        self.bytes = 0
+        self.not_modified = 0
+
+    async def get(self, url) -> str:
+        entry = self.cache.get(url)
+        if entry and entry["fresh_until"] > time.monotonic():
+            return entry["text"]
+        headers = {"accept-encoding": self.accept_encoding}
+        if entry and entry["etag"]:
+            headers["if-none-match"] = entry["etag"]
+        if entry and entry["last_modified"]:
+            headers["if-modified-since"] = entry["last_modified"]
+        response = await self.client.get(url, headers=headers)
+        self.requests += 1
+        header_bytes = 17 + sum(len(k) + len(v) + 4 for k, v in response.headers.raw)
+        self.bytes += header_bytes + response.num_bytes_downloaded
+        if response.status_code == 304:
+            self.not_modified += 1
+            return entry["text"]
+        response.raise_for_status()
+        max_age = re.search(r"max-age=(\d+)", response.headers.get("cache-control", ""))
+        self.cache[url] = {
+            "text": response.text,
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "fresh_until": time.monotonic() + (int(max_age.group(1)) if max_age else 0),
+        }
+        return response.text
+
+    async def visit(self, page):
+        html = await self.get(f"/app/{page}")
+        for reference in _LOCAL_REFERENCE.findall(html):
+            await self.get(f"/app/{reference}")
+
+
+async def walk(app, label):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        browser = Browser(client)
+        for visit in ("first visit", "repeat visit"):
+            browser.reset_counters()
+            for page in PAGES:
+                await browser.visit(page)
+            print(f"{label:<7} {visit:<13} {len(PAGES)} pages: {browser.requests:3d} requests "
+                  f"({browser.not_modified} x 304), {browser.bytes / 1024:7.1f} KiB on the wire")
+
+
+def before_app():
+    from starlette.applications import Starlette
+    from starlette.routing import Mount
+    from starlette.staticfiles import StaticFiles
+
+    return Starlette(routes=[Mount("/app", StaticFiles(directory=static_assets.FRONTEND_DIR, html=True))])
+
+
+async def tips_json(app, limit, repeats=200):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for accept in ("identity", "gzip"):
+            headers = {"accept-encoding": accept}
+            response = await client.get("/api/tips/page", params={"limit": limit}, headers=headers)
+            started = time.perf_counter()
+            for _ in range(repeats):
+                await client.get("/api/tips/page", params={"limit": limit}, headers=headers)
+            elapsed = (time.perf_counter() - started) / repeats
+            print(f"GET /api/tips/page?limit={limit:<5} Accept-Encoding: {accept:<9} "
+                  f"{response.num_bytes_downloaded:8d} body bytes  "
+                  f"({response.headers.get('content-encoding', 'none')}), {elapsed * 1e3:6.2f} ms/request")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tips", type=int, default=1000)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add_all(HealthTip(tip_text=f"Health tip {i}: drink water, sleep well and keep moving.",
+                         category="general") for i in range(args.tips))
+    db.commit()
+    db.close()
+
+    static_assets.build(static_assets.FRONTEND_DIR, BUILD_DIR)
+    from main import app
+
+    asyncio.run(walk(before_app(), "before"))
+    asyncio.run(walk(app, "after"))
+    print()
+    for limit in (20, 100):
+        asyncio.run(tips_json(app, limit))
+
+
+if __name__ == "__main__":
+    main()
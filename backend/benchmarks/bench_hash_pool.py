@@ -0,0 +1,101 @@
+"""
+Hashing pool recovery after a worker process dies.
+
+A bcrypt worker killed from outside (OOM killer, segfault) leaves a
+ProcessPoolExecutor broken for good. This starts a process pool, hashes a
+warm-up batch, SIGKILLs one worker and checks (OK/FAIL, exit status 1 on
+any FAIL) that:
+
+- the next hashes succeed on a replacement executor, and how long the
+  first one took (spawning the new workers)
+- a verification against a hash made before the kill still passes
+- no admission slots leaked: the pool reports nothing outstanding
+
+bcrypt runs at BCRYPT_ROUNDS=4 so the check takes seconds.
+
+Usage:
+    cd backend
+    python -m benchmarks.bench_hash_pool [--workers 2] [--jobs 50]
+"""
+
+import argparse
+import os
+import signal
+import sys
+import time
+
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from hashing import BCRYPT_ROUNDS, HashingPool, _check_job, _hash_job  # noqa: E402
+
+
+def report(name, ok, detail="") -> bool:
+    print(f"{'OK  ' if ok else 'FAIL'} {name}{': ' + detail if detail else ''}")
+    return ok
+
+
+def hash_batch(pool, jobs):
+    """Run ``jobs`` hashes at once; returns (successes, first error)."""
+    futures, done, error = [], 0, None
+    for i in range(jobs):
+        try:
+            futures.append(pool.submit(_hash_job, f"secret{i}", BCRYPT_ROUNDS))
+        except Exception as exc:
+            error = error or exc
+    for future in futures:
+        try:
+            future.result(timeout=60)
+            done += 1
+        except Exception as exc:
+            error = error or exc
+    return done, error
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--jobs", type=int, default=50)
+    args = parser.parse_args()
+
+    pool = HashingPool(kind="process", workers=args.workers, max_queue=args.jobs)
+    stored = pool.submit(_hash_job, "before-kill", BCRYPT_ROUNDS).result(timeout=60)
+    started = time.perf_counter()
+    done, _ = hash_batch(pool, args.jobs)
+    elapsed = time.perf_counter() - started
+    print(f"{args.workers} workers: {done} hashes in {elapsed * 1e3:.0f} ms before the kill")
+
+    victim = next(iter(pool._executor._processes))
+    os.kill(victim, signal.SIGKILL)
+    # Give the executor's management thread time to notice the dead worker
+    time.sleep(1.0)
+    print(f"killed worker pid {victim}")
+
+    passed = True
+    started = time.perf_counter()
+    try:
+        pool.submit(_hash_job, "after-kill", BCRYPT_ROUNDS).result(timeout=60)
+        first = f"{(time.perf_counter() - started) * 1e3:.0f} ms including the new workers' startup"
+        passed &= report("first hash after the kill", True, first)
+    except Exception as exc:
+        passed &= report("first hash after the kill", False, f"{type(exc).__name__}: {exc}")
+
+    done, error = hash_batch(pool, args.jobs)
+    passed &= report(f"{args.jobs} more hashes", done == args.jobs,
+                     f"{done} succeeded" + (f", first error {type(error).__name__}" if error else ""))
+    try:
+        verified = pool.submit(_check_job, "before-kill", stored).result(timeout=60)
+    except Exception as exc:
+        verified = False
+        print(f"    {type(exc).__name__}: {exc}")
+    passed &= report("hash made before the kill verifies", verified)
+    stats = pool.stats()
+    passed &= report("no leaked admission slots", stats["outstanding"] == 0, f"outstanding {stats['outstanding']}")
+
+    pool.shutdown()
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
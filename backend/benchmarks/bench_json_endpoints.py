@@ -0,0 +1,83 @@
+"""
+Requests/sec of the static and near-static JSON endpoints under uvicorn.
+
+Seeds a few plans and tips, then measures each endpoint two ways: called
+directly as an ASGI app in this process (handler + encoding cost, no
+network or client overhead), and over HTTP against uvicorn --workers.
+Run it on two revisions to compare encoders.
+
+Usage:
+    cd backend
+    python -m benchmarks.bench_json_endpoints [--workers 2] [--duration 5] [--concurrency 32]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+
+os.environ["DATABASE_URL"] = "sqlite:///./bench_json.db"
+
+from benchmarks.common import asgi_calls_per_second, drive, percentile, run_server  # noqa: E402
+from database import Base, SessionLocal, engine  # noqa: E402
+from models import HealthTip, PremiumPlan  # noqa: E402
+
+ENDPOINTS = [
+    "/",
+    "/health",
+    "/api/tips/random",
+    "/api/tips/page?limit=100",
+    "/premium/plans",
+]
+
+
+def seed():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add_all([
+        PremiumPlan(name="Monthly", price=9.99, duration_days=30, description="Monthly Premium Plan"),
+        PremiumPlan(name="Quarterly", price=24.99, duration_days=90, description="Quarterly Premium Plan"),
+        PremiumPlan(name="Annual", price=99.99, duration_days=365, description="Annual Premium Plan"),
+    ])
+    db.add_all(HealthTip(tip_text=f"Health tip {i}: take a short walk after meals.", category="exercise") for i in range(500))
+    db.commit()
+    db.close()
+
+
+def in_process():
+    import main
+
+    async def measure():
+        async with main.app.router.lifespan_context(main.app):
+            for path in ENDPOINTS:
+                await asgi_calls_per_second(main.app, path, 0.5)  # warm caches
+                rps = await asgi_calls_per_second(main.app, path)
+                print(f"ASGI GET {path:<26} {rps:8.0f} req/s  ({1e6 / rps:6.0f} us/request)")
+
+    asyncio.run(measure())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    seed()
+    in_process()
+    env = {"LOG_LEVEL": "WARNING", "EXPIRY_SWEEP_INTERVAL": "0"}
+    with run_server(env, workers=args.workers) as base_url:
+        for path in ENDPOINTS:
+            async def call(client, path=path):
+                return await client.get(path)
+            asyncio.run(drive(base_url, call, args.concurrency, 1.0))  # warm every worker's caches
+            rps, latencies, errors = asyncio.run(drive(base_url, call, args.concurrency, args.duration))
+            print(f"HTTP GET {path:<26} {rps:8.0f} req/s  p50 {percentile(latencies, 50) * 1e3:6.1f} ms  "
+                  f"p99 {percentile(latencies, 99) * 1e3:6.1f} ms  errors {errors}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Per-request logging overhead before and after the queue-based logging setup.
+
+"Before" replays what one login request used to emit: three print() calls
+from get_db, two from the handler, and SQLAlchemy statement logging under
+the hard-coded DEBUG root level, all written synchronously. "After" emits
+the same calls through logging_config (DEBUG filtered at the default INFO
+level, one INFO line handed to the listener thread) plus the request-ID
+middleware. Output goes to a temporary file so write cost is included.
+
+Usage:
+    cd backend
+    python -m benchmarks.bench_logging
+"""
+
+import asyncio
+import contextlib
+import logging
+import sys
+import tempfile
+import time
+
+import logging_config
+
+ITERATIONS = 20_000
+
+
+def legacy_request(app_log, sql_log):
+    print("[DEBUG] Creating DB session")
+    print("[DEBUG] Yielding DB session")
+    print("[DEBUG] Login called for user: bench")
+    sql_log.info("SELECT users.id, users.username FROM users WHERE users.username = ?")
+    sql_log.info("[generated in 0.00012s] ('bench',)")
+    print("[DEBUG] Login successful for user: bench")
+    print("[DEBUG] Closing DB session")
+
+
+def current_request(app_log, sql_log):
+    app_log.debug("Login called for user: %s", "bench")
+    sql_log.info("SELECT users.id, users.username FROM users WHERE users.username = ?")
+    sql_log.info("[generated in 0.00012s] ('bench',)")
+    app_log.info("Login successful for user: %s", "bench")
+
+
+def per_call_us(fn, *args):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn(*args)
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+
+def middleware_us():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "headers": [(b"host", b"bench")]}
+    wrapped = logging_config.RequestIdMiddleware(app)
+
+    async def run(target):
+        start = time.perf_counter()
+        for _ in range(ITERATIONS):
+            await target(scope, None, send)
+        return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+    bare = asyncio.run(run(app))
+    return asyncio.run(run(wrapped)) - bare
+
+
+def main():
+    app_log = logging.getLogger("routes.auth")
+    sql_log = logging.getLogger("sqlalchemy.engine.Engine")
+    root = logging.getLogger()
+
+    with tempfile.TemporaryFile("w") as sink, contextlib.redirect_stdout(sink):
+        # Before: basicConfig(level=DEBUG) and print()
+        handler = logging.StreamHandler(sys.stdout)
+        root.addHandler(handler)
+        root.setLevel(logging.DEBUG)
+        before = per_call_us(legacy_request, app_log, sql_log)
+        root.removeHandler(handler)
+
+        # After: queue handler + background writer
+        logging_config.setup_logging()
+        after = per_call_us(current_request, app_log, sql_log)
+        logging_config.shutdown_logging()
+
+    print(f"before: {before:8.2f} us/request")
+    print(f"after:  {after:8.2f} us/request (+{middleware_us():.2f} us request-ID middleware)")
+
+
+if __name__ == "__main__":
+    main()
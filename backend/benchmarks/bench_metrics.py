@@ -0,0 +1,83 @@
+"""
+Overhead of the metrics middleware and SQL statement timing.
+
+Measures, in this process:
+- a trivial ASGI app called directly, bare vs. wrapped in MetricsMiddleware
+- ``SELECT 1`` on SQLite before vs. after the cursor-event timers are attached
+- rendering /metrics from several workers' snapshot files (multiprocess mode)
+
+Usage:
+    cd backend
+    python -m benchmarks.bench_metrics
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+
+from benchmarks.common import asgi_calls_per_second
+
+
+async def trivial_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def statements_per_second(engine, seconds=2.0):
+    count = 0
+    with engine.connect() as conn:
+        deadline = time.perf_counter() + seconds
+        started = time.perf_counter()
+        while time.perf_counter() < deadline:
+            conn.execute(text("SELECT 1"))
+            count += 1
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    engine = create_engine("sqlite://")
+    statements_per_second(engine, 0.5)
+    plain_sql = statements_per_second(engine)
+
+    # Importing metrics attaches the engine-wide cursor timers
+    import metrics
+
+    timed_sql = statements_per_second(engine)
+
+    async def middleware_overhead():
+        bare = await asgi_calls_per_second(trivial_app, "/items/1")
+        wrapped_app = metrics.MetricsMiddleware(trivial_app)
+        await asgi_calls_per_second(wrapped_app, "/items/1", 0.5)
+        wrapped = await asgi_calls_per_second(wrapped_app, "/items/1")
+        return bare, wrapped
+
+    bare, wrapped = asyncio.run(middleware_overhead())
+    print(f"ASGI call, bare:            {1e6 / bare:7.2f} us")
+    print(f"ASGI call, with middleware: {1e6 / wrapped:7.2f} us  (+{1e6 / wrapped - 1e6 / bare:.2f} us/request)")
+    print(f"SELECT 1, untimed:          {1e6 / plain_sql:7.2f} us")
+    print(f"SELECT 1, timed:            {1e6 / timed_sql:7.2f} us  (+{1e6 / timed_sql - 1e6 / plain_sql:.2f} us/statement)")
+
+    # Multiprocess scrape: merge snapshot files from several workers
+    with tempfile.TemporaryDirectory() as directory:
+        metrics.METRICS_MULTIPROC_DIR = directory
+        for route in range(40):
+            for _ in range(3):
+                metrics.metrics.request_started()
+                metrics.metrics.request_finished("GET", f"/route/{route}", "200", 0.01, 2, 0.001)
+        snapshot = metrics.metrics.snapshot()
+        for worker in range(8):
+            with open(os.path.join(directory, f"metrics_{100000 + worker}.json"), "w") as f:
+                json.dump({**snapshot, "pid": 100000 + worker}, f)
+        started = time.perf_counter()
+        for _ in range(50):
+            body = metrics.render()
+        elapsed = (time.perf_counter() - started) / 50
+        print(f"/metrics render, 9 workers x 40 routes: {elapsed * 1000:.2f} ms ({len(body)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
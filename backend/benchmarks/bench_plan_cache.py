@@ -0,0 +1,65 @@
+"""
+Database queries issued per 1k GET /premium/plans hits, with the plan
+catalog cache on and (via PLANS_CACHE_TTL=0) effectively off.
+
+Runs in-process against a local SQLite file and counts statements with a
+SQLAlchemy ``before_cursor_execute`` listener.
+
+Usage:
+    cd backend
+    python -m benchmarks.bench_plan_cache
+"""
+
+import logging
+import os
+import time
+
+os.environ["DATABASE_URL"] = "sqlite:///./bench_plan_cache.db"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from benchmarks.common import QueryCounter  # noqa: E402
+from cache import cache  # noqa: E402
+from database import Base, SessionLocal, engine  # noqa: E402
+from models import PremiumPlan  # noqa: E402
+from routes import premium  # noqa: E402
+
+HITS = 1000
+
+
+def seed():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    for name, price, days in (("Monthly", 999, 30), ("Quarterly", 2499, 90), ("Annual", 9999, 365)):
+        db.add(PremiumPlan(name=name, price=price, duration_days=days, description=name))
+    db.commit()
+    db.close()
+
+
+def run():
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    seed()
+    queries = QueryCounter(engine)
+
+    client = TestClient(main.app)
+    print(f"{'cache':<6} {'queries/1k':>10} {'304s':>6} {'ms/hit':>7}")
+    for label, ttl in (("off", 0.0), ("on", 300.0)):
+        premium.PLANS_CACHE_TTL = ttl
+        cache.clear()
+        queries.reset()
+        not_modified = 0
+        etag = None
+        start = time.perf_counter()
+        for _ in range(HITS):
+            headers = {"If-None-Match": etag} if etag else {}
+            response = client.get("/premium/plans", headers=headers)
+            etag = response.headers["etag"]
+            not_modified += response.status_code == 304
+        elapsed = (time.perf_counter() - start) / HITS * 1e3
+        print(f"{label:<6} {queries.reset():>10} {not_modified:>6} {elapsed:>7.3f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,146 @@
+"""
+Cost of the rate limiter and what it saves during a login brute force.
+
+Measures, in this process:
+- ``LocalRateLimitStore.take`` on one hot key and on a stream of distinct
+  keys (a crawl from many IPs), and how many keys are held afterwards
+  (bounded by max_keys; idle buckets are dropped once refilled)
+- a password-guessing attack on one account through the ASGI app, from a
+  single IP and spread over one IP per request, with the limiter off and
+  on: bcrypt checks actually run and CPU seconds spent
+
+Usage:
+    cd backend
+    python -m benchmarks.bench_rate_limit [--attempts 200] [--bcrypt-rounds 10]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+import bcrypt
+
+DB_URL = "sqlite:///./bench_rate_limit.db"
+os.environ["DATABASE_URL"] = DB_URL
+os.environ.setdefault("HASH_POOL_KIND", "thread")
+os.environ.setdefault("EXPIRY_SWEEP_INTERVAL", "0")
+os.environ.setdefault("WEBHOOK_WORKER", "false")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import httpx  # noqa: E402
+
+import ratelimit  # noqa: E402
+from database import Base, SessionLocal, engine  # noqa: E402
+from models import User  # noqa: E402
+
+
+def ops_per_second(fn, keys, seconds=1.0):
+    count = 0
+    n = len(keys)
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for i in range(1000):
+            fn(keys[(count + i) % n])
+        count += 1000
+    return count / (time.perf_counter() - started)
+
+
+def store_benchmarks():
+    store = ratelimit.LocalRateLimitStore(shards=16, max_keys=100_000)
+
+    def take(key):
+        store.take(key, 2.0, 30)
+
+    hot = ops_per_second(take, ["ip:203.0.113.7"])
+    print(f"take(), one hot key:            {1e6 / hot:6.2f} us/op")
+
+    distinct = [f"ip:10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(1_000_000)]
+    store.clear()
+    spread = ops_per_second(take, distinct, 2.0)
+    print(f"take(), 1M distinct keys:       {1e6 / spread:6.2f} us/op  "
+          f"(keys held: {len(store)}, max_keys 100000)")
+
+    # Fast-refilling buckets become redundant within milliseconds
+    store.clear()
+    for key in distinct[:50_000]:
+        store.take(key, 1000.0, 1)
+    time.sleep(0.01)
+    for key in distinct[50_000:60_000]:
+        store.take(key, 1000.0, 1)
+    print(f"idle expiry: 50000 idle + 10000 new keys -> {len(store)} held")
+
+
+class SpoofClient:
+    """Give every request its own client address (a botnet)."""
+
+    def __init__(self, app):
+        self.app = app
+        self.counter = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            self.counter += 1
+            n = self.counter
+            scope = {**scope, "client": (f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}", 40000)}
+        await self.app(scope, receive, send)
+
+
+async def attack(app, attempts, enabled, spread_ips):
+    import hashing
+
+    ratelimit.RATE_LIMIT_ENABLED = enabled
+    ratelimit.store.clear()
+    before = hashing.pool.stats()["completed"]
+    cpu = time.process_time()
+    started = time.perf_counter()
+    statuses = {}
+    target = SpoofClient(app) if spread_ips else app
+    transport = httpx.ASGITransport(app=target, client=("198.51.100.1", 40000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(attempts):
+            response = await client.post("/auth/login", json={"username": "victim", "password": f"guess-{i}"})
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    label = f"{'on ' if enabled else 'off'} {'1 IP per request' if spread_ips else 'single IP':<17}"
+    print(f"limiter {label} bcrypt checks {hashing.pool.stats()['completed'] - before:4d}  "
+          f"CPU {time.process_time() - cpu:6.2f}s  wall {time.perf_counter() - started:6.2f}s  "
+          f"responses {dict(sorted(statuses.items()))}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--attempts", type=int, default=200)
+    parser.add_argument("--bcrypt-rounds", type=int, default=10)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    store_benchmarks()
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(User(
+        username="victim",
+        email="victim@example.com",
+        password_hash=bcrypt.hashpw(b"correct horse", bcrypt.gensalt(rounds=args.bcrypt_rounds)).decode(),
+    ))
+    db.commit()
+    db.close()
+
+    import main as app_module
+
+    async def run():
+        app = app_module.app
+        async with app.router.lifespan_context(app):
+            for spread_ips in (False, True):
+                for enabled in (False, True):
+                    await attack(app, args.attempts, enabled, spread_ips)
+
+    print(f"\n{args.attempts} wrong-password logins for one account, bcrypt cost {args.bcrypt_rounds}:")
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
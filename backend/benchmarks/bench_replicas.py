@@ -0,0 +1,172 @@
+"""
+Read-replica routing with SQLite files standing in for replicas.
+
+The primary is seeded, then copied to two "replica" files, so any write
+made through the API afterwards exists only on the primary, which makes
+it visible which database answered a read. Checks, each reported OK/FAIL
+(exit status 1 on any FAIL):
+
+- reads are spread over both replicas (GET /health/db counters)
+- read-your-writes: right after subscribing, the user's status comes from
+  the primary; once READ_YOUR_WRITES_SECONDS has passed it comes from a
+  (stale) replica again
+- login right after signup works although the user is not on a replica
+- a plan created through the API is in the catalog at once, although the
+  replicas never get it
+- with one replica broken (a file without tables), every read still
+  succeeds and the replica is taken out of rotation
+
+Then compares status and login throughput with and without replicas. On a
+single machine the "replicas" share its disk and CPUs, so this measures
+routing overhead rather than offloaded capacity.
+
+Usage:
+    cd backend
+    python -m benchmarks.bench_replicas [--users 10000] [--duration 5] [--concurrency 32]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import time
+
+import httpx
+
+PRIMARY = "bench_replica_primary.db"
+REPLICAS = ["bench_replica_1.db", "bench_replica_2.db"]
+BROKEN = "bench_replica_broken.db"
+os.environ["DATABASE_URL"] = f"sqlite:///./{PRIMARY}"
+
+from benchmarks.common import drive, percentile, run_server  # noqa: E402
+from database import Base, engine  # noqa: E402
+import models  # noqa: E402,F401  (registers the tables)
+
+PASSWORD = "replica-password"
+WINDOW = 1.0
+
+SERVER_ENV = {
+    "DATABASE_URL": f"sqlite:///./{PRIMARY}",
+    "LOG_LEVEL": "ERROR",
+    "EXPIRY_SWEEP_INTERVAL": "0",
+    "RATE_LIMIT_ENABLED": "false",
+    "BCRYPT_ROUNDS": "4",
+    "HASH_MAX_QUEUE": "1000",
+    # Every status read must reach a database to show where it went
+    "ENTITLEMENT_CACHE_TTL": "0",
+    "READ_YOUR_WRITES_SECONDS": str(WINDOW),
+    "REPLICA_RETRY_AFTER": "60",
+}
+
+
+def seed(users):
+    import bcrypt
+    from init_db import seed_synthetic_data
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    password_hash = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(rounds=4)).decode()
+    seed_synthetic_data(engine, users=users, tips=200, password_hash=password_hash)
+    engine.dispose()
+    for replica in REPLICAS:
+        shutil.copy(PRIMARY, replica)
+    if os.path.exists(BROKEN):
+        os.remove(BROKEN)
+    sqlite3.connect(BROKEN).close()
+
+
+def replica_urls(files):
+    return ",".join(f"sqlite:///./{name}" for name in files)
+
+
+def report(name, ok, detail=""):
+    print(f"{'OK  ' if ok else 'FAIL'} {name}{': ' + detail if detail else ''}")
+    return ok
+
+
+def checks(users) -> bool:
+    ok = True
+    env = {**SERVER_ENV, "DATABASE_REPLICA_URLS": replica_urls(REPLICAS)}
+    with run_server(env) as base_url, httpx.Client(base_url=base_url, timeout=30) as client:
+        for user_id in range(1, 201):
+            assert client.get(f"/premium/status/{user_id}").status_code == 200
+        reads = [r["reads"] for r in client.get("/health/db").json()["read_replicas"]["replicas"]]
+        ok &= report("reads spread over replicas", min(reads) > 0, f"reads per replica {reads}")
+
+        user_id = random.randrange(1, users + 1)
+        before = client.get(f"/premium/status/{user_id}").json().get("premium_plan_id")
+        plan_id = 2 if before != 2 else 3
+        assert client.post(f"/premium/subscribe/{user_id}/{plan_id}").status_code == 200
+        right_after = client.get(f"/premium/status/{user_id}").json().get("premium_plan_id")
+        ok &= report("status right after subscribing comes from the primary", right_after == plan_id,
+                     f"plan {before} -> {right_after}")
+        time.sleep(WINDOW + 0.2)
+        later = client.get(f"/premium/status/{user_id}").json().get("premium_plan_id")
+        ok &= report("after the window, reads go back to the (stale) replicas", later == before,
+                     f"plan seen {later}")
+
+        response = client.post("/auth/signup", json={
+            "username": "fresh-user", "email": "fresh@example.com", "password": PASSWORD})
+        assert response.status_code == 200, response.text
+        response = client.post("/auth/login", json={"username": "fresh-user", "password": PASSWORD})
+        ok &= report("login right after signup", response.status_code == 200, str(response.status_code))
+
+        assert client.get("/premium/plans").status_code == 200  # cached from a replica
+        response = client.post("/premium/create", params={"name": "Replica Check", "price": 1, "duration_days": 7})
+        assert response.status_code == 200, response.text
+        names = [plan["name"] for plan in client.get("/premium/plans").json()["plans"]]
+        ok &= report("plan catalog right after creating a plan", "Replica Check" in names, f"{len(names)} plans")
+
+    env = {**SERVER_ENV, "DATABASE_REPLICA_URLS": replica_urls([REPLICAS[0], BROKEN])}
+    with run_server(env) as base_url, httpx.Client(base_url=base_url, timeout=30) as client:
+        codes = [client.get(f"/premium/status/{user_id}").status_code for user_id in range(1, 101)]
+        codes += [client.post("/auth/login", json={"username": f"user{i}", "password": PASSWORD}).status_code
+                  for i in range(20)]
+        status = client.get("/health/db").json()["read_replicas"]
+        broken = status["replicas"][1]
+        ok &= report("reads survive a broken replica", all(code == 200 for code in codes),
+                     f"{codes.count(200)}/{len(codes)} OK, broken replica failures {broken['failures']}, "
+                     f"healthy={broken['healthy']}, fallbacks {status['fallbacks']}")
+    print()
+    return ok
+
+
+def throughput(args):
+    async def status(client):
+        return await client.get(f"/premium/status/{random.randrange(1, args.users + 1)}")
+
+    async def login(client):
+        return await client.post("/auth/login", json={
+            "username": f"user{random.randrange(args.users)}", "password": PASSWORD})
+
+    for label, replicas in (("primary only", []), ("2 replicas", REPLICAS)):
+        env = {**SERVER_ENV, "DATABASE_REPLICA_URLS": replica_urls(replicas)}
+        with run_server(env) as base_url:
+            for name, request in (("GET /premium/status", status), ("POST /auth/login", login)):
+                asyncio.run(drive(base_url, request, args.concurrency, 1.0))
+                rps, latencies, errors = asyncio.run(drive(base_url, request, args.concurrency, args.duration))
+                print(f"{label:<13} {name:<20} {rps:8.0f} req/s  p50 {percentile(latencies, 50) * 1e3:6.2f} ms  "
+                      f"p99 {percentile(latencies, 99) * 1e3:6.2f} ms  errors {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    seed(args.users)
+    ok = checks(args.users)
+    throughput(args)
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
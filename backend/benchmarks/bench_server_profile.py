@@ -0,0 +1,96 @@
+"""
+Cold start and throughput scaling of the production server profile.
+
+Measures:
+- cold start: seconds from launching the server until /health first
+  answers 200, for plain uvicorn and for gunicorn.conf.py with and without
+  preload (median of --repeats launches)
+- requests/sec under gunicorn.conf.py with 1..--workers workers
+- uvloop + httptools (UvicornWorker) vs. asyncio + h11 (UvicornH11Worker)
+  at one worker
+
+Scaling beyond the machine's core count only shows scheduling overhead.
+
+Usage:
+    cd backend
+    python -m benchmarks.bench_server_profile [--workers 4] [--duration 5] [--concurrency 32]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+
+DB_URL = "sqlite:///./bench_server_profile.db"
+os.environ["DATABASE_URL"] = DB_URL
+
+from benchmarks.common import drive, percentile, run_server, time_to_first_response  # noqa: E402
+from database import Base, SessionLocal, engine  # noqa: E402
+from models import HealthTip  # noqa: E402
+
+SERVER_ENV = {
+    "DATABASE_URL": DB_URL,
+    "LOG_LEVEL": "WARNING",
+    "EXPIRY_SWEEP_INTERVAL": "0",
+    "RATE_LIMIT_ENABLED": "false",
+}
+
+ENDPOINTS = {
+    "GET /health": lambda c: c.get("/health"),
+    "GET /api/tips/random": lambda c: c.get("/api/tips/random"),
+    "POST /symptom/analyze": lambda c: c.post("/symptom/analyze", json={"symptoms": "headache and mild fever"}),
+}
+
+
+def seed():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add_all(HealthTip(tip_text=f"Health tip {i}", category="exercise") for i in range(100))
+    db.commit()
+    db.close()
+
+
+def throughput(label, args, workers, extra_args=()):
+    with run_server(SERVER_ENV, workers=workers, server="gunicorn", extra_args=extra_args) as base_url:
+        for name, request in ENDPOINTS.items():
+            asyncio.run(drive(base_url, request, args.concurrency, 1.0))
+            rps, latencies, errors = asyncio.run(drive(base_url, request, args.concurrency, args.duration))
+            print(f"{label:<24} {name:<22} {rps:8.0f} req/s  p50 {percentile(latencies, 50) * 1e3:6.1f} ms  "
+                  f"p99 {percentile(latencies, 99) * 1e3:6.1f} ms  errors {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=max(2, os.cpu_count() or 1))
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    seed()
+    print(f"CPUs available: {os.cpu_count()}\n")
+
+    configs = [
+        ("uvicorn", 1, {}),
+        ("uvicorn", args.workers, {}),
+        ("gunicorn", 1, {"PRELOAD_APP": "true"}),
+        ("gunicorn", args.workers, {"PRELOAD_APP": "false"}),
+        ("gunicorn", args.workers, {"PRELOAD_APP": "true"}),
+    ]
+    for server, workers, env in configs:
+        times = [time_to_first_response({**SERVER_ENV, **env}, workers, server) for _ in range(args.repeats)]
+        preload = f" preload={env['PRELOAD_APP']}" if env else ""
+        print(f"cold start {server:<8} workers={workers}{preload:<14} {statistics.median(times):6.2f}s "
+              f"(min {min(times):.2f}s)")
+    print()
+
+    for workers in range(1, args.workers + 1):
+        throughput(f"gunicorn workers={workers}", args, workers)
+    throughput("asyncio+h11 workers=1", args, 1, ("-k", "uvicorn.workers.UvicornH11Worker"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Signup round trips, latency, and duplicate signups racing each other.
+
+- SQL statements and in-process latency per signup and per login
+  (ASGI transport, so no HTTP overhead), plus the login query plan
+- a non-ASCII username ("Émile") can log in with its own spelling and an
+  ASCII case variant, and shares one lockout key with them
+- under uvicorn: --parallel simultaneous signups for one username (and
+  for one email, and for case variants of one username); exactly one may
+  succeed and the rest must get the matching 400 message. Exits non-zero
+  otherwise
+- under uvicorn: signup throughput and latency percentiles
+
+bcrypt runs at BCRYPT_ROUNDS=4 so hashing does not drown the database work.
+
+Usage:
+    cd backend
+    python -m benchmarks.bench_signup [--parallel 32] [--rounds 5] [--duration 5] [--concurrency 16]
+"""
+
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import sys
+import time
+
+import httpx
+
+DB_URL = "sqlite:///./bench_signup.db"
+os.environ["DATABASE_URL"] = DB_URL
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["LOG_LEVEL"] = "WARNING"
+
+from benchmarks.common import drive, percentile, run_server  # noqa: E402
+from database import Base, engine  # noqa: E402
+import models  # noqa: E402,F401  (registers the tables)
+from sqlalchemy import event  # noqa: E402
+
+SERVER_ENV = {
+    "DATABASE_URL": DB_URL,
+    "LOG_LEVEL": "WARNING",
+    "EXPIRY_SWEEP_INTERVAL": "0",
+    "RATE_LIMIT_ENABLED": "false",
+    "BCRYPT_ROUNDS": "4",
+    "HASH_MAX_QUEUE": "1000",  # queue the racing signups rather than shed them
+}
+
+
+def reset():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+async def in_process(count):
+    from main import app
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for label, make in (
+            ("signup", lambda i: client.post("/auth/signup", json={
+                "username": f"inproc{i}", "email": f"inproc{i}@example.com", "password": "secret123"})),
+            ("login", lambda i: client.post("/auth/login", json={
+                "username": f"InProc{i}", "password": "secret123"})),
+        ):
+            statements.clear()
+            started = time.perf_counter()
+            for i in range(count):
+                response = await make(i)
+                assert response.status_code == 200, response.text
+            elapsed = time.perf_counter() - started
+            print(f"{label:<7} {len(statements) / count:4.1f} SQL statements, "
+                  f"{elapsed / count * 1e3:6.2f} ms per request (in-process)")
+        statements.clear()
+        await client.post("/auth/signup", json={
+            "username": "inproc0", "email": "other@example.com", "password": "secret123"})
+        print(f"duplicate signup: {len(statements)} SQL statement(s)")
+
+        passed = await non_ascii_checks(client)
+
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT * FROM users WHERE lower(username) = 'inproc1'").all()
+    print(f"login lookup plan: {plan[0][-1]}\n")
+    return passed
+
+
+async def non_ascii_checks(client) -> bool:
+    """Login and the lockout key must fold case exactly like the users index."""
+    from routes.auth import username_key
+
+    response = await client.post("/auth/signup", json={
+        "username": "Émile", "email": "emile@example.com", "password": "secret123"})
+    passed = response.status_code == 200
+    print(f"{'OK  ' if passed else 'FAIL'} signup Émile: HTTP {response.status_code}")
+    for spelling in ("Émile", "ÉMILE"):
+        response = await client.post("/auth/login", json={"username": spelling, "password": "secret123"})
+        ok = response.status_code == 200
+        passed &= ok
+        print(f"{'OK  ' if ok else 'FAIL'} login as {spelling}: HTTP {response.status_code}")
+    ok = username_key("ÉMILE") == username_key("Émile")
+    passed &= ok
+    print(f"{'OK  ' if ok else 'FAIL'} lockout key for ÉMILE and Émile: "
+          f"{username_key('ÉMILE')!r}, {username_key('Émile')!r}")
+    return passed
+
+
+async def race(base_url, parallel, make_body, expected_detail):
+    """Send ``parallel`` signups at once; returns (successes, wrong responses)."""
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        responses = await asyncio.gather(*(
+            client.post("/auth/signup", json=make_body(i)) for i in range(parallel)))
+    successes = sum(r.status_code == 200 for r in responses)
+    wrong = [f"{r.status_code} {r.text}" for r in responses
+             if r.status_code != 200 and (r.status_code != 400 or r.json()["detail"] != expected_detail)]
+    return successes, wrong
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--parallel", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--count", type=int, default=500, help="signups timed in-process")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    reset()
+    failed = not asyncio.run(in_process(args.count))
+
+    cases = {
+        "same username": (lambda n: lambda i: {
+            "username": f"race{n}", "email": f"race{n}-{i}@example.com", "password": "secret123"},
+            "Username already registered"),
+        "same email": (lambda n: lambda i: {
+            "username": f"race{n}-{i}", "email": f"race{n}@example.com", "password": "secret123"},
+            "Email already registered"),
+        "username case": (lambda n: lambda i: {
+            "username": "".join(c.upper() if (i >> k) & 1 else c for k, c in enumerate(f"case{n}x")),
+            "email": f"case{n}-{i}@example.com", "password": "secret123"},
+            "Username already registered"),
+    }
+    counter = itertools.count()
+    with run_server(SERVER_ENV) as base_url:
+        for name, (make_body, detail) in cases.items():
+            outcomes = [asyncio.run(race(base_url, args.parallel, make_body(f"{name[:4]}{n}"), detail))
+                        for n in range(args.rounds)]
+            successes = [s for s, _ in outcomes]
+            wrong = [w for _, ws in outcomes for w in ws]
+            ok = all(s == 1 for s in successes) and not wrong
+            failed |= not ok
+            print(f"{args.parallel} parallel signups, {name:<13} x{args.rounds}: successes per round {successes}, "
+                  f"unexpected responses {len(wrong)} {'OK' if ok else 'FAIL'}")
+            for line in wrong[:5]:
+                print(f"    {line}")
+        print()
+
+        async def signup(client):
+            i = next(counter)
+            return await client.post("/auth/signup", json={
+                "username": f"load{i}", "email": f"load{i}@example.com", "password": "secret123"})
+
+        asyncio.run(drive(base_url, signup, args.concurrency, 1.0))
+        rps, latencies, errors = asyncio.run(drive(base_url, signup, args.concurrency, args.duration))
+        print(f"signup under uvicorn: {rps:8.0f} req/s  p50 {percentile(latencies, 50) * 1e3:6.2f} ms  "
+              f"p99 {percentile(latencies, 99) * 1e3:6.2f} ms  errors {errors}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
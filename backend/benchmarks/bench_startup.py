@@ -0,0 +1,66 @@
+"""
+Time to first response of a cold API process.
+
+Launches ``uvicorn main:app`` --repeats times and reports the median
+seconds until GET /health, and separately the first database-backed
+request (GET /api/tips/random), first answer 200. Also reports the median
+import / startup-hook / first-request split from fresh interpreters (see
+startup_profile.py). Run it on two revisions to compare.
+
+Usage:
+    cd backend
+    python -m benchmarks.bench_startup [--repeats 5]
+"""
+
+import argparse
+import logging
+import os
+import statistics
+
+DB_URL = "sqlite:///./bench_startup.db"
+os.environ["DATABASE_URL"] = DB_URL
+
+from benchmarks.common import time_to_first_response  # noqa: E402
+from database import Base, SessionLocal, engine  # noqa: E402
+from models import HealthTip  # noqa: E402
+
+SERVER_ENV = {
+    "DATABASE_URL": DB_URL,
+    "LOG_LEVEL": "WARNING",
+    "EXPIRY_SWEEP_INTERVAL": "0",
+}
+
+
+def seed():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add_all(HealthTip(tip_text=f"Health tip {i}", category="exercise") for i in range(100))
+    db.commit()
+    db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    seed()
+    for path in ("/health", "/api/tips/random"):
+        times = [time_to_first_response(SERVER_ENV, path=path) for _ in range(args.repeats)]
+        print(f"uvicorn launch -> first 200 from {path:<18} median {statistics.median(times) * 1000:7.1f} ms  "
+              f"min {min(times) * 1000:7.1f} ms")
+
+    try:
+        from startup_profile import measure_phases
+    except ImportError:
+        return  # older revision without the profiler
+    os.environ.update(SERVER_ENV)
+    runs = [measure_phases() for _ in range(args.repeats)]
+    for phase in ("import", "startup", "first_request"):
+        print(f"in-process {phase:<14} median {statistics.median(run[phase] for run in runs) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Idle event-stream connections vs. server memory and CPU.
+
+One uvicorn worker; this process opens N GET /api/stream connections
+(plain sockets read with asyncio streams, to keep the client cheap) and
+leaves them idle. For each N:
+
+- server RSS (VmRSS from /proc) and its increase per connection
+- server CPU while the streams sit idle for --window seconds, receiving a
+  tip every STREAM_TIP_INTERVAL and heartbeats in between
+- fan-out: time from the first to the last client receiving the same tip
+
+Then, for comparison, the server CPU the same N pages would cost by
+polling /health and /api/tips/random every --poll-interval seconds,
+extrapolated from the measured CPU time per request (over keep-alive
+connections, which flatters polling).
+
+Usage:
+    cd backend
+    python -m benchmarks.bench_stream [--levels 1000,5000,10000,15000] [--window 10]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import httpx
+
+DB_URL = "sqlite:///./bench_stream.db"
+os.environ["DATABASE_URL"] = DB_URL
+
+from benchmarks.common import BACKEND_DIR, drive, free_port, percentile, server_command, wait_until_ready  # noqa: E402
+from database import Base, engine  # noqa: E402
+import models  # noqa: E402,F401  (registers the tables)
+
+TIP_INTERVAL = 5.0
+HEARTBEAT = 2.5
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def server_env(max_clients):
+    return {
+        "DATABASE_URL": DB_URL,
+        "LOG_LEVEL": "WARNING",
+        "EXPIRY_SWEEP_INTERVAL": "0",
+        "RATE_LIMIT_ENABLED": "false",
+        "STREAM_TIP_INTERVAL": str(TIP_INTERVAL),
+        "STREAM_HEARTBEAT": str(HEARTBEAT),
+        "STREAM_MAX_CLIENTS": str(max_clients),
+        "STREAM_MAX_AGE": "0",
+    }
+
+
+def rss_mib(pid) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def cpu_seconds(pid) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rpartition(")")[2].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+class StreamClients:
+    """Holds open event streams and records when each tip reaches each client."""
+
+    def __init__(self, port):
+        self.port = port
+        self.streams = []
+        self.tips = {}  # tip id -> [first seen, last seen, clients]
+        self.failed = 0
+
+    async def open(self, count, batch=500):
+        while len(self.streams) < count:
+            size = min(batch, count - len(self.streams))
+            await asyncio.gather(*(self._open_one() for _ in range(size)))
+
+    async def _open_one(self):
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+            writer.write(b"GET /api/stream HTTP/1.1\r\nHost: bench\r\nAccept: text/event-stream\r\n\r\n")
+            head = await reader.readuntil(b"\r\n\r\n")
+        except OSError:
+            self.failed += 1
+            return
+        if not head.startswith(b"HTTP/1.1 200"):
+            self.failed += 1
+            writer.close()
+            return
+        self.streams.append((writer, asyncio.ensure_future(self._read(reader))))
+
+    async def _read(self, reader):
+        # Chunked framing is skipped: frames never span chunks, so lines are enough
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            if line.startswith(b"id: "):
+                now = time.perf_counter()
+                seen = self.tips.setdefault(int(line[4:]), [now, now, 0])
+                seen[1] = now
+                seen[2] += 1
+
+    async def close(self):
+        for writer, task in self.streams:
+            task.cancel()
+            writer.close()
+        await asyncio.gather(*(task for _, task in self.streams), return_exceptions=True)
+        self.streams.clear()
+
+
+async def wait_for_clients(client, count, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if (await client.get("/health/stream")).json()["clients"] == count:
+            return
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"server did not reach {count} open streams")
+
+
+async def measure(port, pid, levels, window):
+    results = []
+    clients = StreamClients(port)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=30) as http:
+        await asyncio.sleep(1.0)
+        baseline = rss_mib(pid)
+        print(f"{'streams':>8} {'RSS MiB':>8} {'KiB/stream':>10} {'idle CPU':>9} "
+              f"{'fan-out p50':>11} {'p99':>8} {'max':>8}")
+        print(f"{0:8d} {baseline:8.1f}")
+        for level in levels:
+            await clients.open(level)
+            await wait_for_clients(http, len(clients.streams))
+            await asyncio.sleep(2.0)
+            rss = rss_mib(pid)
+            clients.tips.clear()
+            cpu_before, started = cpu_seconds(pid), time.perf_counter()
+            await asyncio.sleep(window)
+            cpu = (cpu_seconds(pid) - cpu_before) / (time.perf_counter() - started)
+            # Only tips that reached every client count towards fan-out
+            spreads = [last - first for first, last, seen in clients.tips.values()
+                       if seen == len(clients.streams)]
+            per_stream = (rss - baseline) * 1024 / len(clients.streams)
+            print(f"{len(clients.streams):8d} {rss:8.1f} {per_stream:10.1f} {cpu * 100:8.1f}% "
+                  f"{percentile(spreads, 50) * 1e3:9.1f}ms {percentile(spreads, 99) * 1e3:6.1f}ms "
+                  f"{max(spreads, default=0) * 1e3:6.1f}ms")
+            results.append((len(clients.streams), cpu))
+        stats = (await http.get("/health/stream")).json()
+        await clients.close()
+    print(f"connect failures {clients.failed}, server stats {stats}\n")
+    return results
+
+
+def cpu_per_request(base_url, pid, path, seconds=3.0):
+    async def request(client):
+        return await client.get(path)
+
+    asyncio.run(drive(base_url, request, 8, 1.0))
+    before = cpu_seconds(pid)
+    rps, latencies, errors = asyncio.run(drive(base_url, request, 8, seconds))
+    return (cpu_seconds(pid) - before) / len(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--levels", default="1000,5000,10000,15000")
+    parser.add_argument("--window", type=float, default=10.0, help="seconds of idle CPU measured per level")
+    parser.add_argument("--poll-interval", type=float, default=10.0)
+    args = parser.parse_args()
+    levels = [int(level) for level in args.levels.split(",")]
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard != resource.RLIM_INFINITY and max(levels) + 100 > hard:
+        sys.exit(f"open file limit {hard} is too low for {max(levels)} streams")
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+    port = free_port()
+    proc = subprocess.Popen(
+        server_command(port, extra_args=("--backlog", "4096")), cwd=BACKEND_DIR,
+        env={**os.environ, **server_env(max(levels) + 100)},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_until_ready(base_url, 30, proc)
+        print(f"tip every {TIP_INTERVAL:g}s, heartbeat after {HEARTBEAT:g}s of silence, "
+              f"one uvicorn worker (pid {proc.pid})\n")
+        results = asyncio.run(measure(port, proc.pid, levels, args.window))
+
+        per_poll = sum(cpu_per_request(base_url, proc.pid, path) for path in ("/health", "/api/tips/random"))
+        print(f"polling /health + /api/tips/random: {per_poll * 1e6:.0f} us server CPU per page per poll")
+        for streams, cpu in results:
+            polling = streams / args.poll_interval * per_poll
+            print(f"{streams:8d} pages: polling every {args.poll_interval:g}s {polling * 100:6.1f}% CPU "
+                  f"({streams / args.poll_interval * 2:6.0f} req/s)  vs. stream {cpu * 100:5.1f}% CPU")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+if __name__ == "__main__":
+    main()
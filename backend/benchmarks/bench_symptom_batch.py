@@ -0,0 +1,63 @@
+"""
+Throughput of batch symptom analysis at batch sizes 1, 100 and 10k.
+
+Runs single-threaded, so the figures are per core. Reports the rule
+engine alone and the full ``POST /symptom/analyze/batch`` endpoint
+(validation + serialization) through the in-process test client, next to
+a loop of single ``match`` calls.
+
+Usage:
+    cd backend
+    python -m benchmarks.bench_symptom_batch
+"""
+
+import logging
+import os
+import time
+
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from benchmarks.bench_symptom_rules import SAMPLES  # noqa: E402
+from routes.symptom_checker import router  # noqa: E402
+from symptom_rules import rule_engine  # noqa: E402
+
+BATCH_SIZES = (1, 100, 10_000)
+DURATION = 1.0  # seconds per measurement
+
+
+def texts_per_second(fn, texts):
+    rounds = 0
+    start = time.perf_counter()
+    while True:
+        fn(texts)
+        rounds += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= DURATION:
+            return rounds * len(texts) / elapsed
+
+
+def main():
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+
+    print(f"{'batch':>6} {'loop texts/s':>13} {'batch texts/s':>14} {'http texts/s':>13}")
+    for size in BATCH_SIZES:
+        texts = [SAMPLES[i % len(SAMPLES)] for i in range(size)]
+        payload = [{"symptoms": text} for text in texts]
+
+        loop = texts_per_second(lambda ts: [rule_engine.match(t) for t in ts], texts)
+        batch = texts_per_second(rule_engine.match_batch, texts)
+        http = texts_per_second(
+            lambda _: client.post("/symptom/analyze/batch", json=payload).raise_for_status(),
+            texts,
+        )
+        print(f"{size:>6} {loop:>13,.0f} {batch:>14,.0f} {http:>13,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+/symptom/analyze latency with symptom history recording on vs. off.
+
+Every request carries a signed-in user's bearer token, so with history on
+each analysis is buffered and bulk-inserted in the background (symptom_history.py).
+Measures the handler in-process with and without recording, plus the
+per-row cost of a flush; then runs the endpoint under uvicorn with
+SYMPTOM_HISTORY=false and =true and reports throughput, latency
+percentiles, and how many rows and INSERT batches the history run wrote.
+
+Before the history run it checks (OK/FAIL, exit status 1 on any FAIL) that
+an expired or malformed token still gets its analysis, unrecorded, and
+that a valid token's check is recorded.
+
+Usage:
+    cd backend
+    python -m benchmarks.bench_symptom_history [--duration 5] [--concurrency 32] [--flush-ms 200]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+
+import httpx
+
+DB_URL = "sqlite:///./bench_symptom_history.db"
+os.environ["DATABASE_URL"] = DB_URL
+
+from benchmarks.bench_symptom_rules import SAMPLES  # noqa: E402
+from benchmarks.common import drive, percentile, run_server  # noqa: E402
+from database import Base, engine  # noqa: E402
+import models  # noqa: E402,F401  (registers the tables)
+
+
+def bearer_token(user_id, lifetime=timedelta(hours=1)) -> str:
+    from routes.auth import create_access_token
+
+    return create_access_token({"sub": f"user{user_id}", "uid": user_id}, lifetime)
+
+
+def token_checks(base_url, flush_ms) -> bool:
+    """Stale tokens fall back to an anonymous analysis; only valid ones are recorded."""
+    cases = [
+        ("expired token", bearer_token(1, timedelta(minutes=-5)), 0),
+        ("malformed token", "not-a-jwt", 0),
+        ("valid token", bearer_token(1), 1),
+    ]
+    passed = True
+    with httpx.Client(base_url=base_url) as client:
+        for name, token, recorded in cases:
+            before = client.get("/health/symptom-history").json()
+            response = client.post("/symptom/analyze", json={"symptoms": SAMPLES[0]},
+                                   headers={"Authorization": f"Bearer {token}"})
+            time.sleep(flush_ms / 1000 * 3)
+            after = client.get("/health/symptom-history").json()
+            written = after["written"] + after["pending"] - before["written"] - before["pending"]
+            ok = response.status_code == 200 and written == recorded
+            passed &= ok
+            print(f"{'OK  ' if ok else 'FAIL'} {name}: HTTP {response.status_code}, "
+                  f"{written} check(s) recorded (expected {recorded})")
+    print()
+    return passed
+
+
+def in_process(users):
+    """Handler cost with and without record(), and bulk-insert cost per row."""
+    from routes.symptom_checker import analyze_symptoms
+    from schemas import CurrentUser, SymptomRequest
+    from symptom_history import symptom_history
+
+    requests = [(SymptomRequest(symptoms=random.choice(SAMPLES)), CurrentUser(id=user_id, username=f"user{user_id}"))
+                for user_id in (random.randrange(1, users + 1) for _ in range(20_000))]
+    for enabled in (False, True):
+        symptom_history.enabled = enabled
+        started = time.perf_counter()
+        for request, user in requests:
+            analyze_symptoms(request, user)
+        elapsed = time.perf_counter() - started
+        print(f"handler, history={str(enabled).lower():<5} {elapsed / len(requests) * 1e6:7.2f} us/request")
+
+    started = time.perf_counter()
+    written = asyncio.run(symptom_history.flush())
+    elapsed = time.perf_counter() - started
+    print(f"flush of {written} buffered checks: {elapsed * 1e3:.0f} ms ({elapsed / written * 1e6:.1f} us/row, "
+          f"{symptom_history.batches} INSERT batches)\n")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--flush-ms", type=float, default=200)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    in_process(args.users)
+
+    headers = [{"Authorization": f"Bearer {bearer_token(user_id)}"} for user_id in range(1, args.users + 1)]
+
+    async def analyze(client):
+        return await client.post("/symptom/analyze", json={"symptoms": random.choice(SAMPLES)},
+                                 headers=random.choice(headers))
+
+    passed = True
+    for history in ("false", "true"):
+        env = {
+            "DATABASE_URL": DB_URL,
+            "LOG_LEVEL": "WARNING",
+            "EXPIRY_SWEEP_INTERVAL": "0",
+            "RATE_LIMIT_ENABLED": "false",
+            "SYMPTOM_HISTORY": history,
+            "SYMPTOM_HISTORY_FLUSH_MS": str(args.flush_ms),
+        }
+        with run_server(env) as base_url:
+            if history == "true":
+                passed &= token_checks(base_url, args.flush_ms)
+            asyncio.run(drive(base_url, analyze, args.concurrency, 1.0))
+            rps, latencies, errors = asyncio.run(drive(base_url, analyze, args.concurrency, args.duration))
+            stats = httpx.get(f"{base_url}/health/symptom-history").json()
+        print(f"history={history:<5} {rps:8.0f} req/s  p50 {percentile(latencies, 50) * 1e3:6.2f} ms  "
+              f"p99 {percentile(latencies, 99) * 1e3:6.2f} ms  errors {errors}  "
+              f"rows written {stats['written']} in {stats['batches']} INSERT batches")
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Per-request latency of the symptom rule engine as the rule table grows.
+
+Compares the compiled trie matcher against the previous approach of one
+substring scan per keyword. Synthetic rules are appended to the real table.
+
+Usage:
+    cd backend
+    python -m benchmarks.bench_symptom_rules
+"""
+
+import random
+import string
+import time
+
+from symptom_rules import SYMPTOM_RULES, RuleEngine, SymptomRule
+
+SIZES = (25, 250, 1000, 5000)
+SAMPLES = (
+    "i have had a bad cough and a runny nose since monday",
+    "sharp abdominal pain after eating, some nausea in the evening",
+    "throbbing headache behind my eyes and sensitivity to light",
+    "feeling tired with no other obvious symptoms to report today",
+    "sudden chest pain with shortness of breath when climbing stairs",
+)
+
+
+def synthetic_rules(total_keywords: int, seed: int = 42):
+    rng = random.Random(seed)
+    rules = list(SYMPTOM_RULES)
+    existing = sum(len(r.keywords) for r in rules)
+    remaining = max(total_keywords - existing, 0)
+    index = 0
+    while remaining > 0:
+        count = min(remaining, 10)
+        words = tuple(
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(6, 12)))
+            for _ in range(count)
+        )
+        rules.append(SymptomRule(f"synthetic_{index}", words, "unknown", "", "", 100 + index))
+        remaining -= count
+        index += 1
+    return rules
+
+
+def legacy_classify(rules, text):
+    for rule in rules:
+        if any(word in text for word in rule.keywords):
+            return rule
+    return None
+
+
+def time_per_call(fn, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(SAMPLES[i % len(SAMPLES)])
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main(iterations: int = 2000):
+    print(f"{'keywords':>9} {'compile ms':>11} {'engine us':>10} {'legacy us':>10}")
+    for size in SIZES:
+        rules = synthetic_rules(size)
+        start = time.perf_counter()
+        engine = RuleEngine(rules)
+        compile_ms = (time.perf_counter() - start) * 1e3
+        ordered = sorted(rules, key=lambda r: r.priority)
+        engine_us = time_per_call(engine.classify, iterations)
+        legacy_us = time_per_call(lambda t: legacy_classify(ordered, t), iterations)
+        print(f"{size:>9} {compile_ms:>11.2f} {engine_us:>10.2f} {legacy_us:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Health tips served from an in-memory snapshot of a large health_tips table.
+
+Seeds --tips rows, reports the snapshot load time and the SQL statements
+issued by repeated tip requests (expected: none after the first load), then
+measures requests/sec for random tips and deep keyset pages under uvicorn.
+
+Usage:
+    cd backend
+    python -m benchmarks.bench_tips [--tips 100000] [--duration 5]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+os.environ["DATABASE_URL"] = "sqlite:///./bench_tips.db"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from benchmarks.common import QueryCounter, drive, percentile, run_server  # noqa: E402
+from database import Base, engine  # noqa: E402
+from models import HealthTip  # noqa: E402
+
+CATEGORIES = ["nutrition", "exercise", "sleep", "mental_health", "hygiene", "prevention", "posture", "motivation"]
+
+
+def seed(count):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(HealthTip.__table__.insert(), [
+            {"tip_text": f"Health tip number {i}: keep moving and stay hydrated.", "category": CATEGORIES[i % len(CATEGORIES)]}
+            for i in range(count)
+        ])
+
+
+def count_queries(tips):
+    import main
+
+    queries = QueryCounter(engine)
+    client = TestClient(main.app)
+    started = time.perf_counter()
+    client.get("/api/tips/random").raise_for_status()
+    print(f"first request (snapshot load): {(time.perf_counter() - started) * 1000:.0f} ms, {queries.reset()} statements")
+
+    for _ in range(1000):
+        client.get("/api/tips/random").raise_for_status()
+    client.get(f"/api/tips/page?after_id={tips - 200}&limit=100").raise_for_status()
+    client.get("/api/tips/page?category=sleep&limit=100").raise_for_status()
+    print(f"1002 more tip requests:        {queries.reset()} statements")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tips", type=int, default=100_000)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    seed(args.tips)
+    count_queries(args.tips)
+
+    deep = args.tips - 500
+    cases = [
+        ("GET /api/tips/random", "/api/tips/random"),
+        ("GET /api/tips/random?category", "/api/tips/random?category=sleep"),
+        ("GET /api/tips/page (deep page)", f"/api/tips/page?after_id={deep}&limit=100"),
+        ("GET /api/tips/page?category", f"/api/tips/page?category=sleep&after_id={deep}&limit=100"),
+    ]
+    with run_server({"LOG_LEVEL": "WARNING"}) as base_url:
+        for label, path in cases:
+            async def call(client, path=path):
+                return await client.get(path)
+            asyncio.run(drive(base_url, call, args.concurrency, 1.0))  # warm up
+            rps, latencies, errors = asyncio.run(drive(base_url, call, args.concurrency, args.duration))
+            print(f"{label:<32} {rps:8.0f} req/s  p50 {percentile(latencies, 50) * 1e3:6.1f} ms  "
+                  f"p99 {percentile(latencies, 99) * 1e3:6.1f} ms  errors {errors}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Webhook storm: ack latency and batched entitlement writes.
+
+Seeds users and a plan, then replays signed checkout.session.completed
+events (built from benchmarks/fixtures/, or read from --replay) at the
+webhook endpoint concurrently, with a share of redeliveries. Reports ack
+latency, how long the worker took to drain the queue, how many batches
+(users-table transactions) that took, and checks every user was upgraded.
+
+First, in-process: batches holding several activations for one user,
+some of them invalid (unknown plan), must leave the user on the last
+valid plan with every event marked accordingly. Exits non-zero otherwise.
+
+Usage:
+    cd backend
+    python -m benchmarks.bench_webhooks [--events 2000] [--duplicates 0.2] [--concurrency 50]
+    python -m benchmarks.bench_webhooks --replay captured_events.jsonl
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import os
+import random
+import sys
+import time
+
+os.environ["DATABASE_URL"] = "sqlite:///./bench_webhooks.db"
+
+import httpx  # noqa: E402
+
+from benchmarks.common import percentile, run_server  # noqa: E402
+from database import Base, SessionLocal, async_engine, engine  # noqa: E402
+from models import PremiumPlan, User, WebhookEvent  # noqa: E402
+from webhooks import enqueue_event, sign_payload, webhook_worker  # noqa: E402
+
+SECRET = "whsec_benchmark"
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "checkout_session_completed.json")
+
+
+def seed(users):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(PremiumPlan(name="Monthly", price=999, duration_days=30, description="Monthly"))
+    db.add_all(
+        User(username=f"user{i}", email=f"user{i}@example.com", password_hash="x")
+        for i in range(users)
+    )
+    db.commit()
+    db.close()
+
+
+def fixture_events(count):
+    with open(FIXTURE) as f:
+        template = json.load(f)
+    events = []
+    for i in range(1, count + 1):
+        event = copy.deepcopy(template)
+        event["id"] = f"evt_bench_{i}"
+        event["data"]["object"]["id"] = f"cs_bench_{i}"
+        event["data"]["object"]["metadata"] = {"user_id": str(i), "plan_id": "1"}
+        events.append(event)
+    return events
+
+
+def activation_event(event_id, user_id, plan_id):
+    with open(FIXTURE) as f:
+        event = json.load(f)
+    event["id"] = event_id
+    event["data"]["object"]["metadata"] = {"user_id": str(user_id), "plan_id": str(plan_id)}
+    return event
+
+
+async def superseded_grant_checks() -> bool:
+    """Several activations for one user in one batch, valid and not."""
+    cases = [
+        # user_id, [plan per event in order], expected plan, expected outcomes
+        (1, [1, 999], 1, ["processed", "failed"]),
+        (2, [999, 1], 1, ["failed", "processed"]),
+        (3, [999, 998], None, ["failed", "failed"]),
+        (4, [1, 1], 1, ["processed", "processed"]),
+    ]
+    for user_id, plans, _, _ in cases:
+        for n, plan_id in enumerate(plans):
+            event = activation_event(f"evt_check_{user_id}_{n}", user_id, plan_id)
+            await enqueue_event(event, json.dumps(event).encode("utf-8"))
+    await webhook_worker.drain()
+    if async_engine is not None:
+        await async_engine.dispose()
+
+    ok = True
+    db = SessionLocal()
+    for user_id, plans, expected_plan, expected_outcomes in cases:
+        user = db.get(User, user_id)
+        outcomes = [db.get(WebhookEvent, f"evt_check_{user_id}_{n}").status for n in range(len(plans))]
+        passed = user.plan_id == expected_plan and outcomes == expected_outcomes
+        ok &= passed
+        print(f"{'OK  ' if passed else 'FAIL'} plans {plans} for one user: plan {user.plan_id} "
+              f"({user.premium_status}), events {outcomes}")
+    db.close()
+    print()
+    return ok
+
+
+def replay_events(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def storm(base_url, events, duplicates, concurrency):
+    deliveries = events + random.sample(events, int(len(events) * duplicates))
+    random.shuffle(deliveries)
+    latencies = []
+    statuses = {}
+    gate = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=limits) as client:
+        async def deliver(event):
+            payload = json.dumps(event).encode("utf-8")
+            async with gate:
+                start = time.perf_counter()
+                response = await client.post("/api/payments/webhook", content=payload, headers={
+                    "Content-Type": "application/json",
+                    "Stripe-Signature": sign_payload(payload, SECRET),
+                })
+                latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(deliver(e) for e in deliveries))
+        elapsed = time.perf_counter() - started
+    return len(deliveries), elapsed, latencies, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--duplicates", type=float, default=0.2, help="share of events redelivered")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--replay", help="JSON-lines file of captured Stripe events")
+    args = parser.parse_args()
+
+    seed(4)
+    ok = asyncio.run(superseded_grant_checks())
+
+    events = replay_events(args.replay) if args.replay else fixture_events(args.events)
+    seed(len(events))
+    env = {
+        "STRIPE_WEBHOOK_SECRET": SECRET,
+        "WEBHOOK_BATCH_SIZE": str(args.batch_size),
+        "LOG_LEVEL": "WARNING",
+    }
+    with run_server(env) as base_url:
+        sent, elapsed, latencies, statuses = asyncio.run(
+            storm(base_url, events, args.duplicates, args.concurrency)
+        )
+        drain_started = time.perf_counter()
+        while True:
+            stats = httpx.get(f"{base_url}/health/webhooks").json()
+            if stats["applied"] >= len(events) or time.perf_counter() - drain_started > 60:
+                break
+            time.sleep(0.05)
+        drain = time.perf_counter() - drain_started
+
+    db = SessionLocal()
+    upgraded = db.query(User).filter(User.premium_status == "active").count()
+    db.close()
+
+    print(f"deliveries:           {sent} ({len(events)} unique)")
+    print(f"responses:            {statuses}")
+    print(f"ack throughput:       {sent / elapsed:.0f} req/s")
+    print(f"ack latency p50/p99:  {percentile(latencies, 50) * 1e3:.1f} / {percentile(latencies, 99) * 1e3:.1f} ms")
+    print(f"drain after storm:    {drain:.2f} s")
+    print(f"events applied:       {stats['applied']} in {stats['batches']} batches")
+    print(f"users upgraded:       {upgraded}")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Shared helpers for benchmarks that drive a real uvicorn server."""
+
+import asyncio
+import contextlib
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_command(port, workers=1, app="main:app", server="uvicorn", extra_args=()):
+    """Command line for ``uvicorn`` or ``gunicorn -c gunicorn.conf.py`` serving ``app``."""
+    if server == "gunicorn":
+        cmd = [
+            sys.executable, "-m", "gunicorn", app, "-c", "gunicorn.conf.py",
+            "--bind", f"127.0.0.1:{port}", "--workers", str(workers),
+            "--log-level", "warning", "--keep-alive", "60",
+        ]
+    else:
+        cmd = [
+            sys.executable, "-m", "uvicorn", app,
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+            # Keep idle client connections open across bursts; the 5s default
+            # races with pooled load-generator connections (ReadError).
+            "--timeout-keep-alive", "60",
+        ]
+    return cmd + list(extra_args)
+
+
+@contextlib.contextmanager
+def run_server(env=None, workers=1, port=None, startup_timeout=30.0, app="main:app",
+               server="uvicorn", extra_args=()):
+    """Start ``app`` under uvicorn (or gunicorn) from backend/ and yield its base URL."""
+    port = port or free_port()
+    cmd = server_command(port, workers, app, server, extra_args)
+    proc = subprocess.Popen(
+        cmd, cwd=BACKEND_DIR, env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_until_ready(base_url, startup_timeout, proc)
+        yield base_url
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def time_to_first_response(env=None, workers=1, server="uvicorn", path="/health", timeout=60.0):
+    """Seconds from launching the server until ``path`` first answers 200."""
+    port = free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        server_command(port, workers, server=server), cwd=BACKEND_DIR,
+        env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"{server} exited with code {proc.returncode}")
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}{path}", timeout=1.0).status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.01)
+        raise RuntimeError(f"{server} not answering {path} after {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def wait_until_ready(base_url, timeout, proc=None):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(f"server exited with code {proc.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    raise RuntimeError(f"server at {base_url} not ready after {timeout}s")
+
+
+async def drive(base_url, make_request, concurrency=32, duration=5.0):
+    """
+    Run ``concurrency`` clients calling ``make_request(client)`` for
+    ``duration`` seconds. Returns (requests/sec, latencies in seconds, errors).
+    """
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await make_request(client)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return len(latencies) / elapsed, latencies, errors
+
+
+async def asgi_calls_per_second(app, path, seconds=2.0):
+    """Call ``app`` directly for ``seconds``; returns completed requests/sec."""
+    route, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": route, "raw_path": route.encode(),
+        "query_string": query.encode(), "root_path": "",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            raise RuntimeError(f"{path} returned {message['status']}")
+
+    count = 0
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        await app(dict(scope), receive, send)
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+class QueryCounter:
+    """Count SQL statements sent through ``engine`` while attached."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *_):
+        self.count += 1
+
+    def reset(self):
+        count, self.count = self.count, 0
+        return count
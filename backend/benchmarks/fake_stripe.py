@@ -0,0 +1,84 @@
+"""
+Local stand-in for the Stripe checkout API, for offline load tests.
+
+Implements POST /v1/checkout/sessions with Stripe-style Idempotency-Key
+handling, plus GET /_stats with the number of sessions actually created.
+
+Configuration (environment variables):
+    FAKE_STRIPE_LATENCY_MS     added latency per call (default 300)
+    FAKE_STRIPE_FAILURE_RATE   fraction of calls answered with HTTP 500 (default 0)
+
+Usage:
+    cd backend
+    uvicorn benchmarks.fake_stripe:app --port 12111
+    STRIPE_API_BASE=http://127.0.0.1:12111 uvicorn main:app
+"""
+
+import asyncio
+import os
+import random
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+LATENCY = float(os.getenv("FAKE_STRIPE_LATENCY_MS", "300")) / 1000
+FAILURE_RATE = float(os.getenv("FAKE_STRIPE_FAILURE_RATE", "0"))
+
+app = FastAPI(title="Fake Stripe")
+
+_sessions_by_key = {}
+_stats = {"requests": 0, "created": 0, "failed": 0, "idempotent_replays": 0}
+
+
+@app.get("/health")
+async def health():
+    return {"status": "healthy"}
+
+
+@app.get("/_stats")
+async def stats():
+    return _stats
+
+
+@app.post("/_reset")
+async def reset():
+    _sessions_by_key.clear()
+    for key in _stats:
+        _stats[key] = 0
+    return _stats
+
+
+@app.post("/v1/checkout/sessions")
+async def create_checkout_session(request: Request):
+    _stats["requests"] += 1
+    form = await request.form()
+    await asyncio.sleep(LATENCY)
+
+    key = request.headers.get("idempotency-key")
+    if key and key in _sessions_by_key:
+        _stats["idempotent_replays"] += 1
+        return _sessions_by_key[key]
+
+    if random.random() < FAILURE_RATE:
+        _stats["failed"] += 1
+        return JSONResponse(
+            status_code=500,
+            content={"error": {"type": "api_error", "message": "Simulated Stripe failure"}},
+        )
+
+    session_id = f"cs_test_{uuid.uuid4().hex}"
+    session = {
+        "id": session_id,
+        "object": "checkout.session",
+        "url": f"https://checkout.stripe.test/pay/{session_id}",
+        "amount_total": int(form.get("line_items[0][price_data][unit_amount]", 0)),
+        "metadata": {
+            "user_id": form.get("metadata[user_id]"),
+            "plan_id": form.get("metadata[plan_id]"),
+        },
+    }
+    _stats["created"] += 1
+    if key:
+        _sessions_by_key[key] = session
+    return session
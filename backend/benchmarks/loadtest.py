@@ -0,0 +1,315 @@
+"""
+Load test: seed synthetic data and drive realistic request mixes.
+
+Seeds users, plans and tips at the requested scale, then runs closed-loop
+async clients against the API for each selected mix. Every mix reports
+throughput, p50/p95/p99 latency and SQL statements per request (read from
+/metrics) per scenario, and the whole run is written as JSON (with the git
+revision) so results from two commits can be diffed.
+
+Transports:
+    http  start uvicorn (--workers) against the database and drive it over TCP
+    asgi  call the app in this process through httpx's ASGI transport; no
+          network or server, for quick microbenchmarks of handler changes
+
+Usage:
+    cd backend
+    python -m benchmarks.loadtest [--mix mixed] [--users 10000] [--tips 1000]
+        [--concurrency 32] [--duration 10] [--transport http|asgi] [--workers 1]
+        [--database-url sqlite:///./bench_load.db] [--output load.json]
+        [--compare previous.json]
+
+Mixes: login, symptom, browse, status, mixed, all (runs each in turn).
+Point --database-url at a local Postgres container to test against it.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.common import percentile
+
+DEFAULT_DB_URL = "sqlite:///./bench_load.db"
+PASSWORD = "load-test-password"
+
+SYMPTOM_TEXTS = [
+    "I have a bad cough and a runny nose since yesterday",
+    "Stomach ache and nausea after dinner",
+    "Terrible headache behind my eyes, maybe a migraine",
+    "High temperature and chills all night",
+    "Sudden chest pain and shortness of breath",
+    "Feeling tired and a little dizzy",
+    "Sneezing, congestion and a mild fever",
+    "Vomiting and diarrhea for two days",
+]
+
+# name -> (method, route template as reported by /metrics, request factory)
+SCENARIOS = {
+    "login": ("POST", "/auth/login", lambda c, s: c.post(
+        "/auth/login", json={"username": f"user{random.randrange(s.users)}", "password": PASSWORD})),
+    "symptom": ("POST", "/symptom/analyze", lambda c, s: c.post(
+        "/symptom/analyze", json={"symptoms": random.choice(SYMPTOM_TEXTS)})),
+    "plans": ("GET", "/premium/plans", lambda c, s: c.get("/premium/plans")),
+    "tips": ("GET", "/api/tips/random", lambda c, s: c.get("/api/tips/random")),
+    "tips_page": ("GET", "/api/tips/page", lambda c, s: c.get(
+        "/api/tips/page", params={"after_id": random.randrange(max(s.tips - 20, 1)), "limit": 20})),
+    "status": ("GET", "/premium/status/{user_id}", lambda c, s: c.get(
+        f"/premium/status/{random.randrange(s.users) + 1}")),
+}
+
+# name -> {scenario: weight}
+MIXES = {
+    "login": {"login": 1},
+    "symptom": {"symptom": 1},
+    "browse": {"plans": 2, "tips": 2, "tips_page": 1},
+    "status": {"status": 1},
+    "mixed": {"status": 40, "tips": 20, "plans": 15, "symptom": 15, "tips_page": 5, "login": 5},
+}
+
+
+# ===== SEEDING =====
+def seed(scale, bcrypt_rounds):
+    from database import Base, engine
+    from init_db import seed_synthetic_data
+
+    started = time.perf_counter()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    # One hash shared by every user: login cost is set by its rounds
+    seed_synthetic_data(engine, users=scale.users, tips=scale.tips, seed=1234,
+                        password=PASSWORD, bcrypt_rounds=bcrypt_rounds)
+    return time.perf_counter() - started
+
+
+# ===== METRICS =====
+_SERIES = re.compile(r'^(medbuddy_db_queries_total|medbuddy_http_requests_total)\{(.*)\} (\S+)$')
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+async def scrape(client) -> dict:
+    """Return {(method, route): [requests, statements]} from /metrics."""
+    totals = {}
+    response = await client.get("/metrics")
+    for line in response.text.splitlines():
+        match = _SERIES.match(line)
+        if not match:
+            continue
+        labels = dict(_LABEL.findall(match.group(2)))
+        entry = totals.setdefault((labels.get("method"), labels.get("route")), [0, 0])
+        entry[0 if match.group(1) == "medbuddy_http_requests_total" else 1] += float(match.group(3))
+    return totals
+
+
+# ===== DRIVER =====
+async def run_mix(client, mix_name, scale, concurrency, duration, warmup):
+    weights = MIXES[mix_name]
+    names = list(weights)
+    name_weights = [weights[name] for name in names]
+    samples = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+
+    async def worker(deadline, record):
+        while time.perf_counter() < deadline:
+            name = random.choices(names, weights=name_weights)[0]
+            start = time.perf_counter()
+            try:
+                response = await SCENARIOS[name][2](client, scale)
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            if record:
+                samples[name].append(time.perf_counter() - start)
+                errors[name] += failed
+
+    if warmup:
+        deadline = time.perf_counter() + warmup
+        await asyncio.gather(*(worker(deadline, False) for _ in range(concurrency)))
+
+    before = await scrape(client)
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(worker(deadline, True) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    after = await scrape(client)
+
+    scenarios = {}
+    for name in names:
+        method, route = SCENARIOS[name][:2]
+        latencies = samples[name]
+        requests = after.get((method, route), [0, 0])[0] - before.get((method, route), [0, 0])[0]
+        statements = after.get((method, route), [0, 0])[1] - before.get((method, route), [0, 0])[1]
+        scenarios[name] = {
+            "requests": len(latencies),
+            "errors": errors[name],
+            "rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50) * 1e3, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1e3, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1e3, 2),
+            "db_queries_per_request": round(statements / requests, 2) if requests else None,
+        }
+    all_latencies = [latency for values in samples.values() for latency in values]
+    return {
+        "mix": mix_name,
+        "duration_s": round(elapsed, 2),
+        "requests": len(all_latencies),
+        "errors": sum(errors.values()),
+        "rps": round(len(all_latencies) / elapsed, 1),
+        "p50_ms": round(percentile(all_latencies, 50) * 1e3, 2),
+        "p95_ms": round(percentile(all_latencies, 95) * 1e3, 2),
+        "p99_ms": round(percentile(all_latencies, 99) * 1e3, 2),
+        "scenarios": scenarios,
+    }
+
+
+async def run_all(client, mixes, args):
+    results = []
+    for mix_name in mixes:
+        result = await run_mix(client, mix_name, args, args.concurrency, args.duration, args.warmup)
+        print_result(result)
+        results.append(result)
+    return results
+
+
+def print_result(result):
+    print(f"\n== {result['mix']}: {result['rps']} req/s, p50 {result['p50_ms']} ms, "
+          f"p95 {result['p95_ms']} ms, p99 {result['p99_ms']} ms, errors {result['errors']}")
+    print(f"   {'scenario':<10} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'SQL/req':>8}")
+    for name, s in result["scenarios"].items():
+        sql = "-" if s["db_queries_per_request"] is None else s["db_queries_per_request"]
+        print(f"   {name:<10} {s['rps']:>8} {s['p50_ms']:>8} {s['p95_ms']:>8} {s['p99_ms']:>8} {s['errors']:>7} {sql:>8}")
+
+
+def compare(baseline_path, results):
+    """Print per-scenario changes against a previous --output file."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {r["mix"]: r for r in baseline["results"]}
+    print(f"\n== compared with {baseline_path} (revision {baseline.get('revision')})")
+    for result in results:
+        old_mix = previous.get(result["mix"])
+        if old_mix is None:
+            continue
+        for name, new in result["scenarios"].items():
+            old = old_mix["scenarios"].get(name)
+            if old is None or not old["rps"] or not old["p99_ms"]:
+                continue
+            print(f"   {result['mix']}/{name:<10} req/s {old['rps']:>8} -> {new['rps']:<8} "
+                  f"({(new['rps'] / old['rps'] - 1) * 100:+.0f}%)  "
+                  f"p99 {old['p99_ms']:>8} -> {new['p99_ms']:<8} ({(new['p99_ms'] / old['p99_ms'] - 1) * 100:+.0f}%)  "
+                  f"SQL/req {old['db_queries_per_request']} -> {new['db_queries_per_request']}")
+
+
+def run_http(mixes, args, env):
+    import httpx
+
+    from benchmarks.common import run_server
+
+    async def go(base_url):
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+            return await run_all(client, mixes, args)
+
+    with run_server(env, workers=args.workers) as base_url:
+        return asyncio.run(go(base_url))
+
+
+def run_asgi(mixes, args):
+    import httpx
+
+    import main
+
+    async def go():
+        async with main.app.router.lifespan_context(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://asgi", timeout=60.0) as client:
+                return await run_all(client, mixes, args)
+
+    return asyncio.run(go())
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mix", default="mixed", choices=[*MIXES, "all"])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--tips", type=int, default=1_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--transport", default="http", choices=["http", "asgi"])
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--database-url", default=DEFAULT_DB_URL)
+    parser.add_argument("--bcrypt-rounds", type=int, default=4,
+                        help="cost of the seeded password hash, which sets login cost (default 4)")
+    parser.add_argument("--no-seed", action="store_true", help="reuse the data already in the database")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="previous --output file to report changes against")
+    args = parser.parse_args()
+
+    # Everything below imports the app's database module, which reads these
+    env = {
+        "DATABASE_URL": args.database_url,
+        "LOG_LEVEL": "WARNING",
+        "EXPIRY_SWEEP_INTERVAL": "0",
+        "HASH_MAX_QUEUE": str(args.concurrency),
+        # One client address generates all the load
+        "RATE_LIMIT_ENABLED": "false",
+    }
+    if args.workers > 1:
+        env["METRICS_MULTIPROC_DIR"] = os.path.abspath(f"bench_load_metrics_{os.getpid()}")
+        os.makedirs(env["METRICS_MULTIPROC_DIR"], exist_ok=True)
+    os.environ.update(env)
+
+    if not args.no_seed:
+        seconds = seed(args, args.bcrypt_rounds)
+        print(f"seeded {args.users} users, {args.tips} tips in {seconds:.1f}s")
+
+    mixes = list(MIXES) if args.mix == "all" else [args.mix]
+    started_at = datetime.now(timezone.utc).isoformat()
+    try:
+        if args.transport == "asgi":
+            results = run_asgi(mixes, args)
+        else:
+            results = run_http(mixes, args, env)
+    finally:
+        if "METRICS_MULTIPROC_DIR" in env:
+            shutil.rmtree(env["METRICS_MULTIPROC_DIR"], ignore_errors=True)
+
+    if args.compare:
+        compare(args.compare, results)
+
+    if args.output:
+        report = {
+            "revision": git_revision(),
+            "started_at": started_at,
+            "python": sys.version.split()[0],
+            "config": {
+                key: getattr(args, key)
+                for key in ("users", "tips", "concurrency", "duration", "transport", "workers", "bcrypt_rounds")
+            },
+            "database": args.database_url.split("://", 1)[0],
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nwrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Small key/value cache used for read-mostly API payloads.
+
+Values are bytes so the same call sites work against the in-process
+``LocalCache`` (default, one copy per worker) and the optional shared
+``RedisCache`` (set CACHE_URL=redis://... and install ``redis``), which
+lets an invalidation in one worker take effect in all of them.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+CACHE_URL = os.getenv("CACHE_URL", "")
+
+
+class LocalCache:
+    """Thread-safe in-memory cache with per-key TTL."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: Dict[str, Tuple[float, bytes]] = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            with self._lock:
+                if self._data.get(key) is entry:
+                    del self._data[key]
+            return None
+        return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class RedisCache:
+    """Shared cache backed by Redis, for multi-worker deployments."""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_URL is set but the 'redis' package is not installed") from e
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._client.set(key, value, px=int(ttl * 1000))
+
+    def delete(self, key: str) -> None:
+        self._client.delete(key)
+
+    def clear(self) -> None:
+        self._client.flushdb()
+
+
+def _create_cache():
+    if CACHE_URL.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCache(CACHE_URL)
+    return LocalCache()
+
+
+cache = _create_cache()
@@ -1,12 +1,26 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import itertools
+import logging
 import os
+from contextlib import AsyncExitStack, asynccontextmanager
+import threading
+import time
+from typing import Optional
 from dotenv import load_dotenv
 
 # Load environment variables from .env file (for local development)
 load_dotenv()
 
+from cache import cache  # noqa: E402  (after load_dotenv so CACHE_URL can come from .env)
+
+logger = logging.getLogger(__name__)
+
 # ===== DATABASE CONNECTION =====
 
 # Railway provides DATABASE_URL or you can use individual env vars
@@ -22,19 +36,19 @@ if not DATABASE_URL:
         "l0sxJILpuHWh6C2BIAfpgQXfBgF4GyEA@dpg-d4flhqlrnu6s73e75fvg-a.oregon-postgres.render.com/medbuddy_db_7968"
     )
 
-if DATABASE_URL:
+
+def to_sqlalchemy_url(url: str) -> str:
     # Normalize provider URLs to use psycopg2 explicitly for SQLAlchemy.
     # Handle both `postgres://` and `postgresql://` prefixes.
-    if isinstance(DATABASE_URL, str) and DATABASE_URL.startswith("postgres://"):
-        SQLALCHEMY_DATABASE_URL = DATABASE_URL.replace(
-            "postgres://", "postgresql+psycopg2://", 1
-        )
-    elif isinstance(DATABASE_URL, str) and DATABASE_URL.startswith("postgresql://"):
-        SQLALCHEMY_DATABASE_URL = DATABASE_URL.replace(
-            "postgresql://", "postgresql+psycopg2://", 1
-        )
-    else:
-        SQLALCHEMY_DATABASE_URL = DATABASE_URL
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql+psycopg2://", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+psycopg2://", 1)
+    return url
+
+
+if DATABASE_URL:
+    SQLALCHEMY_DATABASE_URL = to_sqlalchemy_url(DATABASE_URL)
 else:
     # Fallback to individual env vars for local dev
     DB_USER = os.getenv("DB_USER", "root")
@@ -49,21 +63,475 @@ else:
     )
 
 
+# Async drivers matching each sync driver above
+_ASYNC_DRIVERS = {
+    "postgresql+psycopg2://": "postgresql+asyncpg://",
+    "mysql+mysqlconnector://": "mysql+aiomysql://",
+    "mysql+pymysql://": "mysql+aiomysql://",
+    "sqlite://": "sqlite+aiosqlite://",
+}
+
+
+def to_async_url(url: str) -> str:
+    for sync_prefix, async_prefix in _ASYNC_DRIVERS.items():
+        if url.startswith(sync_prefix):
+            return url.replace(sync_prefix, async_prefix, 1)
+    return url
+
+
+# Set DB_ASYNC=true to serve requests through the asyncio engine.
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(SQLALCHEMY_DATABASE_URL)
+
+
+# ===== CONNECTION POOL =====
+# Pool sizing (SQLAlchemy defaults). DB_POOL_TIMEOUT is how long a request
+# waits for a free connection before failing with "QueuePool limit" errors.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# Liveness: pre-ping costs a round trip on every checkout. Set
+# DB_POOL_PRE_PING=false to rely on recycling connections older than
+# DB_POOL_RECYCLE seconds instead (keep it below the server's idle timeout).
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1" if DB_POOL_PRE_PING else "1800"))
+
+
+class PoolStats:
+    """Counters fed by pool events; gauges are read from the pool itself."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def incr(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self, pool):
+        with self._lock:
+            counters = {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.wait_total / (self.checkouts or 1) * 1000, 3),
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+        gauges = {"pool_class": type(pool).__name__}
+        # QueuePool exposes these as plain counters; none opens a connection
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            getter = getattr(pool, name, None)
+            if callable(getter):
+                gauges[name] = getter()
+        return {**gauges, **counters}
+
+
+class _TimedCheckout:
+    """Pool mixin recording how long each checkout waited for a connection."""
+
+    stats: PoolStats
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record_wait(time.perf_counter() - start)
+        return conn
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    stats = PoolStats()
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    stats = PoolStats()
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url.startswith("sqlite") and (":memory:" in url or url.split("://", 1)[1] in ("", "/"))
+
+
+def _engine_kwargs(url: str, pool_class) -> dict:
+    kwargs = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+    # In-memory SQLite needs its single-connection pool
+    if not _is_memory_sqlite(url):
+        kwargs.update(
+            poolclass=pool_class,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+        )
+    return kwargs
+
+
+def _instrument(target, stats: PoolStats):
+    event.listen(target, "connect", lambda *_: stats.incr("connects"))
+    event.listen(target, "checkout", lambda *_: stats.incr("checkouts"))
+    event.listen(target, "invalidate", lambda *_: stats.incr("invalidations"))
+
+
 # ===== ENGINE & SESSION =====
-engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_pre_ping=True)
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    **_engine_kwargs(SQLALCHEMY_DATABASE_URL, InstrumentedQueuePool),
+)
+_instrument(engine, InstrumentedQueuePool.stats)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# The async engine is only built in async mode so the async driver is
+# not required otherwise. Scripts such as init_db.py keep using `engine`.
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        **_engine_kwargs(ASYNC_DATABASE_URL, InstrumentedAsyncQueuePool),
+    )
+    _instrument(async_engine.sync_engine, InstrumentedAsyncQueuePool.stats)
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
+
+def dispose_engines_after_fork():
+    """Drop pooled connections inherited from the parent without closing them for it."""
+    engine.dispose(close=False)
+    if async_engine is not None:
+        async_engine.sync_engine.dispose(close=False)
+    for replica in replica_router.replicas:
+        replica.dispose(close=False)
+
+
+def pool_status() -> dict:
+    """Pool gauges and counters for each engine; never opens a connection."""
+    status = {"sync": InstrumentedQueuePool.stats.snapshot(engine.pool)}
+    if async_engine is not None:
+        status["async"] = InstrumentedAsyncQueuePool.stats.snapshot(async_engine.pool)
+    if replica_router.replicas:
+        status["read_replicas"] = replica_router.status()
+    return status
+
 # ===== SECRET KEY =====
-SECRET_KEY = os.getenv("SECRET_KEY", "sG7!9k2Qx#L8pW4vZ6eR")
+# Signs JWT access tokens (JWT_SECRET_KEY is accepted as in .env.example)
+SECRET_KEY = os.getenv("JWT_SECRET_KEY") or os.getenv("SECRET_KEY", "sG7!9k2Qx#L8pW4vZ6eR")
 
 # ===== DB DEPENDENCY =====
 def get_db():
-    print("[DEBUG] Creating DB session")
     db = SessionLocal()
     try:
-        print("[DEBUG] Yielding DB session")
         yield db
     finally:
-        print("[DEBUG] Closing DB session")
         db.close()
+
+
+class ThreadedSession:
+    """
+    Awaitable facade over a sync ``Session`` for sync mode.
+
+    Exposes the subset of the ``AsyncSession`` API the routers use, running
+    each database call in the threadpool, so the same ``async def`` handlers
+    work whether ``DB_ASYNC`` is on or off.
+    """
+
+    def __init__(self, session):
+        self.sync_session = session
+        # Match AsyncSessionLocal: never lazy-load on attribute access,
+        # which would do blocking I/O on the event loop.
+        session.expire_on_commit = False
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def execute(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.execute, statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, *args, **kwargs)
+
+    async def scalars(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalars, statement, *args, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def flush(self):
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def refresh(self, instance, *args, **kwargs):
+        await run_in_threadpool(self.sync_session.refresh, instance, *args, **kwargs)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+
+# A ThreadedSession holds a pooled connection across awaits. Capping open
+# sessions at the pool capacity makes excess requests wait here, on the
+# event loop, rather than in threadpool threads blocked on pool checkout
+# while the sessions that hold connections wait for a free thread.
+_threaded_session_slots = asyncio.Semaphore(DB_POOL_SIZE + DB_MAX_OVERFLOW)
+
+
+# ===== ASYNC DB DEPENDENCY =====
+@asynccontextmanager
+async def open_async_session():
+    """
+    Open an ``AsyncSession`` in async mode, or a ``ThreadedSession``
+    wrapping ``SessionLocal`` in sync mode. Both are used with ``await``.
+    """
+    if DB_ASYNC:
+        async with AsyncSessionLocal() as db:
+            yield db
+    else:
+        async with _threaded_session_slots:
+            db = ThreadedSession(SessionLocal())
+            try:
+                yield db
+            finally:
+                await db.close()
+
+
+async def get_async_db():
+    async with open_async_session() as db:
+        yield db
+
+
+# ===== READ REPLICAS =====
+# Comma-separated replica URLs. When set, read-only queries (those made
+# through open_read_session / get_read_db) are spread over the replicas
+# round-robin; writes and everything else stay on the primary.
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# A replica that fails a query is left out of rotation for this many seconds
+REPLICA_RETRY_AFTER = float(os.getenv("REPLICA_RETRY_AFTER", "30"))
+# After a user's own write, their reads stay on the primary this many
+# seconds so replication lag cannot hide the write. Shared by all workers
+# when CACHE_URL points at Redis, per worker otherwise.
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+
+class Replica:
+    """Engine, session factory and health of one read replica."""
+
+    def __init__(self, url: str):
+        self.stats = PoolStats()
+        url = to_sqlalchemy_url(url)
+        if DB_ASYNC:
+            url = to_async_url(url)
+            pool_class = type("InstrumentedReplicaPool", (_TimedCheckout, AsyncAdaptedQueuePool), {"stats": self.stats})
+            self.engine = create_async_engine(url, **_engine_kwargs(url, pool_class))
+            _instrument(self.engine.sync_engine, self.stats)
+            self.sessionmaker = async_sessionmaker(self.engine, autoflush=False, expire_on_commit=False)
+        else:
+            pool_class = type("InstrumentedReplicaPool", (_TimedCheckout, QueuePool), {"stats": self.stats})
+            self.engine = create_engine(url, **_engine_kwargs(url, pool_class))
+            _instrument(self.engine, self.stats)
+            self.sessionmaker = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+            self._slots = asyncio.Semaphore(DB_POOL_SIZE + DB_MAX_OVERFLOW)
+        self.name = self.engine.url.render_as_string(hide_password=True)
+        self.failed_until = 0.0
+        self.reads = 0
+        self.failures = 0
+
+    @asynccontextmanager
+    async def session(self):
+        if DB_ASYNC:
+            async with self.sessionmaker() as db:
+                yield db
+        else:
+            async with self._slots:
+                db = ThreadedSession(self.sessionmaker())
+                try:
+                    yield db
+                finally:
+                    await db.close()
+
+    def dispose(self, close=True):
+        (self.engine.sync_engine if DB_ASYNC else self.engine).dispose(close=close)
+
+    async def aclose(self):
+        if DB_ASYNC:
+            await self.engine.dispose()
+        else:
+            self.engine.dispose()
+
+    def status(self) -> dict:
+        return {
+            "replica": self.name,
+            "healthy": self.failed_until <= time.monotonic(),
+            "reads": self.reads,
+            "failures": self.failures,
+            **self.stats.snapshot(self.engine.pool),
+        }
+
+
+def _wrote_key(user_id: int) -> str:
+    return f"db:recent-write:{user_id}"
+
+
+class ReplicaRouter:
+    """Picks the replica for a read: round-robin, skipping failed replicas."""
+
+    def __init__(self, replicas, retry_after=REPLICA_RETRY_AFTER, read_your_writes=READ_YOUR_WRITES_SECONDS):
+        self.replicas = replicas
+        self.retry_after = retry_after
+        self.read_your_writes = read_your_writes
+        self._turn = itertools.count()
+        self.primary_reads = 0
+        self.fallbacks = 0
+
+    def note_write(self, user_id: int):
+        """Pin ``user_id``'s reads to the primary for the read-your-writes window."""
+        if self.replicas and self.read_your_writes > 0:
+            cache.set(_wrote_key(user_id), b"1", self.read_your_writes)
+
+    def pick(self, user_ids=()) -> Optional[Replica]:
+        """A healthy replica, or None when the read must go to the primary."""
+        if not self.replicas:
+            return None
+        if any(cache.get(_wrote_key(user_id)) is not None for user_id in user_ids):
+            self.primary_reads += 1
+            return None
+        now = time.monotonic()
+        start = next(self._turn)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if replica.failed_until <= now:
+                replica.reads += 1
+                return replica
+        self.primary_reads += 1
+        return None
+
+    def mark_failed(self, replica: Replica, error: Exception):
+        replica.failures += 1
+        replica.failed_until = time.monotonic() + self.retry_after
+        self.fallbacks += 1
+        logger.warning(f"Read replica {replica.name} failed, using the primary for {self.retry_after:.0f}s: {error}")
+
+    def status(self) -> dict:
+        return {
+            "primary_reads": self.primary_reads,
+            "fallbacks": self.fallbacks,
+            "replicas": [replica.status() for replica in self.replicas],
+        }
+
+
+replica_router = ReplicaRouter([Replica(url) for url in DATABASE_REPLICA_URLS])
+
+
+class ReadSession:
+    """
+    Read-only session, on a replica when one is available.
+
+    The underlying session is opened on first use. If a query fails on the
+    replica, the replica is taken out of rotation and the query, and the
+    rest of the session, runs on the primary instead.
+    """
+
+    def __init__(self, replica: Optional[Replica], stack: AsyncExitStack):
+        self.replica = replica
+        self._stack = stack
+        self._db = None
+
+    async def use_primary(self) -> bool:
+        """Move the rest of this session to the primary; False if already there."""
+        if self.replica is None and self._db is not None:
+            return False
+        self.replica = None
+        self._db = await self._stack.enter_async_context(open_async_session())
+        return True
+
+    async def _run(self, method: str, *args, **kwargs):
+        if self._db is None:
+            if self.replica is None:
+                await self.use_primary()
+            else:
+                self._db = await self._stack.enter_async_context(self.replica.session())
+        if self.replica is None:
+            return await getattr(self._db, method)(*args, **kwargs)
+        try:
+            return await getattr(self._db, method)(*args, **kwargs)
+        except (exc.DBAPIError, exc.TimeoutError) as e:
+            replica_router.mark_failed(self.replica, e)
+            await self.use_primary()
+            return await getattr(self._db, method)(*args, **kwargs)
+
+    async def execute(self, statement, *args, **kwargs):
+        return await self._run("execute", statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args, **kwargs):
+        return await self._run("scalar", statement, *args, **kwargs)
+
+    async def scalars(self, statement, *args, **kwargs):
+        return await self._run("scalars", statement, *args, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return await self._run("get", entity, ident, **kwargs)
+
+
+@asynccontextmanager
+async def open_read_session(user_ids=()):
+    """
+    Open a ``ReadSession`` for read-only queries. Pass the IDs of the users
+    being read so a user's reads follow their own recent writes.
+    """
+    async with AsyncExitStack() as stack:
+        yield ReadSession(replica_router.pick(user_ids), stack)
+
+
+async def get_read_db():
+    async with open_read_session() as db:
+        yield db
+
+
+def note_write(user_id: int):
+    replica_router.note_write(user_id)
+
+
+async def dispose_replicas():
+    for replica in replica_router.replicas:
+        await replica.aclose()
+
+
+# ===== STARTUP CHECK =====
+# Seconds the startup hook waits for the database (0 skips the check)
+DB_STARTUP_CHECK_TIMEOUT = float(os.getenv("DB_STARTUP_CHECK_TIMEOUT", "5"))
+
+
+async def check_database(timeout: float = DB_STARTUP_CHECK_TIMEOUT):
+    """
+    Run ``SELECT 1`` through the engine the handlers use, or raise.
+
+    Also opens the first pooled connection, so the first request does not
+    pay for connecting.
+    """
+    async def ping():
+        async with open_async_session() as db:
+            await db.execute(text("SELECT 1"))
+
+    await asyncio.wait_for(ping(), timeout)
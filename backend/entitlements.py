@@ -0,0 +1,36 @@
+"""
+Cache of per-user subscription state.
+
+Entitlement checks run on every premium-gated request, so the user's plan
+and status are cached briefly. Anything that changes a user's plan
+(subscribing, the webhook worker, the expiry sweep) writes the new state
+through or invalidates it here.
+"""
+
+import json
+import os
+
+from cache import cache
+
+ENTITLEMENT_CACHE_TTL = float(os.getenv("ENTITLEMENT_CACHE_TTL", "30"))
+
+
+def entitlement_key(user_id: int) -> str:
+    return f"premium:entitlement:{user_id}"
+
+
+def get_cached_entitlement(user_id: int):
+    cached = cache.get(entitlement_key(user_id))
+    return json.loads(cached) if cached is not None else None
+
+
+def cache_entitlement(entitlement: dict):
+    cache.set(
+        entitlement_key(entitlement["user_id"]),
+        json.dumps(entitlement).encode("utf-8"),
+        ENTITLEMENT_CACHE_TTL,
+    )
+
+
+def invalidate_entitlement(user_id: int):
+    cache.delete(entitlement_key(user_id))
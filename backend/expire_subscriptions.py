@@ -0,0 +1,123 @@
+"""
+Subscription expiry sweep - marks active plans past plan_expiry as expired.
+
+Runs as set-based UPDATEs in chunks of SWEEP_CHUNK_SIZE rows, each in its
+own short transaction, so no User rows are loaded into Python and other
+writers only wait for one chunk at a time. The composite index on
+(premium_status, plan_expiry) keeps each chunk a range scan.
+
+The API also runs the sweep in-process every EXPIRY_SWEEP_INTERVAL seconds
+(0 disables it, e.g. when this script runs from cron instead). Cached
+entitlements of expired users lapse within ENTITLEMENT_CACHE_TTL.
+
+Usage:
+    cd backend
+    python expire_subscriptions.py [--chunk-size 1000] [--pause 0.01]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import select, update
+from starlette.concurrency import run_in_threadpool
+
+from database import engine
+from models import User
+
+logger = logging.getLogger(__name__)
+
+SWEEP_CHUNK_SIZE = int(os.getenv("SWEEP_CHUNK_SIZE", "1000"))
+SWEEP_PAUSE = float(os.getenv("SWEEP_PAUSE", "0.01"))
+EXPIRY_SWEEP_INTERVAL = float(os.getenv("EXPIRY_SWEEP_INTERVAL", "3600"))
+
+
+def _expire_chunk(now: datetime, chunk_size: int):
+    expired_ids = (
+        select(User.id)
+        .where(User.premium_status == "active", User.plan_expiry < now)
+        .limit(chunk_size)
+        .subquery()
+    )
+    # The extra derived table lets MySQL accept LIMIT inside IN (...) and
+    # a subquery on the table being updated
+    return (
+        update(User)
+        .where(User.id.in_(select(expired_ids.c.id)))
+        .values(premium_status="expired")
+        .execution_options(synchronize_session=False)
+    )
+
+
+def ensure_expiry_index(bind=engine):
+    """Create the (premium_status, plan_expiry) index on databases created before it existed."""
+    for index in User.__table__.indexes:
+        if index.name == "ix_users_premium_status_plan_expiry":
+            index.create(bind=bind, checkfirst=True)
+
+
+def sweep_expired_subscriptions(bind=engine, now: datetime = None,
+                                chunk_size: int = SWEEP_CHUNK_SIZE, pause: float = SWEEP_PAUSE) -> dict:
+    """
+    Expire every active subscription whose plan_expiry is before ``now``.
+
+    Returns the number of users expired and per-chunk transaction timings
+    (how long each chunk held its write locks).
+    """
+    now = now or datetime.utcnow()
+    expired = 0
+    chunk_times = []
+    started = time.perf_counter()
+
+    while True:
+        chunk_started = time.perf_counter()
+        with bind.begin() as conn:
+            rowcount = conn.execute(_expire_chunk(now, chunk_size)).rowcount
+        chunk_times.append(time.perf_counter() - chunk_started)
+        expired += rowcount
+        if rowcount < chunk_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    return {
+        "expired": expired,
+        "chunks": len(chunk_times),
+        "seconds": time.perf_counter() - started,
+        "chunk_max_seconds": max(chunk_times),
+        "chunk_avg_seconds": sum(chunk_times) / len(chunk_times),
+    }
+
+
+async def run_expiry_sweeper(interval: float = EXPIRY_SWEEP_INTERVAL):
+    """Sweep every ``interval`` seconds on a worker thread until cancelled."""
+    while True:
+        try:
+            result = await run_in_threadpool(sweep_expired_subscriptions)
+            if result["expired"]:
+                logger.info(
+                    f"Expired {result['expired']} subscriptions in {result['chunks']} chunks "
+                    f"({result['seconds']:.2f}s, longest chunk {result['chunk_max_seconds'] * 1000:.1f}ms)"
+                )
+        except Exception as e:
+            logger.error(f"Expiry sweep failed: {e}")
+        await asyncio.sleep(interval)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Expire lapsed premium subscriptions")
+    parser.add_argument("--chunk-size", type=int, default=SWEEP_CHUNK_SIZE)
+    parser.add_argument("--pause", type=float, default=SWEEP_PAUSE, help="seconds to sleep between chunks")
+    args = parser.parse_args()
+
+    ensure_expiry_index()
+    result = sweep_expired_subscriptions(chunk_size=args.chunk_size, pause=args.pause)
+    logger.info(
+        f"✓ Expired {result['expired']} subscriptions in {result['chunks']} chunks "
+        f"({result['seconds']:.2f}s, longest chunk {result['chunk_max_seconds'] * 1000:.1f}ms)"
+    )
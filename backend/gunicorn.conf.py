@@ -0,0 +1,99 @@
+"""
+Production server profile: gunicorn managing uvicorn workers.
+
+Usage:
+    cd backend
+    gunicorn -c gunicorn.conf.py main:app
+
+- One worker per available CPU (WEB_CONCURRENCY overrides); workers are
+  async, so more than one per core only adds memory.
+- The app is imported once in the master and forked (PRELOAD_APP=false to
+  import it in each worker instead), which cuts cold start and shares
+  read-only memory between workers.
+- Missing tables and indexes are created once in the master before the
+  workers start (DB_CREATE_SCHEMA=false to skip, e.g. when a release step
+  runs ``python init_db.py --schema-only``).
+- Workers use uvloop and httptools when installed, asyncio and h11
+  otherwise.
+- On shutdown or restart, workers get GRACEFUL_TIMEOUT seconds to finish
+  in-flight requests; a worker silent for WORKER_TIMEOUT is replaced.
+  Requests still open after REQUEST_DRAIN_TIMEOUT seconds (event streams
+  never finish on their own) are ended, so the app's shutdown hooks run
+  before gunicorn kills the worker.
+"""
+
+import importlib.util
+import os
+import shutil
+import tempfile
+
+
+def _available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", str(_available_cpus())))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.getenv("PRELOAD_APP", "true").lower() in ("1", "true", "yes")
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+request_drain_timeout = int(os.getenv("REQUEST_DRAIN_TIMEOUT", str(max(graceful_timeout - 10, 1))))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+# Recycle workers after this many requests (0 disables), with jitter so
+# they do not all restart together
+max_requests = int(os.getenv("MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "0")) or max_requests // 10
+# Trust X-Forwarded-For from these addresses (the load balancer), so rate
+# limits see real client IPs
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+accesslog = None
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
+
+DB_CREATE_SCHEMA = os.getenv("DB_CREATE_SCHEMA", "true").lower() in ("1", "true", "yes")
+
+# /metrics should report every worker; read by metrics.py at import, which
+# with preload happens after this file runs
+_metrics_dir = None
+if workers > 1 and not os.getenv("METRICS_MULTIPROC_DIR"):
+    _metrics_dir = tempfile.mkdtemp(prefix="medbuddy-metrics-")
+    os.environ["METRICS_MULTIPROC_DIR"] = _metrics_dir
+
+
+def on_starting(server):
+    if DB_CREATE_SCHEMA:
+        from database import engine
+        from init_db import init_db
+
+        init_db()
+        # Connections must not be inherited by the forked workers
+        engine.dispose()
+
+
+def when_ready(server):
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    server.log.info(f"MedBuddy ready: {workers} workers, preload={preload_app}, loop={loop}, http={http}")
+
+
+def post_fork(server, worker):
+    if not preload_app:
+        return
+    from database import dispose_engines_after_fork
+    from logging_config import restart_logging_after_fork
+
+    dispose_engines_after_fork()
+    restart_logging_after_fork()
+
+
+def post_worker_init(worker):
+    # UvicornWorker has no setting for it; read by uvicorn at shutdown
+    worker.config.timeout_graceful_shutdown = request_drain_timeout
+
+
+def on_exit(server):
+    if _metrics_dir:
+        shutil.rmtree(_metrics_dir, ignore_errors=True)
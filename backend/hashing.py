@@ -0,0 +1,213 @@
+"""
+Bounded worker pool for bcrypt password hashing and verification.
+
+bcrypt is deliberately slow (~250ms at cost 12), so running it inline ties
+up a request thread for the whole computation. Work is handed to a
+dedicated, size-limited executor instead; when more than
+``HASH_WORKERS + HASH_MAX_QUEUE`` jobs are outstanding new jobs are
+rejected with ``HashingPoolSaturated`` so callers can answer 503 rather
+than pile up behind the pool.
+
+Configuration (environment variables):
+    BCRYPT_ROUNDS     bcrypt cost factor (default 12)
+    HASH_POOL_KIND    "process" (default) or "thread"
+    HASH_WORKERS      worker count (default: CPU count)
+    HASH_MAX_QUEUE    jobs allowed to wait for a worker (default 4 per worker)
+    HASH_RETRY_AFTER  seconds suggested to rejected clients (default 1)
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import BrokenExecutor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+import bcrypt
+
+logger = logging.getLogger(__name__)
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+HASH_POOL_KIND = os.getenv("HASH_POOL_KIND", "process").lower()
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+HASH_MAX_QUEUE = int(os.getenv("HASH_MAX_QUEUE", str(HASH_WORKERS * 4)))
+HASH_RETRY_AFTER = int(os.getenv("HASH_RETRY_AFTER", "1"))
+
+
+class HashingPoolSaturated(Exception):
+    """Raised when the hashing pool already has its maximum of outstanding jobs."""
+
+
+# ===== WORKER FUNCTIONS =====
+# Module-level so they can be pickled into a process pool. Each returns its
+# result together with the monotonic start/end times (CLOCK_MONOTONIC is
+# shared across processes) so the caller can split queue wait from compute.
+
+def _truncate(password):
+    # Ensure input is bytes and truncate to bcrypt's 72-byte limit
+    if isinstance(password, str):
+        password = password.encode('utf-8')
+    return password[:72]
+
+
+def _hash_job(password, rounds):
+    started = time.monotonic()
+    hashed = bcrypt.hashpw(_truncate(password), bcrypt.gensalt(rounds=rounds))
+    return hashed.decode('utf-8'), started, time.monotonic()
+
+
+def _check_job(password, hashed_password):
+    started = time.monotonic()
+    try:
+        ok = bcrypt.checkpw(_truncate(password), hashed_password.encode('utf-8'))
+    except Exception:
+        ok = False
+    return ok, started, time.monotonic()
+
+
+# ===== METRICS =====
+class HashMetrics:
+    """Running totals of queue wait vs. compute time for completed jobs."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.compute_total = 0.0
+        self.compute_max = 0.0
+
+    def record(self, wait, compute):
+        with self._lock:
+            self.completed += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.compute_total += compute
+            self.compute_max = max(self.compute_max, compute)
+
+    def record_rejection(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self):
+        with self._lock:
+            done = self.completed or 1
+            return {
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "wait_avg_ms": round(self.wait_total / done * 1000, 3),
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+                "compute_avg_ms": round(self.compute_total / done * 1000, 3),
+                "compute_max_ms": round(self.compute_max * 1000, 3),
+            }
+
+
+# ===== POOL =====
+class HashingPool:
+    """Size-limited executor with admission control for bcrypt jobs."""
+
+    def __init__(self, kind=HASH_POOL_KIND, workers=HASH_WORKERS, max_queue=HASH_MAX_QUEUE):
+        self.kind = kind
+        self.workers = workers
+        self.max_outstanding = workers + max_queue
+        self.metrics = HashMetrics()
+        self._executor = None
+        self._outstanding = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.kind == "thread":
+                # bcrypt releases the GIL, so threads also spread across cores
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="bcrypt"
+                )
+            else:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+        return self._executor
+
+    def submit(self, fn, *args) -> Future:
+        """Queue ``fn(*args)``; the returned future resolves to the job result."""
+        with self._lock:
+            if self._outstanding >= self.max_outstanding:
+                self.metrics.record_rejection()
+                raise HashingPoolSaturated()
+            self._outstanding += 1
+            executor = self._get_executor()
+
+        submitted = time.monotonic()
+        try:
+            try:
+                job = executor.submit(fn, *args)
+            except BrokenExecutor:
+                # A worker died (OOM kill, segfault) and the executor now
+                # refuses all work: replace it once and resubmit
+                logger.warning("Hashing pool is broken, starting a new one")
+                job = self._replace_executor(executor).submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+
+        result = Future()
+
+        def _done(job):
+            self._release()
+            try:
+                value, started, finished = job.result()
+            except BaseException as exc:
+                result.set_exception(exc)
+                return
+            self.metrics.record(max(started - submitted, 0.0), finished - started)
+            result.set_result(value)
+
+        job.add_done_callback(_done)
+        return result
+
+    def _replace_executor(self, broken):
+        with self._lock:
+            # Concurrent submits may have replaced it already
+            if self._executor is broken:
+                self._executor = None
+            executor = self._get_executor()
+        broken.shutdown(wait=False, cancel_futures=True)
+        return executor
+
+    def _release(self):
+        with self._lock:
+            self._outstanding -= 1
+
+    def stats(self):
+        with self._lock:
+            outstanding = self._outstanding
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_outstanding": self.max_outstanding,
+            "outstanding": outstanding,
+            "bcrypt_rounds": BCRYPT_ROUNDS,
+            **self.metrics.snapshot(),
+        }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+pool = HashingPool()
+
+
+async def hash_password_async(password) -> str:
+    """Hash ``password`` on the pool without blocking the event loop."""
+    return await asyncio.wrap_future(pool.submit(_hash_job, password, BCRYPT_ROUNDS))
+
+
+async def check_password_async(password, hashed_password) -> bool:
+    """Verify ``password`` on the pool without blocking the event loop."""
+    return await asyncio.wrap_future(pool.submit(_check_job, password, hashed_password))
@@ -2,11 +2,30 @@
 Database initialization script - creates all tables in the database.
 Run this once after creating the MySQL database to set up the schema.
 
+It can also load synthetic data at realistic volumes for scaling tests:
+users (a share of them subscribed to a plan), plans and health tips are
+generated from a fixed seed, so two runs with the same arguments produce
+the same rows, and streamed into the database a chunk at a time (one
+transaction per chunk, COPY on PostgreSQL, executemany elsewhere). Rows
+are generated lazily, so memory stays flat whatever the volume. Secondary
+indexes of an empty table are dropped during the load and rebuilt after.
+
 Usage:
     cd backend
-    python init_db.py
+    python init_db.py                 # create tables and seed sample data
+    python init_db.py --schema-only   # pre-start step for deployments
+    python init_db.py --users 1000000 --tips 10000 [--reset] [--seed 42]
 """
 
+import argparse
+import csv
+import io
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import islice
+from sqlalchemy.schema import CreateIndex
 from database import engine, Base
 from models import User, HealthTip, PremiumPlan
 import logging
@@ -14,106 +33,348 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SEED_CHUNK_SIZE = 20_000
+SEED_PASSWORD = "password123"
+
+SAMPLE_PLANS = [
+    {"name": "Monthly", "price": 9.99, "duration_days": 30,
+     "description": "Monthly Premium Plan - Access all features for 30 days"},
+    {"name": "Quarterly", "price": 24.99, "duration_days": 90,
+     "description": "Quarterly Premium Plan - Access all features for 90 days"},
+    {"name": "Annual", "price": 99.99, "duration_days": 365,
+     "description": "Annual Premium Plan - Access all features for 365 days"},
+]
+
 
 def init_db():
     """Initialize the database by creating all tables."""
     try:
         logger.info("Creating database tables...")
         Base.metadata.create_all(bind=engine)
+        create_missing_indexes()
         logger.info("✓ Database tables created successfully!")
         logger.info("Tables created:")
-        logger.info("  - users")
-        logger.info("  - health_tips")
-        logger.info("  - premium_plans")
-        
+        for table in sorted(Base.metadata.tables):
+            logger.info(f"  - {table}")
+
     except Exception as e:
         logger.error(f"✗ Error creating database tables: {e}")
         raise
 
 
+def create_missing_indexes():
+    """
+    create_all() only creates indexes along with new tables; add the ones
+    declared since an existing table was created. An index that cannot be
+    built (e.g. a unique index over duplicate rows) is logged and skipped.
+    """
+    # Reflection does not report expression indexes on every backend, so
+    # let the database skip existing ones where it supports IF NOT EXISTS
+    if_not_exists = engine.dialect.name in ("sqlite", "postgresql")
+    with engine.connect() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                try:
+                    if if_not_exists:
+                        conn.execute(CreateIndex(index, if_not_exists=True))
+                    else:
+                        index.create(conn, checkfirst=True)
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    logger.error(f"✗ Could not create index {index.name} on {table.name}: {e}")
+
+
 def seed_sample_data():
     """Optional: Add sample premium plans and health tips."""
     from database import SessionLocal
-    
+    from routes.tips import DEFAULT_TIPS
+
     try:
         db = SessionLocal()
-        
+
         # Check if data already exists
         existing_plans = db.query(PremiumPlan).count()
         if existing_plans == 0:
             logger.info("Seeding sample premium plans...")
-            plans = [
-                PremiumPlan(
-                    name="Monthly",
-                    price=9.99,
-                    duration_days=30,
-                    description="Monthly Premium Plan - Access all features for 30 days"
-                ),
-                PremiumPlan(
-                    name="Quarterly",
-                    price=24.99,
-                    duration_days=90,
-                    description="Quarterly Premium Plan - Access all features for 90 days"
-                ),
-                PremiumPlan(
-                    name="Annual",
-                    price=99.99,
-                    duration_days=365,
-                    description="Annual Premium Plan - Access all features for 365 days"
-                ),
-            ]
+            plans = [PremiumPlan(**plan) for plan in SAMPLE_PLANS]
             db.add_all(plans)
             db.commit()
             logger.info(f"✓ Added {len(plans)} premium plans")
-        
+
         # Check and seed health tips
         existing_tips = db.query(HealthTip).count()
         if existing_tips == 0:
             logger.info("Seeding sample health tips...")
-            tips = [
-                HealthTip(
-                    title="Stay Hydrated",
-                    content="Drink at least 8 glasses of water daily to maintain proper hydration and support body functions."
-                ),
-                HealthTip(
-                    title="Regular Exercise",
-                    content="Aim for at least 150 minutes of moderate-intensity exercise per week to improve cardiovascular health."
-                ),
-                HealthTip(
-                    title="Balanced Diet",
-                    content="Eat a variety of fruits, vegetables, whole grains, and lean proteins for optimal nutrition."
-                ),
-                HealthTip(
-                    title="Quality Sleep",
-                    content="Get 7-9 hours of quality sleep each night to support immune function and mental health."
-                ),
-                HealthTip(
-                    title="Stress Management",
-                    content="Practice meditation, yoga, or deep breathing exercises to reduce stress and improve mental well-being."
-                ),
-            ]
+            tips = [HealthTip(tip_text=tip["tip"], category=tip["category"]) for tip in DEFAULT_TIPS]
             db.add_all(tips)
             db.commit()
             logger.info(f"✓ Added {len(tips)} health tips")
-        
+
         db.close()
-        
+
     except Exception as e:
         logger.error(f"✗ Error seeding sample data: {e}")
         raise
 
 
+# ===== SYNTHETIC DATA =====
+def generate_users(count, seed, password_hash, plans, subscribed=0.2, now=None, start=0):
+    """
+    Yield ``count`` user rows. About ``subscribed`` of them have a plan:
+    three in four still active, the rest expired. ``plans`` maps plan id
+    to duration in days. Every user shares ``password_hash``.
+    """
+    rng = random.Random(seed)
+    now = now or datetime.utcnow()
+    plan_items = sorted(plans.items())
+    for i in range(start, start + count):
+        created_at = now - timedelta(seconds=rng.randrange(3 * 365 * 86400))
+        row = {
+            "username": f"user{i}",
+            "email": f"user{i}@example.com",
+            "password_hash": password_hash,
+            "created_at": created_at,
+            "premium_status": "free",
+            "plan_id": None,
+            "plan_expiry": None,
+        }
+        if plan_items and rng.random() < subscribed:
+            plan_id, duration_days = rng.choice(plan_items)
+            if rng.random() < 0.75:
+                row["premium_status"] = "active"
+                row["plan_expiry"] = now + timedelta(seconds=rng.randrange(duration_days * 86400))
+            else:
+                row["premium_status"] = "expired"
+                row["plan_expiry"] = now - timedelta(seconds=rng.randrange(365 * 86400))
+            row["plan_id"] = plan_id
+        yield row
+
+
+def generate_tips(count, seed):
+    """Yield ``count`` tip rows, variations on the built-in tips."""
+    from routes.tips import DEFAULT_TIPS
+
+    rng = random.Random(seed)
+    for i in range(count):
+        tip = DEFAULT_TIPS[i % len(DEFAULT_TIPS)]
+        text = tip["tip"] if i < len(DEFAULT_TIPS) else f"{tip['tip']} (#{i // len(DEFAULT_TIPS)}.{rng.randrange(1000)})"
+        yield {"tip_text": text, "category": tip["category"]}
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _copy_chunk(conn, table, chunk):
+    """Stream one chunk through PostgreSQL COPY (psycopg2)."""
+    columns = list(chunk[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in chunk:
+        writer.writerow(["\\N" if row[c] is None else row[c] for c in columns])
+    buffer.seek(0)
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def bulk_load(conn, table, rows, chunk_size=SEED_CHUNK_SIZE, defer_indexes=True) -> int:
+    """
+    Insert ``rows`` (an iterable of dicts with the same keys) into ``table``
+    one transaction per chunk; returns the number of rows inserted.
+
+    When the table starts empty its secondary indexes are dropped first and
+    rebuilt at the end, which is much cheaper than maintaining them row by
+    row. Unique indexes are rebuilt too, so duplicates still fail the load.
+    They are rebuilt even when the load fails, so the table never keeps
+    running without them; the load's error is raised after that.
+    """
+    dialect = conn.dialect.name
+    use_copy = dialect == "postgresql" and conn.dialect.driver == "psycopg2"
+    deferred = []
+    if defer_indexes and conn.execute(table.select().limit(1)).first() is None:
+        deferred = list(table.indexes)
+    for index in deferred:
+        index.drop(conn)
+    conn.commit()
+
+    total = 0
+    try:
+        for chunk in _chunks(rows, chunk_size):
+            if use_copy:
+                _copy_chunk(conn, table, chunk)
+            else:
+                conn.execute(table.insert(), chunk)
+            conn.commit()
+            total += len(chunk)
+    except BaseException:
+        conn.rollback()
+        try:
+            _create_indexes(conn, deferred)
+        except Exception:
+            pass  # logged by _create_indexes; the load's error matters more
+        raise
+
+    _create_indexes(conn, deferred)
+    return total
+
+
+def _create_indexes(conn, indexes):
+    """Create each of ``indexes`` in its own transaction; raises the first failure after trying all."""
+    error = None
+    for index in indexes:
+        try:
+            index.create(conn)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Could not rebuild index {index.name} on {index.table.name}: {e}")
+            error = error or e
+    if error is not None:
+        raise error
+
+
+@contextmanager
+def _bulk_load_settings(conn):
+    """
+    Per-session settings that speed up bulk loading, restored on exit.
+
+    The connection goes back to the application's pool afterwards, and
+    durability or constraint checks must not stay off for whoever gets it
+    next. If they cannot be restored the connection is discarded instead.
+    """
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        pragmas = {"synchronous": "OFF", "temp_store": "MEMORY", "cache_size": "-65536"}
+        saved = {name: conn.exec_driver_sql(f"PRAGMA {name}").scalar() for name in pragmas}
+        apply = [f"PRAGMA {name}={value}" for name, value in pragmas.items()]
+        restore = [f"PRAGMA {name}={value}" for name, value in saved.items()]
+    elif dialect == "mysql":
+        unique_checks, foreign_key_checks = conn.exec_driver_sql(
+            "SELECT @@SESSION.unique_checks, @@SESSION.foreign_key_checks").one()
+        apply = ["SET unique_checks=0, foreign_key_checks=0"]
+        restore = [f"SET unique_checks={int(unique_checks)}, foreign_key_checks={int(foreign_key_checks)}"]
+    elif dialect == "postgresql":
+        synchronous_commit = conn.exec_driver_sql("SHOW synchronous_commit").scalar()
+        apply = ["SET synchronous_commit TO off"]
+        restore = [f"SET synchronous_commit TO {synchronous_commit}"]
+    else:
+        apply = restore = []
+    conn.commit()
+
+    try:
+        for statement in apply:
+            conn.exec_driver_sql(statement)
+        conn.commit()
+        yield
+    finally:
+        try:
+            conn.rollback()
+            for statement in restore:
+                conn.exec_driver_sql(statement)
+            conn.commit()
+        except Exception:
+            conn.invalidate()
+            raise
+
+
+def seed_synthetic_data(bind=engine, users=0, tips=0, subscribed=0.2, seed=42,
+                        chunk_size=SEED_CHUNK_SIZE, password=SEED_PASSWORD, bcrypt_rounds=None,
+                        password_hash=None, defer_indexes=True) -> dict:
+    """
+    Load the sample plans (if missing), ``tips`` tips and ``users`` users.
+
+    Returns {table name: (rows, seconds)}. Usernames are user0..user{N-1}
+    (continuing after existing users' ids is the caller's concern) and all
+    share ``password``, hashed once.
+    """
+    if password_hash is None:
+        import bcrypt
+        from hashing import BCRYPT_ROUNDS
+
+        rounds = bcrypt_rounds or BCRYPT_ROUNDS
+        password_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=rounds)).decode()
+
+    results = {}
+    with bind.connect() as conn, _bulk_load_settings(conn):
+        started = time.perf_counter()
+        plans_table = PremiumPlan.__table__
+        select_plans = plans_table.select().with_only_columns(plans_table.c.id, plans_table.c.duration_days)
+        plans = dict(conn.execute(select_plans).all())
+        if not plans:
+            conn.execute(plans_table.insert(), SAMPLE_PLANS)
+            conn.commit()
+            plans = dict(conn.execute(select_plans).all())
+            results[plans_table.name] = (len(plans), time.perf_counter() - started)
+        conn.commit()
+
+        for table, count, rows in (
+            (HealthTip.__table__, tips, lambda: generate_tips(tips, seed)),
+            (User.__table__, users, lambda: generate_users(users, seed, password_hash, plans, subscribed)),
+        ):
+            if not count:
+                continue
+            started = time.perf_counter()
+            inserted = bulk_load(conn, table, rows(), chunk_size, defer_indexes)
+            results[table.name] = (inserted, time.perf_counter() - started)
+            logger.info(f"✓ Loaded {inserted} rows into {table.name} in {results[table.name][1]:.1f}s "
+                        f"({inserted / max(results[table.name][1], 1e-9):,.0f} rows/s)")
+    return results
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the MedBuddy schema and seed sample data")
+    parser.add_argument("--schema-only", action="store_true",
+                        help="only create missing tables and indexes")
+    parser.add_argument("--users", type=int, default=0, help="synthetic users to load")
+    parser.add_argument("--tips", type=int, default=0, help="synthetic health tips to load")
+    parser.add_argument("--subscribed", type=float, default=0.2,
+                        help="share of synthetic users with a plan (default 0.2)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed; same seed, same rows")
+    parser.add_argument("--chunk-size", type=int, default=SEED_CHUNK_SIZE,
+                        help="rows per transaction")
+    parser.add_argument("--password", default=SEED_PASSWORD, help="password of every synthetic user")
+    parser.add_argument("--bcrypt-rounds", type=int, help="cost of the shared password hash")
+    parser.add_argument("--no-defer-indexes", action="store_true",
+                        help="keep indexes in place while loading")
+    parser.add_argument("--reset", action="store_true",
+                        help="drop and recreate all tables first (destroys data)")
+    args = parser.parse_args()
+
     logger.info("=" * 50)
     logger.info("MedBuddy Database Initialization")
     logger.info("=" * 50)
-    
+
+    if args.reset:
+        logger.info("Dropping all tables...")
+        Base.metadata.drop_all(bind=engine)
+
     # Create tables
     init_db()
-    
-    # Seed sample data (optional)
-    seed_sample_data()
-    
+
+    if args.users or args.tips:
+        started = time.perf_counter()
+        seed_synthetic_data(
+            users=args.users, tips=args.tips, subscribed=args.subscribed, seed=args.seed,
+            chunk_size=args.chunk_size, password=args.password, bcrypt_rounds=args.bcrypt_rounds,
+            defer_indexes=not args.no_defer_indexes,
+        )
+        logger.info(f"✓ Synthetic data loaded in {time.perf_counter() - started:.1f}s")
+    elif not args.schema_only:
+        # Seed sample data (optional)
+        seed_sample_data()
+
     logger.info("=" * 50)
     logger.info("Database initialization complete!")
     logger.info("=" * 50)
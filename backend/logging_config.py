@@ -0,0 +1,160 @@
+"""
+Application logging: JSON lines written from a background thread.
+
+Request threads only capture the record (message interpolation and the
+current request ID) and push it onto an in-memory queue; a
+``QueueListener`` thread does the JSON formatting and the stdout write.
+
+Configuration (environment variables):
+    LOG_LEVEL       root level (default INFO)
+    LOG_FORMAT      "json" (default) or "text"
+    SQL_LOG_LEVEL   level for SQLAlchemy loggers (default WARNING); INFO logs every statement
+"""
+
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import uuid
+from datetime import datetime, timezone
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+SQL_LOG_LEVEL = os.getenv("SQL_LOG_LEVEL", "WARNING").upper()
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+request_id_var = contextvars.ContextVar("request_id", default="-")
+
+_listener = None
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp each record with the current request's correlation ID."""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        # exc_text is pre-rendered by the queue handler on the request thread
+        exc_text = record.exc_text
+        if not exc_text and record.exc_info:
+            exc_text = self.formatException(record.exc_info)
+        if exc_text:
+            entry["exc_info"] = exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _DeferredFormatQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener.
+
+    The stock ``prepare`` formats the record on the calling thread. Here we
+    only interpolate the message (so mutable args are captured as they are
+    now) and render any traceback text, which needs the live exception.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging():
+    """Route all logging through a queue drained by a background thread."""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    stream = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter(
+            "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+        ))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _DeferredFormatQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(LOG_LEVEL)
+    logging.getLogger("sqlalchemy").setLevel(SQL_LOG_LEVEL)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def restart_logging_after_fork():
+    """The writer thread does not survive fork(); give the child its own."""
+    global _listener
+    _listener = None
+    return setup_logging()
+
+
+class RequestIdMiddleware:
+    """
+    Pure ASGI middleware assigning each request a correlation ID.
+
+    Reuses an incoming ``X-Request-ID`` header when present, exposes the ID
+    to log records via ``request_id_var`` and echoes it on the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER:
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((REQUEST_ID_HEADER, request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
@@ -1,29 +1,40 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from database import engine, Base
+from starlette.middleware.gzip import GZipMiddleware
+from database import DB_STARTUP_CHECK_TIMEOUT, async_engine, check_database, dispose_replicas, pool_status
+import hashing
+from stripe_client import stripe_client
+from webhooks import WEBHOOK_WORKER, webhook_worker
+from expire_subscriptions import EXPIRY_SWEEP_INTERVAL, run_expiry_sweeper
+from symptom_history import symptom_history
+import asyncio
 from routes.auth import router as auth_router
 from routes.symptom_checker import router as symptom_router
 from routes.tips import router as tips_router
 from routes.premium import router as premium_router
 from routes.payments import router as payments_router
+from routes.stream import broadcaster, router as stream_router
 import logging
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.requests import Request
 from fastapi import status
+from logging_config import RequestIdMiddleware, setup_logging, shutdown_logging
+from responses import ORJSONResponse, PreEncodedJSONResponse, encode_json
+import metrics
+import os
+from static_assets import FRONTEND_BUILD_DIR, FRONTEND_MOUNT_PATH, SERVE_FRONTEND, StaticAssets
 
-logging.basicConfig(level=logging.DEBUG)
+setup_logging()
+logger = logging.getLogger(__name__)
 
-# Create database tables
-try:
-    Base.metadata.create_all(bind=engine)
-    print("[DEBUG] Database tables created successfully")
-except Exception as e:
-    print(f"[DEBUG] Database error: {e}")
+# Tables are created once before the server starts (init_db.py, or the
+# gunicorn master, see gunicorn.conf.py), not by every worker at import.
 
 app = FastAPI(
     title="MedBuddy",
     description="AI-powered health consultation platform aligned with SDG 3",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS - MUST be added as middleware BEFORE routing
@@ -44,41 +55,183 @@ app.add_middleware(
     max_age=3600,
 )
 
+# Compress responses of at least GZIP_MIN_SIZE bytes (large JSON such as
+# /api/tips/all) for clients that accept gzip. Smaller ones are not worth
+# the CPU, and responses that already carry a Content-Encoding (the
+# precompressed frontend) pass through untouched.
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+# Long-lived event streams: neither compressed nor counted as requests
+STREAM_PATHS = ("/api/stream",)
+
+
+class StreamingAwareGZipMiddleware(GZipMiddleware):
+    """GZip, except for event streams: the compressor would hold frames back."""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in STREAM_PATHS:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+if GZIP_MIN_SIZE > 0:
+    app.add_middleware(StreamingAwareGZipMiddleware, minimum_size=GZIP_MIN_SIZE, compresslevel=GZIP_LEVEL)
+
+app.add_middleware(metrics.MetricsMiddleware, skip_paths=STREAM_PATHS)
+
+# Outermost, so every log line of a request carries its correlation ID
+app.add_middleware(RequestIdMiddleware)
+
 # Add global exception handler for debugging
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
-    logging.error(f"[ERROR] {type(exc).__name__}: {exc}", exc_info=True)
+    logger.error(f"{type(exc).__name__}: {exc}", exc_info=True)
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"detail": f"{type(exc).__name__}: {str(exc)}"}
     )
 
 # Include routers
-print("[DEBUG] Including routers...")
 app.include_router(auth_router, tags=["auth"])
 app.include_router(symptom_router, tags=["symptom"])
 app.include_router(tips_router, prefix="/api", tags=["tips"])
 app.include_router(premium_router, tags=["premium"])
 app.include_router(payments_router, tags=["payments"])
+app.include_router(stream_router, prefix="/api", tags=["stream"])
+
+# Optional: serve the built frontend (python static_assets.py build). A
+# missing build is logged once and the API starts without it
+if SERVE_FRONTEND:
+    try:
+        frontend_assets = StaticAssets(FRONTEND_BUILD_DIR)
+    except FileNotFoundError:
+        logger.error(f"SERVE_FRONTEND is set but there is no frontend build in {FRONTEND_BUILD_DIR} "
+                     f"(run python static_assets.py build); not serving {FRONTEND_MOUNT_PATH}")
+    else:
+        app.mount(FRONTEND_MOUNT_PATH, frontend_assets, name="frontend")
+
+
+# Constant payloads, encoded once at import
+ROOT_BODY = encode_json({
+    "message": "Welcome to MedBuddy - Your Health Assistant",
+    "sdg": "SDG 3: Good Health and Well-being",
+    "status": "API is running",
+    "docs": "Visit /docs for API documentation"
+})
+HEALTH_BODY = encode_json({"status": "healthy", "service": "MedBuddy"})
 
 
 @app.get("/")
-def read_root():
+async def read_root():
+    return PreEncodedJSONResponse(ROOT_BODY)
+
+@app.get("/health")
+async def health_check():
+    return PreEncodedJSONResponse(HEALTH_BODY)
+
+@app.get("/health/db")
+def db_health():
+    """Connection pool gauges and counters, read without opening a connection."""
+    return pool_status()
+
+@app.get("/health/hashing")
+def hashing_health():
+    """Password hashing pool occupancy and queue-wait vs. compute timings."""
+    return hashing.pool.stats()
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """Request, latency and SQL metrics in Prometheus text format (all workers)."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/health/symptom-history")
+def symptom_history_health():
+    """Symptom checks buffered, written and dropped by this process."""
+    return symptom_history.stats()
+
+@app.get("/health/webhooks")
+def webhooks_health():
+    """Batches and events applied by this process's webhook worker."""
     return {
-        "message": "Welcome to MedBuddy - Your Health Assistant",
-        "sdg": "SDG 3: Good Health and Well-being",
-        "status": "API is running",
-        "docs": "Visit /docs for API documentation"
+        "running": WEBHOOK_WORKER,
+        "batch_size": webhook_worker.batch_size,
+        "batches": webhook_worker.batches,
+        "applied": webhook_worker.applied,
     }
 
-@app.get("/health")
-def health_check():
-    return {"status": "healthy", "service": "MedBuddy"}
+@app.get("/health/stream")
+def stream_health():
+    """Open event streams of this process and frames broadcast to them."""
+    return broadcaster.stats()
+
+
+_background_tasks = []
+
+
+@app.on_event("startup")
+async def check_database_connection():
+    # Checked here rather than at import so importing the app stays cheap;
+    # a failure is logged and the server still starts
+    if DB_STARTUP_CHECK_TIMEOUT <= 0:
+        return
+    try:
+        await check_database()
+        logger.info("Database connection OK")
+    except Exception as e:
+        logger.error(f"Database check failed at startup: {type(e).__name__}: {e}")
+
+
+@app.on_event("startup")
+async def start_background_workers():
+    if WEBHOOK_WORKER:
+        webhook_worker.start()
+    symptom_history.start()
+    broadcaster.start()
+    if EXPIRY_SWEEP_INTERVAL > 0:
+        _background_tasks.append(asyncio.create_task(run_expiry_sweeper()))
+    if metrics.METRICS_MULTIPROC_DIR:
+        _background_tasks.append(asyncio.create_task(metrics.run_snapshot_writer()))
+
+
+@app.on_event("shutdown")
+async def shutdown_resources():
+    for task in _background_tasks:
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    await broadcaster.stop()
+    await webhook_worker.stop()
+    try:
+        await symptom_history.stop()
+    except Exception as e:
+        logger.error(f"Could not write buffered symptom history: {e}")
+    hashing.pool.shutdown()
+    await stripe_client.aclose()
+    if async_engine is not None:
+        await async_engine.dispose()
+    await dispose_replicas()
+    shutdown_logging()
 
 
 if __name__ == "__main__":
+    import argparse
     import uvicorn
-    import os
-    
-    port = int(os.environ.get("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
+
+    parser = argparse.ArgumentParser(description="Run the MedBuddy API")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print where startup time goes (imports, startup hooks, first request) and exit")
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        from startup_profile import profile_startup
+
+        profile_startup()
+    else:
+        from init_db import init_db
+
+        init_db()
+        port = int(os.environ.get("PORT", 8000))
+        # Event streams stay open until the client leaves: end them after
+        # REQUEST_DRAIN_TIMEOUT seconds so shutdown hooks still run
+        drain_timeout = int(os.environ.get("REQUEST_DRAIN_TIMEOUT", "20"))
+        uvicorn.run(app, host="0.0.0.0", port=port, timeout_graceful_shutdown=drain_timeout)
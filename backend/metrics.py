@@ -0,0 +1,306 @@
+"""
+Request and database metrics in the Prometheus text exposition format.
+
+``MetricsMiddleware`` records, per route template (``/premium/status/{user_id}``
+rather than each raw path), a request counter by status, a latency
+histogram and the number and total time of SQL statements the request
+issued. SQL statements are timed with engine-wide SQLAlchemy cursor events
+and attributed to the current request through a context variable;
+statements run outside a request (background workers) are reported under
+route ``<background>``.
+
+Multiple workers: set METRICS_MULTIPROC_DIR to a directory shared by the
+workers (empty it before the server starts). Each worker then writes its
+totals there every METRICS_FLUSH_INTERVAL seconds (and when it serves a
+scrape), and ``/metrics`` reports the sum across workers. In-flight gauges
+of workers that have exited are dropped; their counters are kept.
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED_ROUTE = "<unmatched>"
+BACKGROUND_ROUTE = "<background>"
+
+# [statement count, seconds] for the request being handled, if any
+_request_db_stats = contextvars.ContextVar("request_db_stats", default=None)
+
+
+# ===== REGISTRY =====
+class Metrics:
+    """Thread-safe in-process totals, keyed by (method, route)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.requests: Dict[Tuple[str, str, str], int] = {}
+        # per (method, route): [count per bucket..., +Inf count, sum of seconds]
+        self.latency: Dict[Tuple[str, str], List[float]] = {}
+        self.db: Dict[Tuple[str, str], List[float]] = {}  # [statements, seconds]
+        self.in_flight = 0
+
+    def request_started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self, method, route, status_code, seconds, queries, query_seconds):
+        bucket = bisect_left(self.buckets, seconds)
+        key = (method, route)
+        with self._lock:
+            self.in_flight -= 1
+            request_key = (method, route, status_code)
+            self.requests[request_key] = self.requests.get(request_key, 0) + 1
+            latency = self.latency.get(key)
+            if latency is None:
+                latency = self.latency[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            latency[bucket] += 1
+            latency[-1] += seconds
+            if queries:
+                db = self.db.get(key)
+                if db is None:
+                    db = self.db[key] = [0, 0.0]
+                db[0] += queries
+                db[1] += query_seconds
+
+    def query_finished(self, seconds):
+        """Record a statement issued outside any request."""
+        key = ("", BACKGROUND_ROUTE)
+        with self._lock:
+            db = self.db.get(key)
+            if db is None:
+                db = self.db[key] = [0, 0.0]
+            db[0] += 1
+            db[1] += seconds
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "buckets": list(self.buckets),
+                "in_flight": self.in_flight,
+                "requests": [[*key, count] for key, count in self.requests.items()],
+                "latency": [[*key, list(values)] for key, values in self.latency.items()],
+                "db": [[*key, list(values)] for key, values in self.db.items()],
+            }
+
+
+metrics = Metrics()
+
+
+# ===== SQL STATEMENT TIMING =====
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_started
+    stats = _request_db_stats.get()
+    if stats is None:
+        metrics.query_finished(elapsed)
+    else:
+        stats[0] += 1
+        stats[1] += elapsed
+
+
+# ===== MIDDLEWARE =====
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware feeding ``metrics``.
+
+    Requests to ``skip_paths`` (long-lived event streams) are not recorded:
+    they would sit in the in-flight gauge for hours and then land in the
+    top latency bucket.
+    """
+
+    def __init__(self, app, skip_paths=()):
+        self.app = app
+        self.skip_paths = frozenset(skip_paths)
+        self._templates = None
+
+    def _route_template(self, scope) -> str:
+        route = scope.get("route")
+        if route is not None:
+            return route.path
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        if self._templates is None:
+            # Built on first use, once every router has been included
+            self._templates = {
+                r.endpoint: r.path for r in scope["app"].routes if hasattr(r, "endpoint")
+            }
+        return self._templates.get(endpoint, UNMATCHED_ROUTE)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = "500"
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = str(message["status"])
+            await send(message)
+
+        db_stats = [0, 0.0]
+        token = _request_db_stats.set(db_stats)
+        metrics.request_started()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.request_finished(
+                scope["method"], self._route_template(scope), status_code,
+                time.perf_counter() - started, db_stats[0], db_stats[1],
+            )
+            _request_db_stats.reset(token)
+
+
+# ===== MULTIPROCESS =====
+def _snapshot_path(pid: int) -> str:
+    return os.path.join(METRICS_MULTIPROC_DIR, f"metrics_{pid}.json")
+
+
+def write_snapshot():
+    """Publish this worker's totals to METRICS_MULTIPROC_DIR."""
+    path = _snapshot_path(os.getpid())
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(metrics.snapshot(), f)
+    os.replace(tmp, path)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _collect() -> List[dict]:
+    if not METRICS_MULTIPROC_DIR:
+        return [metrics.snapshot()]
+    write_snapshot()
+    snapshots = []
+    for name in os.listdir(METRICS_MULTIPROC_DIR):
+        if not (name.startswith("metrics_") and name.endswith(".json")):
+            continue
+        try:
+            with open(os.path.join(METRICS_MULTIPROC_DIR, name)) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if not _pid_alive(snapshot["pid"]):
+            snapshot["in_flight"] = 0
+        snapshots.append(snapshot)
+    return snapshots
+
+
+async def run_snapshot_writer(interval: float = METRICS_FLUSH_INTERVAL):
+    """Periodically publish this worker's totals (multiprocess mode only)."""
+    while True:
+        try:
+            write_snapshot()
+        except OSError:
+            pass
+        await asyncio.sleep(interval)
+
+
+# ===== EXPOSITION =====
+def _labels(**labels) -> str:
+    parts = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render() -> str:
+    """Current totals, summed across workers, in text exposition format."""
+    requests: Dict[tuple, int] = {}
+    latency: Dict[tuple, List[float]] = {}
+    db: Dict[tuple, List[float]] = {}
+    in_flight = 0
+    buckets = list(LATENCY_BUCKETS)
+
+    for snapshot in _collect():
+        in_flight += snapshot["in_flight"]
+        for method, route, status_code, count in snapshot["requests"]:
+            key = (method, route, status_code)
+            requests[key] = requests.get(key, 0) + count
+        if snapshot["buckets"] != buckets:
+            continue  # histogram layout changed between deploys
+        for method, route, values in snapshot["latency"]:
+            total = latency.setdefault((method, route), [0] * len(values))
+            for i, value in enumerate(values):
+                total[i] += value
+        for method, route, values in snapshot["db"]:
+            total = db.setdefault((method, route), [0, 0.0])
+            total[0] += values[0]
+            total[1] += values[1]
+
+    lines = [
+        "# HELP medbuddy_http_requests_total HTTP requests by route template and status.",
+        "# TYPE medbuddy_http_requests_total counter",
+    ]
+    for (method, route, status_code), count in sorted(requests.items()):
+        lines.append(f"medbuddy_http_requests_total{_labels(method=method, route=route, status=status_code)} {count}")
+
+    lines += [
+        "# HELP medbuddy_http_request_duration_seconds HTTP request latency by route template.",
+        "# TYPE medbuddy_http_request_duration_seconds histogram",
+    ]
+    for (method, route), values in sorted(latency.items()):
+        cumulative = 0
+        for bound, count in zip(buckets + ["+Inf"], values[:-1]):
+            cumulative += count
+            le = bound if bound == "+Inf" else repr(bound)
+            lines.append(
+                f"medbuddy_http_request_duration_seconds_bucket{_labels(method=method, route=route, le=le)} {cumulative}"
+            )
+        labels = _labels(method=method, route=route)
+        lines.append(f"medbuddy_http_request_duration_seconds_sum{labels} {_number(values[-1])}")
+        lines.append(f"medbuddy_http_request_duration_seconds_count{labels} {cumulative}")
+
+    lines += [
+        "# HELP medbuddy_http_requests_in_progress HTTP requests currently being handled.",
+        "# TYPE medbuddy_http_requests_in_progress gauge",
+        f"medbuddy_http_requests_in_progress {in_flight}",
+        "# HELP medbuddy_db_queries_total SQL statements executed, by the route that issued them.",
+        "# TYPE medbuddy_db_queries_total counter",
+    ]
+    for (method, route), (count, _) in sorted(db.items()):
+        lines.append(f"medbuddy_db_queries_total{_labels(method=method, route=route)} {count}")
+    lines += [
+        "# HELP medbuddy_db_query_duration_seconds_total Time spent executing SQL statements, by route.",
+        "# TYPE medbuddy_db_query_duration_seconds_total counter",
+    ]
+    for (method, route), (_, seconds) in sorted(db.items()):
+        lines.append(f"medbuddy_db_query_duration_seconds_total{_labels(method=method, route=route)} {_number(seconds)}")
+
+    return "\n".join(lines) + "\n"
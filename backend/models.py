@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
 from sqlalchemy.sql import func
 from database import Base
 
@@ -14,13 +14,24 @@ class User(Base):
     plan_id = Column(Integer, nullable=True)
     plan_expiry = Column(DateTime, nullable=True)
 
+    __table_args__ = (
+        # Lets the expiry sweep find active subscriptions past plan_expiry
+        # with a range scan instead of a full table scan
+        Index("ix_users_premium_status_plan_expiry", "premium_status", "plan_expiry"),
+        # Usernames and emails are unique regardless of case; login looks
+        # users up through the username one. "Case" is whatever the
+        # database's lower() folds: on SQLite only ASCII letters
+        Index("ix_users_username_lower", func.lower(username), unique=True),
+        Index("ix_users_email_lower", func.lower(email), unique=True),
+    )
+
     
 class HealthTip(Base):
     __tablename__ = "health_tips"
 
     id = Column(Integer, primary_key=True, index=True)
     tip_text = Column(Text, nullable=False)
-    category = Column(String(50), default="general")
+    category = Column(String(50), default="general", index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
@@ -33,3 +44,42 @@ class PremiumPlan(Base):
     duration_days = Column(Integer, nullable=False)
     description = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class WebhookEvent(Base):
+    """Durable queue of received Stripe webhook events, keyed by event ID."""
+    __tablename__ = "webhook_events"
+
+    id = Column(String(255), primary_key=True)  # Stripe event ID, e.g. evt_...
+    type = Column(String(100), nullable=False)
+    payload = Column(Text, nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending, processing, processed, ignored, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    claimed_by = Column(String(32), nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    received_at = Column(DateTime, nullable=False)
+    processed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_webhook_events_status_received", "status", "received_at"),
+    )
+
+
+class SymptomCheck(Base):
+    """One symptom analysis a user ran, written in batches by symptom_history.py."""
+    __tablename__ = "symptom_checks"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    symptoms = Column(Text, nullable=False)
+    analysis = Column(Text, nullable=False)
+    recommendation = Column(Text, nullable=False)
+    severity = Column(String(20), nullable=False)
+    categories = Column(String(255), nullable=False, default="")  # comma-separated, best first
+    created_at = Column(DateTime, nullable=False)  # when analyzed, not when flushed
+
+    __table_args__ = (
+        # A user's history, newest first, is a range scan of this index
+        Index("ix_symptom_checks_user_created", "user_id", "created_at"),
+    )
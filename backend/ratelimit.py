@@ -0,0 +1,322 @@
+"""
+Per-client rate limiting and login brute-force throttling.
+
+Two mechanisms share one store:
+
+- Token buckets (``RateLimiter``): each client key (an IP address, a
+  username, ...) gets ``burst`` tokens that refill at ``rate`` per second;
+  a request costs one token and is answered 429 + Retry-After when the
+  bucket is empty. Used as a FastAPI dependency via ``rate_limit()``.
+- Login lockout (``LoginThrottle``): after LOGIN_LOCKOUT_THRESHOLD failed
+  logins for a username, further attempts are refused for an exponentially
+  growing period (LOGIN_LOCKOUT_BASE * 2^n, capped at LOGIN_LOCKOUT_MAX).
+  The check runs before the user lookup and bcrypt, so a locked-out
+  attacker costs one dictionary lookup per attempt.
+
+The default ``LocalRateLimitStore`` keeps state per worker in a sharded
+dict: O(1) per request, idle entries are dropped once they carry no
+information (a bucket that has refilled, a failure count past its window),
+and each shard holds at most RATE_LIMIT_MAX_KEYS / RATE_LIMIT_SHARDS keys.
+Set RATE_LIMIT_URL=redis://... (requires ``redis``) to share limits across
+workers and hosts.
+
+Client IPs come from the ASGI client address; behind a reverse proxy run
+uvicorn with --proxy-headers --forwarded-allow-ips=<proxy> so that is the
+real client rather than the proxy.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request, status
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+RATE_LIMIT_URL = os.getenv("RATE_LIMIT_URL", "")
+RATE_LIMIT_SHARDS = int(os.getenv("RATE_LIMIT_SHARDS", "16"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "1000000"))
+
+# Requests per minute and burst size, per client IP
+LOGIN_RATE_PER_MINUTE = float(os.getenv("LOGIN_RATE_PER_MINUTE", "30"))
+LOGIN_BURST = int(os.getenv("LOGIN_BURST", "10"))
+SIGNUP_RATE_PER_MINUTE = float(os.getenv("SIGNUP_RATE_PER_MINUTE", "10"))
+SIGNUP_BURST = int(os.getenv("SIGNUP_BURST", "5"))
+SYMPTOM_RATE_PER_MINUTE = float(os.getenv("SYMPTOM_RATE_PER_MINUTE", "120"))
+SYMPTOM_BURST = int(os.getenv("SYMPTOM_BURST", "30"))
+# POST /symptom/analyze/batch is charged per item, on its own bucket; the
+# burst bounds the largest batch a client can send at once
+SYMPTOM_BATCH_ITEMS_PER_MINUTE = float(os.getenv("SYMPTOM_BATCH_ITEMS_PER_MINUTE", "20000"))
+SYMPTOM_BATCH_BURST = int(os.getenv("SYMPTOM_BATCH_BURST", "10000"))
+# GET /symptom/history pages, on their own bucket so browsing past checks
+# does not use up the analysis budget
+SYMPTOM_HISTORY_RATE_PER_MINUTE = float(os.getenv("SYMPTOM_HISTORY_RATE_PER_MINUTE", "300"))
+SYMPTOM_HISTORY_BURST = int(os.getenv("SYMPTOM_HISTORY_BURST", "60"))
+
+# Failed logins per username before lockouts start, first lockout in
+# seconds (doubling with each further failure), longest lockout, and how
+# long failures are remembered without a new one
+LOGIN_LOCKOUT_THRESHOLD = int(os.getenv("LOGIN_LOCKOUT_THRESHOLD", "5"))
+LOGIN_LOCKOUT_BASE = float(os.getenv("LOGIN_LOCKOUT_BASE", "1"))
+LOGIN_LOCKOUT_MAX = float(os.getenv("LOGIN_LOCKOUT_MAX", "900"))
+LOGIN_FAILURE_WINDOW = float(os.getenv("LOGIN_FAILURE_WINDOW", "900"))
+
+# Idle entries looked at (and dropped if expired) per store operation
+_EVICT_PER_OP = 2
+# Lockouts stop doubling after this many steps: 2 ** n grows without bound
+# and float(base * 2 ** n) overflows after about a thousand failures
+_MAX_LOCKOUT_DOUBLINGS = 32
+
+
+# ===== STORES =====
+class LocalRateLimitStore:
+    """
+    In-process state, sharded by key hash to keep lock contention low.
+
+    Each shard is an LRU ordered by last use, with every entry carrying the
+    time after which it is redundant. Each operation drops a couple of
+    expired entries from the cold end, so idle keys disappear without a
+    sweeper thread; a full shard evicts its least recently used key.
+    """
+
+    def __init__(self, shards: int = RATE_LIMIT_SHARDS, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(shards)]
+        self._max_per_shard = max(1, max_keys // shards)
+
+    def _shard(self, key: str):
+        return self._shards[hash(key) % len(self._shards)]
+
+    def _evict(self, entries: OrderedDict, now: float):
+        for _ in range(_EVICT_PER_OP):
+            if not entries:
+                return
+            key, entry = next(iter(entries.items()))
+            if entry[-1] > now and len(entries) <= self._max_per_shard:
+                return
+            del entries[key]
+
+    def take(self, key: str, rate: float, burst: int, cost: float = 1.0) -> float:
+        """Spend ``cost`` tokens; returns 0 if allowed, else seconds until it would be."""
+        now = time.monotonic()
+        lock, entries = self._shard(key)
+        with lock:
+            entry = entries.get(key)
+            if entry is None:
+                tokens = float(burst)
+            else:
+                entries.move_to_end(key)
+                tokens = min(float(burst), entry[0] + (now - entry[1]) * rate)
+            if tokens < cost:
+                wait = (cost - tokens) / rate
+            else:
+                tokens -= cost
+                wait = 0.0
+            # Once refilled the bucket is the same as a missing one
+            entries[key] = [tokens, now, now + (burst - tokens) / rate]
+            self._evict(entries, now)
+        return wait
+
+    def locked_for(self, key: str) -> float:
+        """Seconds left on ``key``'s lockout, 0 if not locked out."""
+        now = time.monotonic()
+        lock, entries = self._shard(key)
+        with lock:
+            entry = entries.get(key)
+            if entry is None:
+                return 0.0
+            return max(0.0, entry[1] - now)
+
+    def record_failure(self, key: str, threshold: int, base: float,
+                       max_lockout: float, window: float) -> float:
+        """Count a failed attempt; returns the lockout (seconds) it triggers, if any."""
+        now = time.monotonic()
+        lock, entries = self._shard(key)
+        with lock:
+            entry = entries.get(key)
+            failures = 1 if entry is None or entry[2] <= now else entry[0] + 1
+            lockout = 0.0
+            if failures >= threshold:
+                lockout = min(max_lockout, base * 2 ** min(failures - threshold, _MAX_LOCKOUT_DOUBLINGS))
+            locked_until = now + lockout
+            entries[key] = [failures, locked_until, max(locked_until, now + window)]
+            entries.move_to_end(key)
+            self._evict(entries, now)
+        return lockout
+
+    def reset(self, key: str):
+        lock, entries = self._shard(key)
+        with lock:
+            entries.pop(key, None)
+
+    def __len__(self):
+        return sum(len(entries) for _, entries in self._shards)
+
+    def clear(self):
+        for lock, entries in self._shards:
+            with lock:
+                entries.clear()
+
+
+# Refill and spend atomically on the server; uses Redis' clock so all
+# workers agree on time. KEYS[1] bucket; ARGV rate, burst, cost.
+_TAKE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local rate, burst, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+local tokens = tonumber(state[1])
+if tokens == nil then
+  tokens = burst
+else
+  tokens = math.min(burst, tokens + (now - tonumber(state[2])) * rate)
+end
+local wait = 0
+if tokens < cost then
+  wait = (cost - tokens) / rate
+else
+  tokens = tokens - cost
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'at', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst - tokens) / rate * 1000) + 1)
+return tostring(wait)
+"""
+
+# KEYS[1] failure counter; ARGV threshold, base, max lockout, window,
+# max doublings.
+_FAILURE_SCRIPT = """
+local failures = redis.call('HINCRBY', KEYS[1], 'failures', 1)
+local threshold, base = tonumber(ARGV[1]), tonumber(ARGV[2])
+local max_lockout, window = tonumber(ARGV[3]), tonumber(ARGV[4])
+local lockout = 0
+if failures >= threshold then
+  lockout = math.min(max_lockout, base * 2 ^ math.min(failures - threshold, tonumber(ARGV[5])))
+end
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+redis.call('HSET', KEYS[1], 'locked_until', now + lockout)
+redis.call('PEXPIRE', KEYS[1], math.ceil(math.max(lockout, window) * 1000))
+return tostring(lockout)
+"""
+
+
+class RedisRateLimitStore:
+    """Shared state in Redis, for limits that hold across workers and hosts."""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_URL is set but the 'redis' package is not installed") from e
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+        self._take = self._client.register_script(_TAKE_SCRIPT)
+        self._failure = self._client.register_script(_FAILURE_SCRIPT)
+
+    def take(self, key: str, rate: float, burst: int, cost: float = 1.0) -> float:
+        return float(self._take(keys=[self._prefix + key], args=[rate, burst, cost]))
+
+    def locked_for(self, key: str) -> float:
+        locked_until = self._client.hget(self._prefix + key, "locked_until")
+        if locked_until is None:
+            return 0.0
+        seconds, micros = self._client.time()
+        return max(0.0, float(locked_until) - (seconds + micros / 1e6))
+
+    def record_failure(self, key: str, threshold: int, base: float,
+                       max_lockout: float, window: float) -> float:
+        return float(self._failure(keys=[self._prefix + key], args=[threshold, base, max_lockout, window, _MAX_LOCKOUT_DOUBLINGS]))
+
+    def reset(self, key: str):
+        self._client.delete(self._prefix + key)
+
+
+def _create_store():
+    if RATE_LIMIT_URL.startswith(("redis://", "rediss://", "unix://")):
+        return RedisRateLimitStore(RATE_LIMIT_URL)
+    return LocalRateLimitStore()
+
+
+store = _create_store()
+
+
+# ===== LIMITERS =====
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def _too_many_requests(retry_after: float, detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(max(1, int(retry_after + 0.999)))}
+    )
+
+
+class RateLimiter:
+    """A named token bucket policy: ``per_minute`` sustained, ``burst`` at once."""
+
+    def __init__(self, name: str, per_minute: float, burst: int, limit_store=None):
+        self.name = name
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.store = limit_store or store
+
+    def check(self, key: str, cost: float = 1.0):
+        """Raise 429 if ``key`` has no tokens left for this policy."""
+        if not RATE_LIMIT_ENABLED:
+            return
+        wait = self.store.take(f"{self.name}:{key}", self.rate, self.burst, cost)
+        if wait > 0:
+            raise _too_many_requests(wait, "Too many requests, please slow down")
+
+
+def rate_limit(limiter: RateLimiter):
+    """Dependency applying ``limiter`` per client IP."""
+    async def dependency(request: Request):
+        limiter.check(client_ip(request))
+    return dependency
+
+
+class LoginThrottle:
+    """Exponential lockout of usernames after repeated failed logins."""
+
+    def __init__(self, threshold: int = LOGIN_LOCKOUT_THRESHOLD, base: float = LOGIN_LOCKOUT_BASE,
+                 max_lockout: float = LOGIN_LOCKOUT_MAX, window: float = LOGIN_FAILURE_WINDOW,
+                 limit_store=None):
+        self.threshold = threshold
+        self.base = base
+        self.max_lockout = max_lockout
+        self.window = window
+        self.store = limit_store or store
+
+    @staticmethod
+    def _key(username: str) -> str:
+        # Callers pass the name already case-folded as the users index folds it
+        return f"login-fail:{username}"
+
+    def check(self, username: str):
+        """Raise 429 while ``username`` is locked out. Call before verifying the password."""
+        if not RATE_LIMIT_ENABLED:
+            return
+        locked_for = self.store.locked_for(self._key(username))
+        if locked_for > 0:
+            raise _too_many_requests(locked_for, "Too many failed login attempts, please retry later")
+
+    def failed(self, username: str) -> float:
+        if not RATE_LIMIT_ENABLED:
+            return 0.0
+        return self.store.record_failure(
+            self._key(username), self.threshold, self.base, self.max_lockout, self.window
+        )
+
+    def succeeded(self, username: str):
+        if RATE_LIMIT_ENABLED:
+            self.store.reset(self._key(username))
+
+
+login_limiter = RateLimiter("login", LOGIN_RATE_PER_MINUTE, LOGIN_BURST)
+signup_limiter = RateLimiter("signup", SIGNUP_RATE_PER_MINUTE, SIGNUP_BURST)
+symptom_limiter = RateLimiter("symptom", SYMPTOM_RATE_PER_MINUTE, SYMPTOM_BURST)
+symptom_batch_limiter = RateLimiter("symptom-batch", SYMPTOM_BATCH_ITEMS_PER_MINUTE, SYMPTOM_BATCH_BURST)
+symptom_history_limiter = RateLimiter("symptom-history", SYMPTOM_HISTORY_RATE_PER_MINUTE, SYMPTOM_HISTORY_BURST)
+login_throttle = LoginThrottle()
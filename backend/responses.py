@@ -0,0 +1,23 @@
+"""
+JSON responses encoded with orjson.
+
+``ORJSONResponse`` is the app-wide default response class. Endpoints whose
+payload rarely changes encode it once with ``encode_json`` and return the
+bytes in a ``PreEncodedJSONResponse``, skipping validation and encoding on
+every request.
+"""
+
+import orjson
+from fastapi.responses import ORJSONResponse, Response
+
+__all__ = ["ORJSONResponse", "PreEncodedJSONResponse", "encode_json"]
+
+
+def encode_json(content) -> bytes:
+    return orjson.dumps(content)
+
+
+class PreEncodedJSONResponse(Response):
+    """Response whose body is already-encoded JSON bytes."""
+
+    media_type = "application/json"
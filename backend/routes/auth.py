@@ -1,35 +1,50 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-import bcrypt
-from database import get_db
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import SECRET_KEY, ReadSession, engine, get_async_db, get_read_db
+from hashing import HASH_RETRY_AFTER, HashingPoolSaturated, check_password_async, hash_password_async
 from models import User
-from schemas import UserCreate, UserResponse, LoginRequest, Token
+from ratelimit import login_limiter, login_throttle, rate_limit, signup_limiter
+from schemas import UserCreate, UserResponse, LoginRequest, Token, CurrentUser
+from collections import OrderedDict
+from typing import Optional
 import jwt
+import logging
+import os
+import string
+import threading
+import time
 from datetime import datetime, timedelta
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
-SECRET_KEY = "medconsult_secret_key_12345"
+logger = logging.getLogger(__name__)
+
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+async def verify_password(plain_password, hashed_password):
+    # bcrypt runs on the bounded hashing pool, see hashing.py
+    try:
+        return await check_password_async(plain_password, hashed_password)
+    except HashingPoolSaturated:
+        raise _hashing_busy()
 
-def verify_password(plain_password, hashed_password):
-    # Ensure input is bytes and truncate to 72 bytes
-    if isinstance(plain_password, str):
-        plain_password = plain_password.encode('utf-8')
-    truncated = plain_password[:72]
+async def get_password_hash(password):
     try:
-        return bcrypt.checkpw(truncated, hashed_password.encode('utf-8'))
-    except Exception:
-        return False
-
-def get_password_hash(password):
-    # Ensure input is bytes and truncate to 72 bytes before hashing
-    if isinstance(password, str):
-        password = password.encode('utf-8')
-    truncated = password[:72]
-    hashed = bcrypt.hashpw(truncated, bcrypt.gensalt())
-    return hashed.decode('utf-8')
+        return await hash_password_async(password)
+    except HashingPoolSaturated:
+        raise _hashing_busy()
+
+def _hashing_busy():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, please retry shortly",
+        headers={"Retry-After": str(HASH_RETRY_AFTER)}
+    )
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -41,59 +56,206 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-@router.post("/signup", response_model=UserResponse)
-def signup(user: UserCreate, db: Session = Depends(get_db)):
-    print(f"[DEBUG] Signup called for user: {user.username}")
-    # Check if user exists
-    db_user = db.query(User).filter(User.username == user.username).first()
-    if db_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered"
+
+# ===== TOKEN VERIFICATION =====
+class TokenClaimsCache:
+    """
+    LRU of already-verified token -> claims.
+
+    Entries never outlive the token's own ``exp``, so a hit is as good as a
+    fresh verification; repeat requests skip the HMAC and JSON decoding.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires_at, claims = entry
+            if expires_at <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return claims
+
+    def put(self, token: str, claims: dict):
+        with self._lock:
+            self._entries[token] = (claims["exp"], claims)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenClaimsCache()
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+def decode_access_token(token: str) -> dict:
+    """Verify an HS256 token and return its claims, using the claims cache."""
+    claims = token_cache.get(token)
+    if claims is None:
+        claims = jwt.decode(
+            token, SECRET_KEY, algorithms=[ALGORITHM],
+            options={"require": ["exp", "sub"]}
         )
-    
-    db_email = db.query(User).filter(User.email == user.email).first()
-    if db_email:
+        token_cache.put(token, claims)
+    return claims
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)
+) -> CurrentUser:
+    """
+    Dependency resolving the caller from a ``Bearer`` access token.
+
+    Claims are trusted until the token expires, so no database lookup is
+    made per request.
+    """
+    unauthorized = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"}
+    )
+    if credentials is None:
+        raise unauthorized
+    try:
+        claims = decode_access_token(credentials.credentials)
+    except jwt.PyJWTError:
+        raise unauthorized
+    if "uid" not in claims:
+        raise unauthorized
+    return CurrentUser(id=claims["uid"], username=claims["sub"])
+
+
+async def get_optional_user(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)
+) -> Optional[CurrentUser]:
+    """
+    Like ``get_current_user``, but None instead of 401.
+
+    A missing, expired or invalid token makes the request anonymous: the
+    frontend keeps its token after the JWT has expired, and the routes
+    using this also serve anonymous callers.
+    """
+    if credentials is None:
+        return None
+    try:
+        return await get_current_user(credentials)
+    except HTTPException:
+        return None
+
+
+# ===== SIGNUP =====
+# Uniqueness is left to the unique indexes on users: a signup is a single
+# INSERT, and two concurrent signups for the same name cannot both succeed.
+_insert_user = User.__table__.insert()
+if engine.dialect.insert_returning:
+    _insert_user = _insert_user.returning(User.__table__.c.id)
+
+# Names of the unique indexes/constraints a duplicate can trip, as they
+# appear in SQLite, PostgreSQL and MySQL error messages
+_DUPLICATE_MARKERS = (
+    ("users.username", "Username already registered"),
+    ("ix_users_username", "Username already registered"),
+    ("users_username_key", "Username already registered"),
+    ("users.email", "Email already registered"),
+    ("ix_users_email", "Email already registered"),
+    ("users_email_key", "Email already registered"),
+)
+
+
+def duplicate_signup_detail(error: IntegrityError) -> str:
+    """Error message for an INSERT into users rejected by a unique index."""
+    message = str(error.orig).split("\n", 1)[0]
+    # MySQL quotes the offending value before the key name, so the last
+    # marker in the message is the index that was violated
+    found = [(message.rfind(marker), detail) for marker, detail in _DUPLICATE_MARKERS if marker in message]
+    if not found:
+        return "Username or email already registered"
+    return max(found)[1]
+
+
+@router.post("/signup", response_model=UserResponse, dependencies=[Depends(rate_limit(signup_limiter))])
+async def signup(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    logger.debug("Signup called for user: %s", user.username)
+    hashed_password = await get_password_hash(user.password)
+    values = {"username": user.username, "email": user.email, "password_hash": hashed_password}
+    try:
+        if engine.dialect.insert_returning:
+            user_id = await db.scalar(_insert_user, values)
+        else:
+            user_id = (await db.execute(_insert_user, values)).inserted_primary_key[0]
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
+            detail=duplicate_signup_detail(e)
         )
-    
-    # Create new user
-    hashed_password = get_password_hash(user.password)
-    db_user = User(
-        username=user.username,
-        email=user.email,
-        password_hash=hashed_password
-    )
-    
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    print(f"[DEBUG] Signup successful for user: {user.username}")
-    
-    return db_user
+    logger.info("Signup successful for user: %s", user.username)
+
+    return UserResponse(id=user_id, username=user.username, email=user.email)
+
+# ===== LOGIN =====
+# SQLite's lower() only folds ASCII letters; PostgreSQL and MySQL fold
+# Unicode ones too (per collation), close enough to str.lower()
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
 
-@router.post("/login", response_model=Token)
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
-    print(f"[DEBUG] Login called for user: {login_data.username}")
-    user = db.query(User).filter(User.username == login_data.username).first()
+
+def username_key(username: str) -> str:
+    """``username`` folded the way the database's lower() folds it."""
+    if engine.dialect.name == "sqlite":
+        return username.translate(_ASCII_LOWER)
+    return username.lower()
+
+
+@router.post("/login", response_model=Token, dependencies=[Depends(rate_limit(login_limiter))])
+async def login(login_data: LoginRequest, db: ReadSession = Depends(get_read_db)):
+    logger.debug("Login called for user: %s", login_data.username)
+    # Usernames are unique regardless of case (ix_users_username_lower). The
+    # database lowers both sides, so the lookup matches the index even where
+    # its lower() differs from Python's; the lockout key is folded the same way
+    username = username_key(login_data.username)
+    # Refuse locked-out usernames before spending a query and a bcrypt check
+    login_throttle.check(username)
+    query = select(User).where(func.lower(User.username) == func.lower(login_data.username))
+    user = await db.scalar(query)
+    if user is None and await db.use_primary():
+        # Read from a replica: a user who has just signed up may not be there yet
+        user = await db.scalar(query)
     
-    if not user or not verify_password(login_data.password, user.password_hash):
+    if not user or not await verify_password(login_data.password, user.password_hash):
+        lockout = login_throttle.failed(username)
+        if lockout:
+            logger.warning(f"Login locked out for {lockout:.0f}s after repeated failures: {login_data.username}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
         )
     
+    login_throttle.succeeded(username)
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "uid": user.id}, expires_delta=access_token_expires
     )
     
-    print(f"[DEBUG] Login successful for user: {login_data.username}")
+    logger.info("Login successful for user: %s", login_data.username)
     return Token(
         access_token=access_token,
         token_type="bearer",
         user_id=user.id,
         username=user.username
-    )
\ No newline at end of file
+    )
+
+@router.get("/me", response_model=CurrentUser)
+async def read_current_user(current_user: CurrentUser = Depends(get_current_user)):
+    return current_user
@@ -1,21 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from database import get_db
+from fastapi import APIRouter, HTTPException, Request, status
 from schemas import PaymentRequest
-import stripe
+from stripe_client import CardError, StripeError, StripeTimeout, stripe_client
+from webhooks import STRIPE_WEBHOOK_SECRET, WebhookSignatureError, enqueue_event, verify_webhook
 import os
 import logging
 
 router = APIRouter(prefix="/api/payments", tags=["payments"])
 
-# Initialize Stripe with API key from environment
-stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
-
 logger = logging.getLogger(__name__)
 
 
 @router.post("/create-checkout-session")
-def create_checkout_session(request: PaymentRequest, db: Session = Depends(get_db)):
+async def create_checkout_session(request: PaymentRequest):
     """
     Create a Stripe checkout session for premium plan subscription.
     
@@ -26,6 +22,9 @@ def create_checkout_session(request: PaymentRequest, db: Session = Depends(get_d
         "plan_name": "Premium Monthly",
         "amount": 999
     }
+
+    Repeat requests for the same user, plan, amount and plan name within
+    STRIPE_IDEMPOTENCY_WINDOW return the session already created.
     """
     try:
         # Validate the payment request
@@ -36,45 +35,56 @@ def create_checkout_session(request: PaymentRequest, db: Session = Depends(get_d
             )
 
         # Create Stripe checkout session
-        session = stripe.checkout.Session.create(
-            payment_method_types=["card"],
-            line_items=[
-                {
-                    "price_data": {
-                        "currency": "usd",
-                        "product_data": {
-                            "name": request.plan_name or "Premium Plan",
-                            "description": f"Premium plan for user {request.user_id}",
+        session = await stripe_client.create_checkout_session(
+            (request.user_id, request.plan_id, int(request.amount)),
+            {
+                "payment_method_types": ["card"],
+                "line_items": [
+                    {
+                        "price_data": {
+                            "currency": "usd",
+                            "product_data": {
+                                "name": request.plan_name or "Premium Plan",
+                                "description": f"Premium plan for user {request.user_id}",
+                            },
+                            "unit_amount": int(request.amount),  # Amount in cents
                         },
-                        "unit_amount": int(request.amount),  # Amount in cents
-                    },
-                    "quantity": 1,
+                        "quantity": 1,
+                    }
+                ],
+                "mode": "payment",
+                "success_url": os.getenv("STRIPE_SUCCESS_URL", "http://127.0.0.1:5500/index.html"),
+                "cancel_url": os.getenv("STRIPE_CANCEL_URL", "http://127.0.0.1:5500/premium.html"),
+                "metadata": {
+                    "user_id": request.user_id,
+                    "plan_id": request.plan_id,
                 }
-            ],
-            mode="payment",
-            success_url=os.getenv("STRIPE_SUCCESS_URL", "http://127.0.0.1:5500/index.html"),
-            cancel_url=os.getenv("STRIPE_CANCEL_URL", "http://127.0.0.1:5500/premium.html"),
-            metadata={
-                "user_id": request.user_id,
-                "plan_id": request.plan_id,
             }
         )
 
-        logger.info(f"Checkout session created: {session.id} for user {request.user_id}")
+        logger.info(f"Checkout session created: {session['id']} for user {request.user_id}")
         
         return {
-            "session_id": session.id,
-            "checkout_url": session.url,
+            "session_id": session["id"],
+            "checkout_url": session["url"],
             "status": "success"
         }
 
-    except stripe.error.CardError as e:
+    except HTTPException:
+        raise
+    except StripeTimeout:
+        logger.error("Timed out waiting for Stripe")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Payment provider timed out, please retry"
+        )
+    except CardError as e:
         logger.error(f"Card error: {e.user_message}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Card error: {e.user_message}"
         )
-    except stripe.error.StripeException as e:
+    except StripeError as e:
         logger.error(f"Stripe error: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -87,3 +97,42 @@ def create_checkout_session(request: PaymentRequest, db: Session = Depends(get_d
             detail=f"Error creating checkout session: {str(e)}"
         )
 
+
+@router.post("/webhook")
+async def stripe_webhook(request: Request):
+    """
+    Receive Stripe webhook events.
+
+    The signature is verified and the event is queued in the
+    webhook_events table before acknowledging; entitlement changes are
+    applied in batches by the background webhook worker. Redelivered
+    events are acknowledged without being queued again.
+    """
+    if not STRIPE_WEBHOOK_SECRET:
+        logger.error("Webhook received but STRIPE_WEBHOOK_SECRET is not set")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Webhook endpoint is not configured"
+        )
+
+    payload = await request.body()
+    try:
+        event = verify_webhook(payload, request.headers.get("stripe-signature"))
+    except WebhookSignatureError as e:
+        logger.warning(f"Rejected webhook: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid webhook: {e}"
+        )
+
+    try:
+        queued = await enqueue_event(event, payload)
+    except Exception as e:
+        # Not acknowledged, so Stripe retries the delivery
+        logger.error(f"Error queueing webhook {event['id']}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error queueing webhook event"
+        )
+
+    return {"received": True, "duplicate": not queued}
@@ -1,16 +1,119 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from cache import cache
+from database import READ_YOUR_WRITES_SECONDS, get_async_db, note_write, open_read_session
+from entitlements import cache_entitlement, get_cached_entitlement
 from models import User, PremiumPlan
+from responses import PreEncodedJSONResponse, encode_json
+from schemas import StatusBatchRequest
+from datetime import datetime, timedelta
+import hashlib
 import logging
+import os
 
 router = APIRouter(prefix="/premium", tags=["premium"])
 
 logger = logging.getLogger(__name__)
 
+# Serialized plan catalog, shared by every GET /premium/plans until a plan
+# is created or the TTL lapses (other workers pick up changes within the
+# TTL unless CACHE_URL points at a shared cache).
+PLANS_CACHE_KEY = "premium:plans:v1"
+# Set for READ_YOUR_WRITES_SECONDS after a change: a replica may not have
+# it yet, so the catalog is rebuilt from the primary meanwhile
+PLANS_CHANGED_KEY = "premium:plans:changed"
+PLANS_CACHE_TTL = float(os.getenv("PLANS_CACHE_TTL", "300"))
+PLANS_MAX_AGE = int(os.getenv("PLANS_MAX_AGE", "60"))
+
+
+async def _load_plans_catalog() -> bytes:
+    cached = cache.get(PLANS_CACHE_KEY)
+    if cached is not None:
+        return cached
+
+    async with open_read_session() as db:
+        if cache.get(PLANS_CHANGED_KEY) is not None:
+            await db.use_primary()
+        plans = (await db.scalars(select(PremiumPlan))).all()
+    body = encode_json({
+        "plans": [
+            {
+                "id": plan.id,
+                "name": plan.name,
+                "price": plan.price,
+                "duration_days": plan.duration_days,
+                "description": plan.description
+            }
+            for plan in plans
+        ],
+        "total": len(plans)
+    })
+    cache.set(PLANS_CACHE_KEY, body, PLANS_CACHE_TTL)
+    return body
+
+
+def invalidate_plans_catalog():
+    if READ_YOUR_WRITES_SECONDS > 0:
+        cache.set(PLANS_CHANGED_KEY, b"1", READ_YOUR_WRITES_SECONDS)
+    cache.delete(PLANS_CACHE_KEY)
+
+
+# ===== ENTITLEMENTS =====
+MAX_STATUS_BATCH = 1000
+
+
+async def _load_entitlements(user_ids) -> dict:
+    """Return {user_id: entitlement} from cache, fetching misses in one query."""
+    found = {}
+    missing = []
+    for user_id in user_ids:
+        cached = get_cached_entitlement(user_id)
+        if cached is not None:
+            found[user_id] = cached
+        else:
+            missing.append(user_id)
+    if not missing:
+        return found
+
+    async with open_read_session(missing) as db:
+        rows = (await db.execute(
+            select(User.id, User.plan_id, User.premium_status, PremiumPlan.name)
+            .outerjoin(PremiumPlan, PremiumPlan.id == User.plan_id)
+            .where(User.id.in_(missing))
+        )).all()
+    for row in rows:
+        entitlement = {
+            "user_id": row.id,
+            "plan_id": row.plan_id,
+            "plan_name": row.name,
+            "premium_status": row.premium_status,
+        }
+        cache_entitlement(entitlement)
+        found[row.id] = entitlement
+    return found
+
+
+def _status_response(entitlement: dict) -> dict:
+    if not entitlement["plan_id"] or entitlement["premium_status"] == "expired":
+        return {
+            "user_id": entitlement["user_id"],
+            "premium_plan_id": None,
+            "is_premium": False,
+            "message": "User is not subscribed to a premium plan"
+        }
+    plan_name = entitlement["plan_name"]
+    return {
+        "user_id": entitlement["user_id"],
+        "premium_plan_id": entitlement["plan_id"] if plan_name else None,
+        "plan_name": plan_name,
+        "is_premium": True,
+        "message": f"User is subscribed to {plan_name or 'Unknown plan'}"
+    }
+
 
 @router.post("/create")
-def create_premium_plan(name: str, price: float, duration_days: int, db: Session = Depends(get_db)):
+async def create_premium_plan(name: str, price: float, duration_days: int, db: AsyncSession = Depends(get_async_db)):
     """
     Create a new premium plan.
     
@@ -20,7 +123,7 @@ def create_premium_plan(name: str, price: float, duration_days: int, db: Session
     - duration_days: Duration of the plan in days
     """
     try:
-        existing = db.query(PremiumPlan).filter(PremiumPlan.name == name).first()
+        existing = await db.scalar(select(PremiumPlan).where(PremiumPlan.name == name))
         if existing:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -34,8 +137,9 @@ def create_premium_plan(name: str, price: float, duration_days: int, db: Session
             description=f"{name} - ${price:.2f} for {duration_days} days"
         )
         db.add(plan)
-        db.commit()
-        db.refresh(plan)
+        await db.commit()
+        await db.refresh(plan)
+        invalidate_plans_catalog()
         
         logger.info(f"Premium plan created: {plan.name} (ID: {plan.id})")
         
@@ -57,26 +161,15 @@ def create_premium_plan(name: str, price: float, duration_days: int, db: Session
 
 
 @router.get("/plans")
-def get_premium_plans(db: Session = Depends(get_db)):
+async def get_premium_plans(request: Request):
     """
     Get all available premium plans.
+
+    Served from the plan catalog cache with an ETag, so clients revalidating
+    with If-None-Match get a 304 without a body.
     """
     try:
-        plans = db.query(PremiumPlan).all()
-        
-        return {
-            "plans": [
-                {
-                    "id": plan.id,
-                    "name": plan.name,
-                    "price": plan.price,
-                    "duration_days": plan.duration_days,
-                    "description": plan.description
-                }
-                for plan in plans
-            ],
-            "total": len(plans)
-        }
+        body = await _load_plans_catalog()
     except Exception as e:
         logger.error(f"Error fetching premium plans: {str(e)}")
         raise HTTPException(
@@ -84,9 +177,18 @@ def get_premium_plans(db: Session = Depends(get_db)):
             detail=f"Error fetching premium plans: {str(e)}"
         )
 
+    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={PLANS_MAX_AGE}",
+    }
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return PreEncodedJSONResponse(body, headers=headers)
+
 
 @router.post("/subscribe/{user_id}/{plan_id}")
-def subscribe_to_plan(user_id: int, plan_id: int, db: Session = Depends(get_db)):
+async def subscribe_to_plan(user_id: int, plan_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Subscribe a user to a premium plan.
     
@@ -95,29 +197,44 @@ def subscribe_to_plan(user_id: int, plan_id: int, db: Session = Depends(get_db))
     - plan_id: ID of the premium plan
     """
     try:
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
+        plan = (await db.execute(
+            select(PremiumPlan.id, PremiumPlan.name, PremiumPlan.duration_days)
+            .where(PremiumPlan.id == plan_id)
+        )).first()
+        if not plan:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"User with ID {user_id} not found"
+                detail=f"Premium plan with ID {plan_id} not found"
             )
         
-        plan = db.query(PremiumPlan).filter(PremiumPlan.id == plan_id).first()
-        if not plan:
+        # Update user's premium plan in one statement; rowcount doubles as
+        # the existence check
+        expiry = datetime.utcnow() + timedelta(days=plan.duration_days)
+        result = await db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(plan_id=plan.id, premium_status="active", plan_expiry=expiry)
+        )
+        if result.rowcount == 0:
+            await db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Premium plan with ID {plan_id} not found"
+                detail=f"User with ID {user_id} not found"
             )
+        await db.commit()
+        note_write(user_id)
         
-        # Update user's premium plan
-        user.premium_plan_id = plan_id
-        db.commit()
-        db.refresh(user)
-        
+        # Write-through so the next status check sees the new plan
+        cache_entitlement({
+            "user_id": user_id,
+            "plan_id": plan.id,
+            "plan_name": plan.name,
+            "premium_status": "active",
+        })
         logger.info(f"User {user_id} subscribed to plan {plan_id}")
         
         return {
-            "user_id": user.id,
+            "user_id": user_id,
             "plan_id": plan.id,
             "plan_name": plan.name,
             "status": "subscribed",
@@ -134,7 +251,7 @@ def subscribe_to_plan(user_id: int, plan_id: int, db: Session = Depends(get_db))
 
 
 @router.get("/status/{user_id}")
-def get_subscription_status(user_id: int, db: Session = Depends(get_db)):
+async def get_subscription_status(user_id: int):
     """
     Get premium subscription status for a user.
     
@@ -142,30 +259,13 @@ def get_subscription_status(user_id: int, db: Session = Depends(get_db)):
     - user_id: ID of the user
     """
     try:
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
+        entitlements = await _load_entitlements([user_id])
+        if user_id not in entitlements:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"User with ID {user_id} not found"
             )
-        
-        if not user.premium_plan_id:
-            return {
-                "user_id": user.id,
-                "premium_plan_id": None,
-                "is_premium": False,
-                "message": "User is not subscribed to a premium plan"
-            }
-        
-        plan = db.query(PremiumPlan).filter(PremiumPlan.id == user.premium_plan_id).first()
-        
-        return {
-            "user_id": user.id,
-            "premium_plan_id": plan.id if plan else None,
-            "plan_name": plan.name if plan else None,
-            "is_premium": True,
-            "message": f"User is subscribed to {plan.name if plan else 'Unknown plan'}"
-        }
+        return _status_response(entitlements[user_id])
     except HTTPException:
         raise
     except Exception as e:
@@ -174,3 +274,31 @@ def get_subscription_status(user_id: int, db: Session = Depends(get_db)):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching subscription status: {str(e)}"
         )
+
+
+@router.post("/status")
+async def get_subscription_statuses(request: StatusBatchRequest):
+    """
+    Get premium subscription status for many users at once.
+
+    Uncached users are resolved with a single IN query. Unknown IDs are
+    listed under "not_found".
+    """
+    if len(request.user_ids) > MAX_STATUS_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many user IDs (max {MAX_STATUS_BATCH})"
+        )
+    try:
+        user_ids = list(dict.fromkeys(request.user_ids))
+        entitlements = await _load_entitlements(user_ids)
+        return {
+            "statuses": [_status_response(entitlements[uid]) for uid in user_ids if uid in entitlements],
+            "not_found": [uid for uid in user_ids if uid not in entitlements]
+        }
+    except Exception as e:
+        logger.error(f"Error fetching subscription statuses: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching subscription statuses: {str(e)}"
+        )
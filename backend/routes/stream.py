@@ -0,0 +1,324 @@
+"""
+Server-sent events: tip rotations and service status for open pages.
+
+``GET /api/stream`` replaces the frontend's separate ``/health`` and
+``/api/tips/random`` requests with one long-lived connection. Each worker
+runs a single ``Broadcaster`` task which
+
+- every STREAM_TIP_INTERVAL seconds picks a tip from the tip snapshot
+  (already JSON-encoded, see routes/tips.py), builds the ``tip`` frame once
+  and hands the same bytes to every subscriber
+- every STREAM_STATUS_INTERVAL seconds pings the database and sends a
+  ``status`` frame when the result changes
+- sends a comment line when nothing else went out for STREAM_HEARTBEAT
+  seconds, so proxies and load balancers keep idle streams open
+
+A new subscriber gets the reconnect delay, the current status and the
+latest tip straight away. An idle subscriber costs its socket, the handler
+coroutine parked on a future and one task waiting for the disconnect: no
+timers or encoding per client.
+
+Backpressure: frames not yet written to a client are held per client, up
+to STREAM_QUEUE_SIZE. A client that falls that far behind (its socket is
+not draining) gets no more frames and its stream is ended, instead of
+being buffered without bound; EventSource reconnects by itself. Streams
+are also ended after STREAM_MAX_AGE seconds (with jitter), so clients
+rebalance across workers. Beyond STREAM_MAX_CLIENTS open streams a worker
+answers 503.
+
+Configuration (environment variables):
+    STREAM_TIP_INTERVAL     seconds between tips (default 30)
+    STREAM_STATUS_INTERVAL  seconds between database checks (default 30, 0 disables)
+    STREAM_HEARTBEAT        seconds of silence before a keep-alive comment (default 15)
+    STREAM_QUEUE_SIZE       unsent frames before a client is dropped (default 8)
+    STREAM_MAX_CLIENTS      open streams per worker (default 10000)
+    STREAM_MAX_AGE          seconds before a stream is recycled (default 900, 0 disables)
+    STREAM_RETRY_MS         reconnect delay announced to clients (default 5000)
+"""
+
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import Response
+from database import check_database
+from responses import encode_json
+from routes.tips import tip_store
+from typing import Optional, Set
+import asyncio
+import logging
+import os
+import random
+
+router = APIRouter(prefix="/stream", tags=["stream"])
+
+logger = logging.getLogger(__name__)
+
+STREAM_TIP_INTERVAL = float(os.getenv("STREAM_TIP_INTERVAL", "30"))
+STREAM_STATUS_INTERVAL = float(os.getenv("STREAM_STATUS_INTERVAL", "30"))
+STREAM_HEARTBEAT = float(os.getenv("STREAM_HEARTBEAT", "15"))
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "8"))
+STREAM_MAX_CLIENTS = int(os.getenv("STREAM_MAX_CLIENTS", "10000"))
+STREAM_MAX_AGE = float(os.getenv("STREAM_MAX_AGE", "900"))
+STREAM_RETRY_MS = int(os.getenv("STREAM_RETRY_MS", "5000"))
+STATUS_CHECK_TIMEOUT = 5.0
+
+HEARTBEAT_FRAME = b": ping\n\n"
+
+
+def sse_frame(event: str, data: bytes, event_id: Optional[int] = None) -> bytes:
+    """One SSE event; ``data`` must be a single line (compact JSON is)."""
+    frame = b"event: " + event.encode() + b"\n"
+    if event_id is not None:
+        frame += b"id: %d\n" % event_id
+    return frame + b"data: " + data + b"\n\n"
+
+
+def _status_frame(database_ok: bool) -> bytes:
+    return sse_frame("status", encode_json({
+        "status": "healthy" if database_ok else "degraded",
+        "service": "MedBuddy",
+        "database": "ok" if database_ok else "unavailable",
+    }))
+
+
+# ===== SUBSCRIBERS =====
+class Subscriber:
+    """Frames waiting to be written to one client."""
+
+    __slots__ = ("pending", "closed", "expires_at", "_waiter")
+
+    def __init__(self, pending: list, expires_at: float):
+        self.pending = pending
+        self.closed = False
+        self.expires_at = expires_at
+        self._waiter: Optional[asyncio.Future] = None
+
+    def push(self, frame: bytes, limit: int) -> bool:
+        """Queue ``frame``; False if the client already has ``limit`` frames waiting."""
+        if len(self.pending) >= limit:
+            return False
+        self.pending.append(frame)
+        self._wake()
+        return True
+
+    def close(self):
+        self.closed = True
+        self._wake()
+
+    def _wake(self):
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def next_frames(self) -> Optional[bytes]:
+        """Everything queued so far as one chunk, or None once the stream is closed."""
+        while not self.pending and not self.closed:
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        if self.closed:
+            return None
+        frames, self.pending = self.pending, []
+        return frames[0] if len(frames) == 1 else b"".join(frames)
+
+
+# ===== BROADCASTER =====
+class Broadcaster:
+    """Fans tip and status frames out to every open stream of this worker."""
+
+    def __init__(self, tip_interval=STREAM_TIP_INTERVAL, status_interval=STREAM_STATUS_INTERVAL,
+                 heartbeat=STREAM_HEARTBEAT, queue_size=STREAM_QUEUE_SIZE,
+                 max_clients=STREAM_MAX_CLIENTS, max_age=STREAM_MAX_AGE, retry_ms=STREAM_RETRY_MS):
+        self.tip_interval = tip_interval
+        self.status_interval = status_interval
+        self.heartbeat = heartbeat
+        self.queue_size = queue_size
+        self.max_clients = max_clients
+        self.max_age = max_age
+        self._retry_frame = b"retry: %d\n\n" % retry_ms
+        self._subscribers: Set[Subscriber] = set()
+        self._status = _status_frame(True)
+        self._tip: Optional[bytes] = None
+        self._tip_id = 0
+        self._task: Optional[asyncio.Task] = None
+        self.peak_clients = 0
+        self.frames = 0
+        self.slow_dropped = 0
+        self.recycled = 0
+        self.rejected = 0
+
+    @property
+    def clients(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def full(self) -> bool:
+        return len(self._subscribers) >= self.max_clients
+
+    def subscribe(self) -> Subscriber:
+        welcome = [self._retry_frame + self._status + (self._tip or b"")]
+        expires_at = float("inf")
+        if self.max_age > 0:
+            expires_at = asyncio.get_running_loop().time() + self.max_age * random.uniform(0.8, 1.0)
+        subscriber = Subscriber(welcome, expires_at)
+        self._subscribers.add(subscriber)
+        self.peak_clients = max(self.peak_clients, len(self._subscribers))
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    def publish(self, frame: bytes):
+        """Queue ``frame`` for every subscriber, dropping those too far behind."""
+        limit = self.queue_size
+        slow = [s for s in self._subscribers if not s.push(frame, limit)]
+        for subscriber in slow:
+            self._subscribers.discard(subscriber)
+            subscriber.close()
+        self.slow_dropped += len(slow)
+        self.frames += 1
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        for subscriber in self._subscribers:
+            subscriber.close()
+        self._subscribers.clear()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_tip = next_status = last_frame = loop.time()
+        while True:
+            now = loop.time()
+            sent = False
+            if self.status_interval > 0 and now >= next_status:
+                next_status = now + self.status_interval
+                sent |= await self._check_status()
+            if self.tip_interval > 0 and now >= next_tip:
+                next_tip = now + self.tip_interval
+                sent |= await self._next_tip()
+            if sent:
+                last_frame = now
+            elif now - last_frame >= self.heartbeat:
+                self.publish(HEARTBEAT_FRAME)
+                last_frame = now
+            self._recycle(now)
+
+            wake_at = last_frame + self.heartbeat
+            if self.tip_interval > 0:
+                wake_at = min(wake_at, next_tip)
+            if self.status_interval > 0:
+                wake_at = min(wake_at, next_status)
+            await asyncio.sleep(max(wake_at - loop.time(), 0))
+
+    async def _next_tip(self) -> bool:
+        try:
+            tips = (await tip_store.get()).all.encoded
+        except Exception as e:
+            logger.error(f"Stream could not load health tips: {e}")
+            return False
+        if not tips:
+            return False
+        self._tip_id += 1
+        self._tip = sse_frame("tip", random.choice(tips), self._tip_id)
+        self.publish(self._tip)
+        return True
+
+    async def _check_status(self) -> bool:
+        try:
+            await check_database(STATUS_CHECK_TIMEOUT)
+            database_ok = True
+        except Exception as e:
+            logger.warning(f"Stream status check failed: {type(e).__name__}: {e}")
+            database_ok = False
+        frame = _status_frame(database_ok)
+        if frame == self._status:
+            return False
+        self._status = frame
+        self.publish(frame)
+        return True
+
+    def _recycle(self, now: float):
+        """End streams past their max age; their clients reconnect, possibly elsewhere."""
+        expired = [s for s in self._subscribers if s.expires_at <= now]
+        for subscriber in expired:
+            self._subscribers.discard(subscriber)
+            subscriber.close()
+        self.recycled += len(expired)
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "clients": len(self._subscribers),
+            "peak_clients": self.peak_clients,
+            "max_clients": self.max_clients,
+            "frames": self.frames,
+            "slow_dropped": self.slow_dropped,
+            "recycled": self.recycled,
+            "rejected": self.rejected,
+        }
+
+
+broadcaster = Broadcaster()
+
+
+# ===== ENDPOINT =====
+async def _wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+class EventStreamResponse(Response):
+    """Streams one subscriber's frames until either side closes the stream."""
+
+    media_type = "text/event-stream"
+
+    def __init__(self, broadcaster: Broadcaster):
+        # No body, so no Content-Length: the stream is sent chunked
+        self.status_code = 200
+        self.background = None
+        self.broadcaster = broadcaster
+        self.init_headers({"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    async def __call__(self, scope, receive, send):
+        subscriber = self.broadcaster.subscribe()
+        disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+        disconnected.add_done_callback(lambda _: subscriber.close())
+        started = False
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            started = True
+            while True:
+                chunk = await subscriber.next_frames()
+                if chunk is None:
+                    break
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        finally:
+            disconnected.cancel()
+            self.broadcaster.unsubscribe(subscriber)
+            # Also when cancelled (the server ending open requests at
+            # shutdown): close the stream cleanly, then let the error through
+            if started:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+@router.get("")
+async def event_stream():
+    """Server-sent events: ``tip`` and ``status`` (JSON data), plus keep-alive comments."""
+    if broadcaster.full:
+        broadcaster.rejected += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many open streams, please retry shortly",
+            headers={"Retry-After": str(max(STREAM_RETRY_MS // 1000, 1))}
+        )
+    return EventStreamResponse(broadcaster)
@@ -1,49 +1,165 @@
-from fastapi import APIRouter, HTTPException
-from schemas import SymptomRequest, SymptomResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import and_, or_, select
+from typing import List, Optional
+from database import ReadSession, get_read_db
+from models import SymptomCheck
+from ratelimit import client_ip, rate_limit, symptom_batch_limiter, symptom_history_limiter, symptom_limiter
+from routes.auth import get_current_user, get_optional_user
+from schemas import (
+    CurrentUser, SymptomCheckResponse, SymptomHistoryPage, SymptomRequest, SymptomResponse
+)
+from symptom_history import symptom_history
+from symptom_rules import DEFAULT_RULE, rule_engine
+from datetime import datetime
 
+# Each route has its own limiter: analysis per request, batches per item,
+# history pages separately
 router = APIRouter(prefix="/symptom", tags=["symptom_checker"])
 
-@router.post("/analyze", response_model=SymptomResponse)
-def analyze_symptoms(symptom_request: SymptomRequest):
+MAX_BATCH_SIZE = 10_000
+HISTORY_PAGE_LIMIT = 20
+HISTORY_MAX_PAGE_LIMIT = 100
+
+
+def _build_response(matches):
+    rule = matches[0] if matches else DEFAULT_RULE
+    return SymptomResponse(
+        analysis=rule.analysis,
+        recommendation=rule.recommendation,
+        severity=rule.severity,
+        categories=[match.category for match in matches]
+    )
+
+
+def _history_user_id(symptom_requests, current_user: Optional[CurrentUser]) -> Optional[int]:
+    """
+    User whose history the checks are recorded in: the token's, never the body's.
+
+    Anonymous checks are not recorded; a body user_id other than the
+    caller's is refused.
+    """
+    if current_user is None:
+        return None
+    if any(item.user_id not in (None, current_user.id) for item in symptom_requests):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowed to record checks for another user"
+        )
+    return current_user.id
+
+
+@router.post("/analyze", response_model=SymptomResponse, dependencies=[Depends(rate_limit(symptom_limiter))])
+def analyze_symptoms(
+    symptom_request: SymptomRequest,
+    current_user: Optional[CurrentUser] = Depends(get_optional_user),
+):
     symptoms = symptom_request.symptoms.lower().strip()
     
     if not symptoms:
         raise HTTPException(status_code=400, detail="Symptoms cannot be empty")
+    user_id = _history_user_id([symptom_request], current_user)
     
-    # Simple AI-like symptom analysis
-    if any(word in symptoms for word in ["cough", "flu", "cold", "sneeze", "congestion", "runny nose"]):
-        return SymptomResponse(
-            analysis="Mild respiratory symptoms detected",
-            recommendation="Rest well, drink plenty of fluids, and consider over-the-counter cold medicine. If symptoms persist for more than 3 days or you develop a high fever, consult a doctor.",
-            severity="mild"
-        )
-    elif any(word in symptoms for word in ["stomach", "vomit", "nausea", "diarrhea", "indigestion", "abdominal"]):
-        return SymptomResponse(
-            analysis="Digestive system symptoms detected",
-            recommendation="Stay hydrated with water or electrolyte solutions. Eat bland foods like bananas, rice, applesauce, and toast. Avoid spicy or fatty foods. If symptoms persist for more than 24 hours, seek medical attention.",
-            severity="moderate"
-        )
-    elif any(word in symptoms for word in ["headache", "migraine"]):
-        return SymptomResponse(
-            analysis="Headache symptoms detected",
-            recommendation="Rest in a quiet, dark room. Stay hydrated and consider over-the-counter pain relief. If headache is severe or accompanied by vision changes, seek immediate medical care.",
-            severity="mild"
-        )
-    elif any(word in symptoms for word in ["fever", "high temperature", "chills"]):
-        return SymptomResponse(
-            analysis="Fever detected",
-            recommendation="Rest, stay hydrated, and monitor your temperature. Use fever-reducing medication as directed. If fever is above 103°F (39.4°C) or persists for more than 3 days, consult a doctor.",
-            severity="moderate"
+    # Rule-based analysis against the compiled keyword table
+    response = _build_response(rule_engine.match(symptoms))
+    if user_id is not None:
+        # Buffered; written to the database in the background
+        symptom_history.record(user_id, symptom_request.symptoms.strip(), response)
+    return response
+
+
+@router.post("/analyze/batch", response_model=List[SymptomResponse])
+def analyze_symptoms_batch(
+    symptom_requests: List[SymptomRequest],
+    request: Request,
+    current_user: Optional[CurrentUser] = Depends(get_optional_user),
+):
+    """
+    Analyze many symptom texts in one call.
+
+    Results are returned in request order. The whole batch is scanned
+    against the rule table in a single pass.
+    """
+    if len(symptom_requests) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch too large (max {MAX_BATCH_SIZE} items)"
         )
-    elif any(word in symptoms for word in ["chest pain", "shortness of breath", "difficulty breathing"]):
-        return SymptomResponse(
-            analysis="Serious symptoms detected",
-            recommendation="These symptoms require immediate medical attention. Please seek emergency care or call your local emergency number immediately.",
-            severity="severe"
+    # One token per item, so a batch is not cheaper to abuse than the
+    # single analyses it replaces
+    symptom_batch_limiter.check(client_ip(request), cost=len(symptom_requests))
+    user_id = _history_user_id(symptom_requests, current_user)
+
+    texts = [item.symptoms.strip() for item in symptom_requests]
+    for index, text in enumerate(texts):
+        if not text:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Symptoms cannot be empty (item {index})"
+            )
+
+    responses = [_build_response(matches) for matches in rule_engine.match_batch(texts)]
+    if user_id is not None:
+        symptom_history.record_many((user_id, text, response) for text, response in zip(texts, responses))
+    return responses
+
+
+def _cursor(check: SymptomCheck) -> str:
+    return f"{check.created_at.isoformat()}_{check.id}"
+
+
+@router.get("/history/{user_id}", response_model=SymptomHistoryPage,
+            dependencies=[Depends(rate_limit(symptom_history_limiter))])
+async def get_symptom_history(
+    user_id: int,
+    before: Optional[str] = None,
+    limit: int = Query(HISTORY_PAGE_LIMIT, ge=1, le=HISTORY_MAX_PAGE_LIMIT),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: ReadSession = Depends(get_read_db),
+):
+    """
+    A user's symptom checks, newest first.
+
+    Pass the returned next_before as ?before= to get the next (older) page;
+    it is null on the last page. Checks appear here within a flush interval
+    (SYMPTOM_HISTORY_FLUSH_MS) of being made.
+    """
+    if current_user.id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowed to read another user's history"
         )
-    else:
-        return SymptomResponse(
-            analysis="General symptoms reported",
-            recommendation="Please consult a healthcare professional for accurate diagnosis and treatment. Monitor your symptoms and seek immediate care if they worsen.",
-            severity="unknown"
-        )
\ No newline at end of file
+
+    query = select(SymptomCheck).where(SymptomCheck.user_id == user_id)
+    if before:
+        try:
+            created_text, id_text = before.rsplit("_", 1)
+            created_at, check_id = datetime.fromisoformat(created_text), int(id_text)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid 'before' cursor"
+            )
+        query = query.where(or_(
+            SymptomCheck.created_at < created_at,
+            and_(SymptomCheck.created_at == created_at, SymptomCheck.id < check_id),
+        ))
+    checks = (await db.scalars(
+        query.order_by(SymptomCheck.created_at.desc(), SymptomCheck.id.desc()).limit(limit + 1)
+    )).all()
+
+    page = checks[:limit]
+    return SymptomHistoryPage(
+        checks=[
+            SymptomCheckResponse(
+                id=check.id,
+                symptoms=check.symptoms,
+                analysis=check.analysis,
+                recommendation=check.recommendation,
+                severity=check.severity,
+                categories=check.categories.split(",") if check.categories else [],
+                created_at=check.created_at,
+            )
+            for check in page
+        ],
+        next_before=_cursor(page[-1]) if len(checks) > limit else None,
+    )
@@ -1,10 +1,26 @@
-from fastapi import APIRouter
-from schemas import TipResponse
+from fastapi import APIRouter, HTTPException, Query, status
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from database import open_read_session
+from models import HealthTip
+from responses import PreEncodedJSONResponse, encode_json
+from schemas import TipPage, TipResponse
+from bisect import bisect_right
+from itertools import chain
+from types import MappingProxyType
+from typing import List, NamedTuple, Optional
+import asyncio
+import logging
+import os
 import random
+import time
 
 router = APIRouter(prefix="/tips", tags=["health_tips"])
 
-HEALTH_TIPS = [
+logger = logging.getLogger(__name__)
+
+# Served while the health_tips table is empty (e.g. a fresh deployment)
+DEFAULT_TIPS = [
     {"tip": "Health is wealth — take care of your body, it's your only home.", "category": "motivation"},
     {"tip": "Drink at least 8 glasses of water daily to stay properly hydrated.", "category": "nutrition"},
     {"tip": "A 30-minute walk can significantly improve your mood and cardiovascular health.", "category": "exercise"},
@@ -22,11 +38,168 @@ HEALTH_TIPS = [
     {"tip": "Spend time in nature to reduce stress and boost your immune system.", "category": "mental_health"}
 ]
 
+# Changes made through this process's sessions refresh the snapshot right
+# away; changes from elsewhere (other workers, bulk loads) within the TTL.
+TIPS_SNAPSHOT_TTL = float(os.getenv("TIPS_SNAPSHOT_TTL", "300"))
+TIPS_PAGE_LIMIT = 100
+TIPS_MAX_PAGE_LIMIT = 1000
+
+
+# ===== SNAPSHOT =====
+class TipList(NamedTuple):
+    ids: tuple      # ordered, for bisecting keyset cursors
+    encoded: tuple  # parallel to ids: each tip pre-encoded as a JSON object
+
+
+class TipSnapshot(NamedTuple):
+    all: TipList
+    by_category: MappingProxyType  # category -> TipList
+    loaded_at: float
+
+
+def _build_snapshot(rows) -> TipSnapshot:
+    tips = [
+        (tip_id, category, encode_json({"id": tip_id, "tip": text, "category": category}))
+        for tip_id, text, category in rows
+    ]
+    grouped = {}
+    for tip in tips:
+        grouped.setdefault(tip[1], []).append(tip)
+
+    def tip_list(items):
+        return TipList(tuple(t[0] for t in items), tuple(t[2] for t in items))
+
+    return TipSnapshot(
+        all=tip_list(tips),
+        by_category=MappingProxyType({category: tip_list(items) for category, items in grouped.items()}),
+        loaded_at=time.monotonic(),
+    )
+
+
+async def _load_snapshot() -> TipSnapshot:
+    async with open_read_session() as db:
+        rows = (await db.execute(
+            select(HealthTip.id, HealthTip.tip_text, HealthTip.category).order_by(HealthTip.id)
+        )).all()
+    if not rows:
+        rows = [(i, tip["tip"], tip["category"]) for i, tip in enumerate(DEFAULT_TIPS, start=1)]
+    return _build_snapshot(rows)
+
+
+class TipStore:
+    """
+    Holds the current immutable tip snapshot.
+
+    Readers never wait on the database once the first snapshot is loaded:
+    a stale or expired snapshot keeps being served while a background task
+    loads its replacement, which is then swapped in with one assignment.
+    """
+
+    def __init__(self, ttl: float = TIPS_SNAPSHOT_TTL):
+        self.ttl = ttl
+        self._snapshot: Optional[TipSnapshot] = None
+        self._stale = False
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def mark_stale(self):
+        self._stale = True
+
+    async def get(self) -> TipSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            return await self.refresh()
+        if self._stale or time.monotonic() - snapshot.loaded_at > self.ttl:
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.create_task(self._refresh_in_background())
+        return snapshot
+
+    async def refresh(self) -> TipSnapshot:
+        self._stale = False
+        self._snapshot = await _load_snapshot()
+        return self._snapshot
+
+    async def _refresh_in_background(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            self._stale = True
+            logger.error(f"Error refreshing health tips: {str(e)}")
+
+
+tip_store = TipStore()
+
+
+# Mark the snapshot stale when a session that wrote HealthTip rows commits
+@event.listens_for(Session, "after_flush")
+def _note_tip_changes(session, flush_context):
+    if any(isinstance(obj, HealthTip) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info["tips_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _refresh_tips_after_commit(session):
+    if session.info.pop("tips_changed", False):
+        tip_store.mark_stale()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_tip_changes(session, previous_transaction):
+    session.info.pop("tips_changed", None)
+
+
+async def _snapshot_or_503() -> TipSnapshot:
+    try:
+        return await tip_store.get()
+    except Exception as e:
+        logger.error(f"Error loading health tips: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Health tips are temporarily unavailable"
+        )
+
+
 @router.get("/random", response_model=TipResponse)
-def get_random_tip():
-    tip = random.choice(HEALTH_TIPS)
-    return TipResponse(tip=tip["tip"], category=tip["category"])
+async def get_random_tip(category: Optional[str] = None):
+    """Random tip, optionally from one category, picked from the in-memory snapshot."""
+    snapshot = await _snapshot_or_503()
+    tips = snapshot.all if category is None else snapshot.by_category.get(category)
+    if not tips:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No tips in category '{category}'"
+        )
+    return PreEncodedJSONResponse(random.choice(tips.encoded))
+
+
+def _tips_in(snapshot: TipSnapshot, category: Optional[str]) -> TipList:
+    return snapshot.all if category is None else snapshot.by_category.get(category, TipList((), ()))
+
+
+@router.get("/all", response_model=List[TipResponse])
+async def get_all_tips(category: Optional[str] = None):
+    """Every tip (optionally of one category) as a plain list; use /tips/page to page through them."""
+    snapshot = await _snapshot_or_503()
+    return PreEncodedJSONResponse(b"[" + b",".join(_tips_in(snapshot, category).encoded) + b"]")
+
+
+@router.get("/page", response_model=TipPage)
+async def get_tips_page(
+    after_id: int = Query(0, ge=0),
+    limit: int = Query(TIPS_PAGE_LIMIT, ge=1, le=TIPS_MAX_PAGE_LIMIT),
+    category: Optional[str] = None,
+):
+    """
+    Page through tips in id order.
 
-@router.get("/all")
-def get_all_tips():
-    return [TipResponse(tip=tip["tip"], category=tip["category"]) for tip in HEALTH_TIPS]
\ No newline at end of file
+    Pass the returned next_after_id as after_id to get the next page; it is
+    null on the last page.
+    """
+    snapshot = await _snapshot_or_503()
+    tips = _tips_in(snapshot, category)
+    start = bisect_right(tips.ids, after_id)
+    end = min(start + limit, len(tips.ids))
+    # Splice the pre-encoded tips instead of re-encoding the page
+    next_after_id = str(tips.ids[end - 1]).encode() if end < len(tips.ids) else b"null"
+    return PreEncodedJSONResponse(
+        b'{"tips":[' + b",".join(tips.encoded[start:end]) + b'],"next_after_id":' + next_after_id + b"}"
+    )
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr, field_validator
-from typing import Optional
+from typing import List, Optional
+from datetime import datetime
 
 class UserCreate(BaseModel):
     username: str
@@ -35,6 +36,10 @@ class Token(BaseModel):
     user_id: int
     username: str
 
+class CurrentUser(BaseModel):
+    id: int
+    username: str
+
 class SymptomRequest(BaseModel):
     symptoms: str
     user_id: Optional[int] = None
@@ -43,11 +48,34 @@ class SymptomResponse(BaseModel):
     analysis: str
     recommendation: str
     severity: str
+    categories: List[str] = []  # every matched rule category, best first
+
+class SymptomCheckResponse(BaseModel):
+    id: int
+    symptoms: str
+    analysis: str
+    recommendation: str
+    severity: str
+    categories: List[str] = []
+    created_at: datetime
+
+class SymptomHistoryPage(BaseModel):
+    checks: List[SymptomCheckResponse]
+    next_before: Optional[str] = None  # pass as ?before= for the next (older) page
 
 class TipResponse(BaseModel):
+    id: Optional[int] = None
     tip: str
     category: str
 
+class TipPage(BaseModel):
+    tips: List[TipResponse]
+    next_after_id: Optional[int] = None
+
+
+class StatusBatchRequest(BaseModel):
+    user_ids: List[int]
+
 
 class PaymentRequest(BaseModel):
     user_id: Optional[int]
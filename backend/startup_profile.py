@@ -0,0 +1,141 @@
+"""
+Where the API's cold-start time goes.
+
+Starts fresh interpreters that import the app, run its startup hooks and
+serve one GET /health in-process, and prints:
+- the time of each phase (import, startup hooks, first request)
+- an ``python -X importtime`` breakdown: import time per top-level package
+  and the slowest individual modules
+
+Usage:
+    cd backend
+    python main.py --profile-startup
+    python startup_profile.py [--top 15]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, NamedTuple
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Runs in the child interpreter; prints the phase timings as JSON
+_PHASES_SCRIPT = """
+import asyncio, json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def first_request(app):
+    response = {}
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": "/health", "raw_path": b"/health", "query_string": b"",
+             "root_path": "", "headers": [], "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80)}
+    await app(scope, receive, send)
+    return response.get("status")
+
+async def run():
+    async with main.app.router.lifespan_context(main.app):
+        ready = time.perf_counter()
+        status = await first_request(main.app)
+        served = time.perf_counter()
+    return ready, status, served
+
+ready, status, served = asyncio.run(run())
+print(json.dumps({"import": imported - started, "startup": ready - imported,
+                  "first_request": served - ready, "status": status}))
+"""
+
+
+class ImportRow(NamedTuple):
+    self_us: int
+    cumulative_us: int
+    depth: int
+    module: str
+
+
+def parse_importtime(output: str) -> List[ImportRow]:
+    """Rows of ``-X importtime`` output (``import time: self | cumulative | name``)."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header line
+        name = parts[2].rstrip()
+        module = name.lstrip()
+        rows.append(ImportRow(int(parts[0]), int(parts[1]), (len(name) - len(module)) // 2, module))
+    return rows
+
+
+def _run_child(args: List[str]) -> subprocess.CompletedProcess:
+    env = {**os.environ, "LOG_LEVEL": os.getenv("LOG_LEVEL", "WARNING")}
+    return subprocess.run(
+        [sys.executable, *args], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True,
+    )
+
+
+def measure_phases() -> Dict[str, float]:
+    """Phase timings from a fresh interpreter (without importtime overhead)."""
+    return json.loads(_run_child(["-c", _PHASES_SCRIPT]).stdout.strip().splitlines()[-1])
+
+
+def measure_imports() -> List[ImportRow]:
+    return parse_importtime(_run_child(["-X", "importtime", "-c", "import main"]).stderr)
+
+
+def profile_startup(top: int = 15):
+    phases = measure_phases()
+    rows = measure_imports()
+
+    total = phases["import"] + phases["startup"] + phases["first_request"]
+    print("Startup phases (fresh interpreter)")
+    print(f"  import main            {phases['import'] * 1000:8.1f} ms")
+    print(f"  startup hooks          {phases['startup'] * 1000:8.1f} ms")
+    print(f"  first GET /health      {phases['first_request'] * 1000:8.1f} ms  (HTTP {phases['status']})")
+    print(f"  total                  {total * 1000:8.1f} ms")
+
+    by_package: Dict[str, int] = {}
+    for row in rows:
+        package = row.module.split(".")[0]
+        by_package[package] = by_package.get(package, 0) + row.self_us
+    print(f"\nImport time by top-level package (self time, top {top})")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {package:<32} {self_us / 1000:8.1f} ms")
+
+    print(f"\nSlowest modules (self time, top {top})")
+    for row in sorted(rows, key=lambda r: -r.self_us)[:top]:
+        print(f"  {row.module:<48} {row.self_us / 1000:8.1f} ms  (cumulative {row.cumulative_us / 1000:.1f} ms)")
+
+    print("\nImported directly by main (cumulative)")
+    main_row = next((i for i, row in enumerate(rows) if row.module == "main"), None)
+    if main_row is not None:
+        # importtime lists a module after everything it imported
+        depth = rows[main_row].depth
+        start = main_row
+        while start > 0 and rows[start - 1].depth > depth:
+            start -= 1
+        direct = [row for row in rows[start:main_row] if row.depth == depth + 1]
+        for row in sorted(direct, key=lambda r: -r.cumulative_us)[:top]:
+            print(f"  {row.module:<32} {row.cumulative_us / 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the API's cold start")
+    parser.add_argument("--top", type=int, default=15, help="rows per table")
+    args = parser.parse_args()
+    profile_startup(args.top)
+
+
+if __name__ == "__main__":
+    main()
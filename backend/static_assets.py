@@ -0,0 +1,245 @@
+"""
+Build and serve the frontend (``frontend/``) from the API process.
+
+Build step, run at deploy time (the output is not committed; the
+repository-root Dockerfile runs it in a build stage)::
+
+    cd backend
+    python static_assets.py build          # frontend/ -> frontend/dist/
+
+It copies every non-HTML file under a content-hashed name
+(``style.3f2a9c1e04.css``), rewrites ``href``/``src`` references in the
+HTML pages to those names, and writes a gzip copy of each file next to it
+(plus a brotli copy when the ``brotli`` package is installed), and a
+``manifest.json`` describing the result.
+
+With SERVE_FRONTEND=true, main.py mounts ``StaticAssets`` at
+FRONTEND_MOUNT_PATH (or logs an error and skips it if there is no build). The build is loaded into memory once and served:
+
+- fingerprinted assets with ``Cache-Control: immutable`` and a one-year
+  max-age, so repeat visits do not request them at all
+- HTML pages, whose URLs cannot change, with ``no-cache`` and an ETag, so
+  a repeat visit costs a bodiless 304
+- in the smallest encoding the client accepts: br, then gzip, then none
+
+Configuration (environment variables):
+    SERVE_FRONTEND       serve the built frontend (default false)
+    FRONTEND_BUILD_DIR   build output to serve (default ../frontend/dist)
+    FRONTEND_MOUNT_PATH  URL prefix (default /app)
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import Dict, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent
+FRONTEND_DIR = BACKEND_DIR.parent / "frontend"
+
+SERVE_FRONTEND = os.getenv("SERVE_FRONTEND", "false").lower() in ("1", "true", "yes")
+FRONTEND_BUILD_DIR = os.getenv("FRONTEND_BUILD_DIR", str(FRONTEND_DIR / "dist"))
+FRONTEND_MOUNT_PATH = os.getenv("FRONTEND_MOUNT_PATH", "/app")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+MANIFEST_NAME = "manifest.json"
+
+# Encodings written by the build, in order of preference when serving
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+_REFERENCE = re.compile(r"""(\b(?:href|src)\s*=\s*)(["'])([^"'#?:]+)\2""")
+
+
+# ===== BUILD =====
+def _fingerprint(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def _hashed_name(relative: str, digest: str) -> str:
+    stem, dot, suffix = relative.rpartition(".")
+    return f"{stem}.{digest}.{suffix}" if dot else f"{relative}.{digest}"
+
+
+def _compressors():
+    compressors = {"gzip": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    try:
+        import brotli
+    except ImportError:
+        pass
+    else:
+        compressors["br"] = lambda data: brotli.compress(data, quality=11)
+    return compressors
+
+
+def _rewrite_references(html: str, page: str, assets: Dict[str, str]) -> str:
+    """Point relative href/src attributes of ``page`` at the fingerprinted assets."""
+    base = os.path.dirname(page)
+
+    def replace(match):
+        target = os.path.normpath(os.path.join(base, match.group(3))).replace(os.sep, "/")
+        if target not in assets:
+            return match.group(0)
+        new = os.path.relpath(assets[target], base or ".").replace(os.sep, "/")
+        return f"{match.group(1)}{match.group(2)}{new}{match.group(2)}"
+
+    return _REFERENCE.sub(replace, html)
+
+
+def build(source=FRONTEND_DIR, output=FRONTEND_BUILD_DIR) -> dict:
+    """Fingerprint and precompress ``source`` into ``output``; returns the manifest."""
+    source, output = Path(source).resolve(), Path(output).resolve()
+    files = sorted(
+        path for path in source.rglob("*")
+        if path.is_file() and output not in path.parents and not path.name.startswith(".")
+    )
+    if output.exists():
+        shutil.rmtree(output)
+    compressors = _compressors()
+
+    contents = {path.relative_to(source).as_posix(): path.read_bytes() for path in files}
+    assets = {
+        relative: _hashed_name(relative, _fingerprint(data))
+        for relative, data in contents.items() if not relative.endswith(".html")
+    }
+    manifest = {"assets": assets, "files": {}}
+    for relative, data in contents.items():
+        if relative.endswith(".html"):
+            data = _rewrite_references(data.decode("utf-8"), relative, assets).encode("utf-8")
+        served_as = assets.get(relative, relative)
+        target = output / served_as
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+
+        encodings = {}
+        for encoding, suffix in _ENCODINGS:
+            if encoding not in compressors:
+                continue
+            compressed = compressors[encoding](data)
+            if len(compressed) < len(data):
+                target.with_name(target.name + suffix).write_bytes(compressed)
+                encodings[encoding] = len(compressed)
+        manifest["files"][served_as] = {
+            "etag": _fingerprint(data),
+            "immutable": relative in assets,
+            "size": len(data),
+            "encodings": encodings,
+        }
+    (output / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    return manifest
+
+
+# ===== SERVING =====
+class _Asset:
+    __slots__ = ("bodies", "headers", "etag")
+
+    def __init__(self, path: Path, info: dict):
+        content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type == "application/javascript":
+            content_type += "; charset=utf-8"
+        self.etag = f'W/"{info["etag"]}"'
+        cache_control = IMMUTABLE_CACHE_CONTROL if info["immutable"] else REVALIDATE_CACHE_CONTROL
+        self.headers = [
+            (b"content-type", content_type.encode()),
+            (b"etag", self.etag.encode()),
+            (b"cache-control", cache_control.encode()),
+            (b"vary", b"Accept-Encoding"),
+        ]
+        self.bodies = {None: path.read_bytes()}
+        for encoding, suffix in _ENCODINGS:
+            if encoding in info["encodings"]:
+                self.bodies[encoding] = path.with_name(path.name + suffix).read_bytes()
+
+
+def _accepted_encodings(header: str) -> set:
+    """Content codings listed in an Accept-Encoding header, minus those with q=0."""
+    accepted = set()
+    for part in header.split(","):
+        token, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if token.strip() and quality > 0:
+            accepted.add(token.strip().lower())
+    return accepted
+
+
+class StaticAssets:
+    """ASGI app serving a ``build()`` output from memory."""
+
+    def __init__(self, build_dir=FRONTEND_BUILD_DIR, index="index.html"):
+        build_dir = Path(build_dir)
+        manifest = json.loads((build_dir / MANIFEST_NAME).read_text())
+        self.index = index
+        self._files: Dict[str, _Asset] = {
+            name: _Asset(build_dir / name, info) for name, info in manifest["files"].items()
+        }
+        # Unhashed asset names keep working, but must be revalidated
+        for original, hashed in manifest["assets"].items():
+            info = dict(manifest["files"][hashed], immutable=False)
+            self._files.setdefault(original, _Asset(build_dir / hashed, info))
+
+    def lookup(self, path: str) -> Optional[_Asset]:
+        path = path.lstrip("/")
+        if not path or path.endswith("/"):
+            path += self.index
+        return self._files.get(path)
+
+    async def __call__(self, scope, receive, send):
+        method = scope["method"]
+        if method not in ("GET", "HEAD"):
+            await self._send(send, 405, [(b"allow", b"GET, HEAD")], b"Method Not Allowed")
+            return
+        asset = self.lookup(scope["path"])
+        if asset is None:
+            await self._send(send, 404, [(b"content-type", b"text/plain; charset=utf-8")], b"Not Found")
+            return
+
+        request_headers = dict(scope["headers"])
+        if_none_match = request_headers.get(b"if-none-match", b"").decode("latin-1")
+        if if_none_match and (if_none_match.strip() == "*" or asset.etag[2:] in if_none_match):
+            await self._send(send, 304, asset.headers, b"")
+            return
+
+        accepted = _accepted_encodings(request_headers.get(b"accept-encoding", b"").decode("latin-1"))
+        encoding = next(
+            (e for e, _ in _ENCODINGS if (e in accepted or "*" in accepted) and e in asset.bodies), None
+        )
+        body = asset.bodies[encoding]
+        headers = list(asset.headers)
+        if encoding:
+            headers.append((b"content-encoding", encoding.encode()))
+        headers.append((b"content-length", str(len(body)).encode()))
+        await self._send(send, 200, headers, b"" if method == "HEAD" else body, has_length=True)
+
+    @staticmethod
+    async def _send(send, status_code, headers, body, has_length=False):
+        if not has_length:
+            headers = [*headers, (b"content-length", str(len(body)).encode())]
+        await send({"type": "http.response.start", "status": status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fingerprint and precompress the MedBuddy frontend")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    build_parser = subcommands.add_parser("build", help="build frontend/ into FRONTEND_BUILD_DIR")
+    build_parser.add_argument("--source", default=str(FRONTEND_DIR))
+    build_parser.add_argument("--output", default=FRONTEND_BUILD_DIR)
+    args = parser.parse_args()
+
+    result = build(args.source, args.output)
+    for name, info in sorted(result["files"].items()):
+        sizes = ", ".join(f"{encoding} {size}" for encoding, size in info["encodings"].items())
+        print(f"{name:<32} {info['size']:>7} bytes  {sizes}")
+    if "br" not in _compressors():
+        print("(install 'brotli' to also write .br files)")
@@ -0,0 +1,170 @@
+"""
+Minimal asyncio Stripe client for creating checkout sessions.
+
+Talks to the Stripe REST API over a shared ``httpx.AsyncClient`` (keep-alive
+connection reuse, explicit timeouts) so a checkout request never parks a
+worker thread on the network. STRIPE_API_BASE can point it at the local
+fake server in benchmarks/fake_stripe.py for offline load tests.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import TYPE_CHECKING, Dict, Optional
+from urllib.parse import urlencode
+
+from cache import cache
+
+if TYPE_CHECKING:
+    import httpx
+
+STRIPE_API_BASE = os.getenv("STRIPE_API_BASE", "https://api.stripe.com")
+STRIPE_TIMEOUT = float(os.getenv("STRIPE_TIMEOUT", "10"))
+STRIPE_MAX_CONNECTIONS = int(os.getenv("STRIPE_MAX_CONNECTIONS", "20"))
+# Repeat checkouts for the same (user, plan, amount) and parameters within
+# this many seconds return the session that was already created.
+STRIPE_IDEMPOTENCY_WINDOW = int(os.getenv("STRIPE_IDEMPOTENCY_WINDOW", "600"))
+
+
+class StripeError(Exception):
+    def __init__(self, message, status_code=None, error_type=None, user_message=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.error_type = error_type
+        self.user_message = user_message or message
+
+
+class CardError(StripeError):
+    pass
+
+
+class StripeTimeout(StripeError):
+    pass
+
+
+def encode_form(params: dict, prefix: str = "") -> list:
+    """Flatten nested dicts/lists into Stripe's ``a[b][0][c]=v`` form fields."""
+    fields = []
+    for key, value in params.items():
+        name = f"{prefix}[{key}]" if prefix else str(key)
+        if isinstance(value, dict):
+            fields.extend(encode_form(value, name))
+        elif isinstance(value, (list, tuple)):
+            for index, item in enumerate(value):
+                item_name = f"{name}[{index}]"
+                if isinstance(item, dict):
+                    fields.extend(encode_form(item, item_name))
+                else:
+                    fields.append((item_name, str(item)))
+        elif value is not None:
+            fields.append((name, str(value)))
+    return fields
+
+
+class StripeClient:
+    def __init__(self, api_key: Optional[str] = None, api_base: str = STRIPE_API_BASE):
+        self.api_key = api_key
+        self.api_base = api_base
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _http(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            # httpx (with httpcore) is imported on the first Stripe call
+            # rather than at startup; most processes never make one
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                base_url=self.api_base,
+                auth=(self.api_key or "", ""),
+                timeout=httpx.Timeout(STRIPE_TIMEOUT, connect=min(STRIPE_TIMEOUT, 5.0)),
+                limits=httpx.Limits(
+                    max_connections=STRIPE_MAX_CONNECTIONS,
+                    max_keepalive_connections=STRIPE_MAX_CONNECTIONS,
+                ),
+            )
+        return self._client
+
+    async def _post(self, path: str, params: dict, idempotency_key: str) -> dict:
+        client = self._http()
+        import httpx
+
+        try:
+            response = await client.post(
+                path,
+                content=urlencode(encode_form(params)),
+                headers={
+                    "Content-Type": "application/x-www-form-urlencoded",
+                    "Idempotency-Key": idempotency_key,
+                },
+            )
+        except httpx.TimeoutException as e:
+            raise StripeTimeout(f"Timed out waiting for Stripe: {e}") from e
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        if response.status_code >= 400:
+            error = body.get("error", {}) if isinstance(body, dict) else {}
+            cls = CardError if error.get("type") == "card_error" else StripeError
+            raise cls(
+                error.get("message") or f"Stripe returned HTTP {response.status_code}",
+                status_code=response.status_code,
+                error_type=error.get("type"),
+            )
+        return body
+
+    async def create_checkout_session(self, dedup_key: tuple, params: dict) -> dict:
+        """
+        Create a checkout session, deduplicated on ``dedup_key`` and ``params``.
+
+        A session created for the same key and parameters within
+        STRIPE_IDEMPOTENCY_WINDOW is returned from cache; concurrent
+        duplicates share one in-flight call. The Stripe Idempotency-Key is
+        derived from both and the current window, so duplicates reaching
+        other workers are collapsed by Stripe, while a request with other
+        parameters (plan name, redirect URLs) gets a session of its own.
+        """
+        # Sorted form fields: the same parameters always give the same digest
+        params_digest = hashlib.sha256(urlencode(sorted(encode_form(params))).encode()).hexdigest()[:16]
+        key_text = ":".join(str(part) for part in dedup_key) + f":{params_digest}"
+        cache_key = f"stripe:checkout:{key_text}"
+
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return json.loads(cached)
+
+        pending = self._inflight.get(cache_key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = future
+        try:
+            bucket = int(time.time() // STRIPE_IDEMPOTENCY_WINDOW)
+            idempotency_key = hashlib.sha256(f"{key_text}:{bucket}".encode()).hexdigest()
+            session = await self._post("/v1/checkout/sessions", params, idempotency_key)
+            result = {"id": session["id"], "url": session.get("url")}
+            cache.set(cache_key, json.dumps(result).encode("utf-8"), STRIPE_IDEMPOTENCY_WINDOW)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark retrieved so a failure with no waiters is not logged as unhandled
+            future.exception()
+            raise
+        finally:
+            del self._inflight[cache_key]
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+stripe_client = StripeClient(api_key=os.getenv("STRIPE_SECRET_KEY"))
@@ -0,0 +1,172 @@
+"""
+Write-behind persistence of symptom checks.
+
+``/symptom/analyze`` hands each result for a known user to
+``SymptomHistoryBuffer.record``, which only appends to an in-memory list;
+a background task bulk-inserts the list every SYMPTOM_HISTORY_FLUSH_MS
+milliseconds, or as soon as SYMPTOM_HISTORY_BATCH_SIZE records are
+waiting. The analyze endpoint therefore never waits on the database, and
+N analyses cost one multi-row INSERT instead of N transactions.
+
+Trade-offs: a check shows up in the history up to one flush interval
+after it was made, and records still buffered when a worker is killed
+(rather than shut down) are lost. If the database is down, records are
+kept and retried, up to SYMPTOM_HISTORY_MAX_PENDING; beyond that new
+records are dropped (and counted) rather than growing memory.
+
+Configuration (environment variables):
+    SYMPTOM_HISTORY              record checks that carry a user_id (default true)
+    SYMPTOM_HISTORY_BATCH_SIZE   records that trigger an early flush (default 500)
+    SYMPTOM_HISTORY_FLUSH_MS     max milliseconds a record waits (default 200)
+    SYMPTOM_HISTORY_MAX_PENDING  records held while inserts fail (default 50000)
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import List, Optional
+
+from database import open_async_session
+from models import SymptomCheck
+
+logger = logging.getLogger(__name__)
+
+SYMPTOM_HISTORY = os.getenv("SYMPTOM_HISTORY", "true").lower() in ("1", "true", "yes")
+SYMPTOM_HISTORY_BATCH_SIZE = int(os.getenv("SYMPTOM_HISTORY_BATCH_SIZE", "500"))
+SYMPTOM_HISTORY_FLUSH_MS = float(os.getenv("SYMPTOM_HISTORY_FLUSH_MS", "200"))
+SYMPTOM_HISTORY_MAX_PENDING = int(os.getenv("SYMPTOM_HISTORY_MAX_PENDING", "50000"))
+
+_insert_checks = SymptomCheck.__table__.insert()
+
+
+class SymptomHistoryBuffer:
+    """Thread-safe buffer of symptom checks, flushed by a background task."""
+
+    def __init__(self, enabled=SYMPTOM_HISTORY, batch_size=SYMPTOM_HISTORY_BATCH_SIZE,
+                 flush_ms=SYMPTOM_HISTORY_FLUSH_MS, max_pending=SYMPTOM_HISTORY_MAX_PENDING):
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000
+        self.max_pending = max_pending
+        self._pending: List[dict] = []
+        self._lock = threading.Lock()
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.written = 0
+        self.dropped = 0
+
+    def record(self, user_id: int, symptoms: str, result):
+        """Queue one analysis result (a SymptomResponse). Safe from any thread."""
+        self.record_many([(user_id, symptoms, result)])
+
+    def record_many(self, checks):
+        """Queue (user_id, symptoms, result) tuples under a single lock acquisition."""
+        if not self.enabled:
+            return
+        now = datetime.utcnow()
+        rows = [
+            {
+                "user_id": user_id,
+                "symptoms": symptoms,
+                "analysis": result.analysis,
+                "recommendation": result.recommendation,
+                "severity": result.severity,
+                "categories": ",".join(result.categories),
+                "created_at": now,
+            }
+            for user_id, symptoms, result in checks
+        ]
+        with self._lock:
+            room = self.max_pending - len(self._pending)
+            if room < len(rows):
+                self.dropped += len(rows) - max(room, 0)
+                rows = rows[:max(room, 0)]
+            self._pending.extend(rows)
+            full = len(self._pending) >= self.batch_size
+        if full and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and write whatever is still buffered."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._loop = None
+        if self._pending:
+            await self.flush()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Symptom history flush error: {e}", exc_info=True)
+
+    async def flush(self) -> int:
+        """Insert everything buffered now; returns the number of rows written."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+            written = 0
+            try:
+                for start in range(0, len(rows), self.batch_size):
+                    batch = rows[start:start + self.batch_size]
+                    async with open_async_session() as db:
+                        await db.execute(_insert_checks, batch)
+                        await db.commit()
+                    written += len(batch)
+                    self.batches += 1
+            except Exception:
+                self._requeue(rows[written:])
+                raise
+            finally:
+                self.written += written
+            return written
+
+    def _requeue(self, rows: List[dict]):
+        # Failed rows go back in front of newer ones, within max_pending
+        with self._lock:
+            merged = rows + self._pending
+            if len(merged) > self.max_pending:
+                self.dropped += len(merged) - self.max_pending
+                merged = merged[:self.max_pending]
+            self._pending = merged
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "pending": self.pending,
+            "batches": self.batches,
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+
+symptom_history = SymptomHistoryBuffer()
@@ -0,0 +1,172 @@
+"""
+Rule table and compiled matcher for the symptom checker.
+
+All keyword rules are compiled once at import into a single regex whose
+alternation is factored into a prefix trie, so analysing a text is one pass
+over the input regardless of how many keywords the table holds.
+"""
+
+import re
+from bisect import bisect_right
+from typing import Dict, Iterable, List, NamedTuple
+
+
+class SymptomRule(NamedTuple):
+    category: str
+    keywords: tuple
+    severity: str
+    analysis: str
+    recommendation: str
+    priority: int  # lower value wins when several rules match
+
+
+# ===== RULE TABLE =====
+# Priorities preserve the evaluation order of the original if/elif chain.
+SYMPTOM_RULES = (
+    SymptomRule(
+        category="respiratory",
+        keywords=("cough", "flu", "cold", "sneeze", "sneezing", "congestion", "runny nose"),
+        severity="mild",
+        analysis="Mild respiratory symptoms detected",
+        recommendation="Rest well, drink plenty of fluids, and consider over-the-counter cold medicine. If symptoms persist for more than 3 days or you develop a high fever, consult a doctor.",
+        priority=10,
+    ),
+    SymptomRule(
+        category="digestive",
+        keywords=("stomach", "vomit", "nausea", "diarrhea", "indigestion", "abdominal"),
+        severity="moderate",
+        analysis="Digestive system symptoms detected",
+        recommendation="Stay hydrated with water or electrolyte solutions. Eat bland foods like bananas, rice, applesauce, and toast. Avoid spicy or fatty foods. If symptoms persist for more than 24 hours, seek medical attention.",
+        priority=20,
+    ),
+    SymptomRule(
+        category="headache",
+        keywords=("headache", "migraine"),
+        severity="mild",
+        analysis="Headache symptoms detected",
+        recommendation="Rest in a quiet, dark room. Stay hydrated and consider over-the-counter pain relief. If headache is severe or accompanied by vision changes, seek immediate medical care.",
+        priority=30,
+    ),
+    SymptomRule(
+        category="fever",
+        keywords=("fever", "high temperature", "chills"),
+        severity="moderate",
+        analysis="Fever detected",
+        recommendation="Rest, stay hydrated, and monitor your temperature. Use fever-reducing medication as directed. If fever is above 103°F (39.4°C) or persists for more than 3 days, consult a doctor.",
+        priority=40,
+    ),
+    SymptomRule(
+        category="serious",
+        keywords=("chest pain", "shortness of breath", "difficulty breathing"),
+        severity="severe",
+        analysis="Serious symptoms detected",
+        recommendation="These symptoms require immediate medical attention. Please seek emergency care or call your local emergency number immediately.",
+        priority=50,
+    ),
+)
+
+DEFAULT_RULE = SymptomRule(
+    category="general",
+    keywords=(),
+    severity="unknown",
+    analysis="General symptoms reported",
+    recommendation="Please consult a healthcare professional for accurate diagnosis and treatment. Monitor your symptoms and seek immediate care if they worsen.",
+    priority=1_000_000,
+)
+
+# Common inflections accepted after a keyword ("coughs", "vomiting", ...).
+_SUFFIXES = r"(?:s|es|ed|ing|y)?"
+
+
+def _normalize(keyword: str) -> str:
+    return " ".join(keyword.lower().split())
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Build a prefix-factored alternation matching exactly ``words``."""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def emit(node: Dict) -> str:
+        terminal = "" in node
+        branches = []
+        for char in sorted(k for k in node if k):
+            atom = r"\s+" if char == " " else re.escape(char)
+            branches.append(atom + emit(node[char]))
+        if not branches:
+            return ""
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        body = "(?:" + "|".join(branches) + ")"
+        return body + "?" if terminal else body
+
+    return emit(trie)
+
+
+class RuleEngine:
+    """Match symptom text against a rule table with one compiled automaton."""
+
+    def __init__(self, rules: Iterable[SymptomRule]):
+        self.rules: List[SymptomRule] = sorted(rules, key=lambda r: r.priority)
+        self._keyword_rules: Dict[str, List[int]] = {}
+        for index, rule in enumerate(self.rules):
+            for keyword in rule.keywords:
+                owners = self._keyword_rules.setdefault(_normalize(keyword), [])
+                if index not in owners:
+                    owners.append(index)
+
+        if self._keyword_rules:
+            trie = _trie_pattern(self._keyword_rules)
+            self._pattern = re.compile(rf"\b({trie}){_SUFFIXES}\b")
+        else:
+            self._pattern = None
+
+    def matched_keywords(self, text: str) -> List[str]:
+        """Return the normalized keywords found in ``text``, in order of appearance."""
+        if self._pattern is None:
+            return []
+        return [_normalize(m.group(1)) for m in self._pattern.finditer(text.lower())]
+
+    def match(self, text: str) -> List[SymptomRule]:
+        """Return every rule with at least one keyword in ``text``, best first."""
+        hits = set()
+        for keyword in self.matched_keywords(text):
+            hits.update(self._keyword_rules[keyword])
+        return [self.rules[i] for i in sorted(hits)]
+
+    def match_batch(self, texts: List[str]) -> List[List[SymptomRule]]:
+        """
+        Match many texts in one scan.
+
+        The texts are joined with a NUL separator (neither a word character
+        nor whitespace, so no keyword can span two texts) and each hit is
+        mapped back to its text by offset.
+        """
+        hits = [set() for _ in texts]
+        if self._pattern is None or not texts:
+            return [[] for _ in texts]
+
+        texts = [text.lower() for text in texts]
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text) + 1
+        corpus = "\0".join(texts)
+
+        for m in self._pattern.finditer(corpus):
+            doc = bisect_right(starts, m.start()) - 1
+            hits[doc].update(self._keyword_rules[_normalize(m.group(1))])
+        return [[self.rules[i] for i in sorted(doc_hits)] for doc_hits in hits]
+
+    def classify(self, text: str) -> SymptomRule:
+        """Return the highest-priority matching rule, or ``DEFAULT_RULE``."""
+        matches = self.match(text)
+        return matches[0] if matches else DEFAULT_RULE
+
+
+rule_engine = RuleEngine(SYMPTOM_RULES)
@@ -0,0 +1,350 @@
+"""
+Stripe webhook ingestion: signature check, durable queue, batched apply.
+
+The webhook endpoint only verifies the ``Stripe-Signature`` header and
+inserts the raw event into the ``webhook_events`` table (the event ID is
+the primary key, so redeliveries are dropped there) before acknowledging.
+``WebhookWorker`` drains that table in the background, a batch at a time,
+and applies entitlement changes with one executemany UPDATE per batch, so
+a webhook storm costs the users table a bounded number of transactions
+rather than one per event.
+
+Configuration (environment variables):
+    STRIPE_WEBHOOK_SECRET     endpoint signing secret (whsec_...)
+    WEBHOOK_TOLERANCE         max signature age in seconds (default 300)
+    WEBHOOK_WORKER            run the drain worker in this process (default true)
+    WEBHOOK_BATCH_SIZE        events applied per transaction (default 500)
+    WEBHOOK_FLUSH_INTERVAL    min seconds between batches (default 0.2)
+    WEBHOOK_POLL_INTERVAL     idle poll period in seconds (default 1)
+    WEBHOOK_CLAIM_TIMEOUT     seconds before another worker may retake a claimed batch (default 60)
+    WEBHOOK_MAX_ATTEMPTS      attempts before an event is marked failed (default 5)
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, bindparam, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from database import note_write, open_async_session
+from entitlements import invalidate_entitlement
+from models import PremiumPlan, User, WebhookEvent
+
+logger = logging.getLogger(__name__)
+
+STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET", "")
+WEBHOOK_TOLERANCE = int(os.getenv("WEBHOOK_TOLERANCE", "300"))
+WEBHOOK_WORKER = os.getenv("WEBHOOK_WORKER", "true").lower() in ("1", "true", "yes")
+WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", "500"))
+WEBHOOK_FLUSH_INTERVAL = float(os.getenv("WEBHOOK_FLUSH_INTERVAL", "0.2"))
+WEBHOOK_POLL_INTERVAL = float(os.getenv("WEBHOOK_POLL_INTERVAL", "1"))
+WEBHOOK_CLAIM_TIMEOUT = int(os.getenv("WEBHOOK_CLAIM_TIMEOUT", "60"))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "5"))
+
+# Events that grant the plan named in the checkout session metadata
+ACTIVATING_EVENTS = {"checkout.session.completed", "checkout.session.async_payment_succeeded"}
+PAID_STATUSES = {"paid", "no_payment_required"}
+
+
+class WebhookSignatureError(Exception):
+    """Raised when a webhook payload is unsigned, badly signed or too old."""
+
+
+# ===== SIGNATURES =====
+def sign_payload(payload: bytes, secret: str, timestamp: Optional[int] = None) -> str:
+    """Build a ``Stripe-Signature`` header value, for replaying fixture events."""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    signed = f"{timestamp}.".encode("utf-8") + payload
+    digest = hmac.new(secret.encode("utf-8"), signed, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def verify_webhook(payload: bytes, header: Optional[str], secret: str = None,
+                   tolerance: int = WEBHOOK_TOLERANCE) -> dict:
+    """Check ``header`` against ``payload`` as Stripe does and return the parsed event."""
+    secret = secret if secret is not None else STRIPE_WEBHOOK_SECRET
+    if not header:
+        raise WebhookSignatureError("Missing Stripe-Signature header")
+
+    timestamp = None
+    signatures = []
+    for item in header.split(","):
+        key, _, value = item.strip().partition("=")
+        if key == "t":
+            timestamp = value
+        elif key == "v1":
+            signatures.append(value)
+    try:
+        timestamp = int(timestamp)
+    except (TypeError, ValueError):
+        raise WebhookSignatureError("Malformed Stripe-Signature header")
+    if not signatures:
+        raise WebhookSignatureError("No v1 signature in Stripe-Signature header")
+
+    signed = f"{timestamp}.".encode("utf-8") + payload
+    expected = hmac.new(secret.encode("utf-8"), signed, hashlib.sha256).hexdigest()
+    if not any(hmac.compare_digest(expected, sig) for sig in signatures):
+        raise WebhookSignatureError("Signature does not match payload")
+    if tolerance and abs(time.time() - timestamp) > tolerance:
+        raise WebhookSignatureError("Signature timestamp outside tolerance")
+
+    try:
+        event = json.loads(payload)
+    except ValueError:
+        raise WebhookSignatureError("Payload is not valid JSON")
+    if not isinstance(event, dict) or not event.get("id") or not event.get("type"):
+        raise WebhookSignatureError("Payload is not a Stripe event")
+    return event
+
+
+# ===== QUEUE =====
+async def enqueue_event(event: dict, payload: bytes) -> bool:
+    """Persist ``event``; returns False if this event ID was already queued."""
+    async with open_async_session() as db:
+        db.add(WebhookEvent(
+            id=event["id"],
+            type=event["type"],
+            payload=payload.decode("utf-8"),
+            status="pending",
+            attempts=0,
+            received_at=datetime.utcnow(),
+        ))
+        try:
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            return False
+    webhook_worker.notify()
+    return True
+
+
+def _activation(event: dict):
+    """Return (user_id, plan_id) granted by ``event``, or None if it grants nothing."""
+    if event.get("type") not in ACTIVATING_EVENTS:
+        return None
+    session = (event.get("data") or {}).get("object") or {}
+    if session.get("payment_status", "paid") not in PAID_STATUSES:
+        return None
+    metadata = session.get("metadata") or {}
+    return int(metadata["user_id"]), int(metadata["plan_id"])
+
+
+_users = User.__table__
+_events = WebhookEvent.__table__
+
+# executemany statements; bind names must not clash with column names
+_activate_user = (
+    _users.update()
+    .where(_users.c.id == bindparam("uid"))
+    .values(plan_id=bindparam("pid"), premium_status="active", plan_expiry=bindparam("expiry"))
+)
+_finish_event = (
+    _events.update()
+    .where(_events.c.id == bindparam("eid"))
+    .values(status=bindparam("outcome"), last_error=bindparam("error"), processed_at=bindparam("done_at"))
+)
+
+
+# ===== WORKER =====
+class WebhookWorker:
+    """Background task draining ``webhook_events`` in batches."""
+
+    def __init__(self, batch_size=WEBHOOK_BATCH_SIZE, flush_interval=WEBHOOK_FLUSH_INTERVAL,
+                 poll_interval=WEBHOOK_POLL_INTERVAL, claim_timeout=WEBHOOK_CLAIM_TIMEOUT,
+                 max_attempts=WEBHOOK_MAX_ATTEMPTS):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.poll_interval = poll_interval
+        self.claim_timeout = claim_timeout
+        self.max_attempts = max_attempts
+        self.worker_id = uuid.uuid4().hex
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.applied = 0
+
+    def notify(self):
+        """Wake the worker early; called after an event is queued."""
+        self._wakeup.set()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        last_batch = 0.0
+        while True:
+            # Bound the write rate: at most one batch per flush interval
+            delay = last_batch + self.flush_interval - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            last_batch = loop.time()
+            try:
+                drained = await self.drain_once()
+            except Exception as e:
+                logger.error(f"Webhook worker error: {e}", exc_info=True)
+                drained = 0
+            if drained < self.batch_size:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def drain(self) -> int:
+        """Apply every queued event now; returns how many were handled."""
+        total = 0
+        while True:
+            drained = await self.drain_once()
+            total += drained
+            if drained == 0:
+                return total
+
+    async def drain_once(self) -> int:
+        """Claim and apply one batch; returns the number of events handled."""
+        now = datetime.utcnow()
+        claimable = or_(
+            WebhookEvent.status == "pending",
+            and_(
+                WebhookEvent.status == "processing",
+                WebhookEvent.claimed_at < now - timedelta(seconds=self.claim_timeout),
+            ),
+        )
+
+        async with open_async_session() as db:
+            ids = (await db.scalars(
+                select(WebhookEvent.id)
+                .where(claimable)
+                .order_by(WebhookEvent.received_at)
+                .limit(self.batch_size)
+            )).all()
+            if not ids:
+                return 0
+
+            # The status guard makes the claim safe when several workers run
+            await db.execute(
+                update(WebhookEvent)
+                .where(WebhookEvent.id.in_(ids), claimable)
+                .values(status="processing", claimed_by=self.worker_id, claimed_at=now,
+                        attempts=WebhookEvent.attempts + 1)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            rows = (await db.execute(
+                select(WebhookEvent.id, WebhookEvent.payload, WebhookEvent.attempts)
+                .where(WebhookEvent.id.in_(ids), WebhookEvent.claimed_by == self.worker_id,
+                       WebhookEvent.status == "processing")
+                .order_by(WebhookEvent.received_at)
+            )).all()
+            if not rows:
+                return 0
+
+            try:
+                user_ids = await self._apply(db, rows)
+            except Exception as e:
+                await db.rollback()
+                await self._release(db, rows, str(e))
+                raise
+
+        for user_id in user_ids:
+            invalidate_entitlement(user_id)
+            note_write(user_id)
+        self.batches += 1
+        self.applied += len(rows)
+        logger.debug("Applied %d webhook events, %d entitlement updates", len(rows), len(user_ids))
+        return len(rows)
+
+    async def _apply(self, db, rows) -> list:
+        outcomes = {}
+        activations = {}  # user_id -> [(plan_id, event_id)] in arrival order
+        for row in rows:
+            try:
+                target = _activation(json.loads(row.payload))
+            except (ValueError, KeyError, TypeError) as e:
+                outcomes[row.id] = ("failed", f"Unreadable event: {e!r}")
+                continue
+            if target is None:
+                outcomes[row.id] = ("ignored", None)
+                continue
+            user_id, plan_id = target
+            activations.setdefault(user_id, []).append((plan_id, row.id))
+
+        granted = []
+        if activations:
+            plan_ids = {plan_id for events in activations.values() for plan_id, _ in events}
+            durations = dict((await db.execute(
+                select(PremiumPlan.id, PremiumPlan.duration_days).where(PremiumPlan.id.in_(plan_ids))
+            )).all())
+            known_users = set((await db.scalars(
+                select(User.id).where(User.id.in_(list(activations)))
+            )).all())
+
+            now = datetime.utcnow()
+            params = []
+            for user_id, events in activations.items():
+                # The last valid event for a user wins, as if applied one by
+                # one; an invalid later event must not cancel an earlier grant
+                plan_id = None
+                for event_plan_id, event_id in events:
+                    if user_id not in known_users:
+                        outcomes[event_id] = ("failed", f"Unknown user {user_id}")
+                    elif event_plan_id not in durations:
+                        outcomes[event_id] = ("failed", f"Unknown plan {event_plan_id}")
+                    else:
+                        outcomes[event_id] = ("processed", None)
+                        plan_id = event_plan_id
+                if plan_id is not None:
+                    params.append({
+                        "uid": user_id,
+                        "pid": plan_id,
+                        "expiry": now + timedelta(days=durations[plan_id]),
+                    })
+                    granted.append(user_id)
+            if params:
+                await db.execute(_activate_user, params)
+
+        done_at = datetime.utcnow()
+        await db.execute(_finish_event, [
+            {"eid": event_id, "outcome": outcome, "error": error, "done_at": done_at}
+            for event_id, (outcome, error) in outcomes.items()
+        ])
+        await db.commit()
+        return granted
+
+    async def _release(self, db, rows, error: str):
+        """Return a failed batch to the queue, or fail events out of attempts."""
+        try:
+            await db.execute(_finish_event, [
+                {
+                    "eid": row.id,
+                    "outcome": "failed" if row.attempts >= self.max_attempts else "pending",
+                    "error": error,
+                    "done_at": None,
+                }
+                for row in rows
+            ])
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Could not release webhook batch: {e}")
+
+
+webhook_worker = WebhookWorker()
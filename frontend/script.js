@@ -36,14 +36,15 @@ async function testBackendConnection() {
 }
 
 document.addEventListener('DOMContentLoaded', function() {
-    testBackendConnection();
     initializeApp();
 });
 
 function initializeApp() {
     initializeQuoteWidget();
     if (document.getElementById('healthTips')) {
-        loadHealthTips();
+        connectEventStream();
+    } else {
+        testBackendConnection();
     }
     setupFormSubmissions();
     setupSymptomChecker();
@@ -69,29 +70,69 @@ function updateQuoteWidget() {
     }
 }
 
+// Tips and backend status arrive over one server-sent events stream
+// (GET /api/stream) instead of separate requests; the browser reconnects
+// by itself. Without EventSource, or if the server refuses the stream,
+// fall back to a one-off status check and tip.
+function connectEventStream() {
+    if (!window.EventSource) {
+        testBackendConnection();
+        loadHealthTips();
+        return;
+    }
+    const stream = new EventSource(`${API_BASE_URL}/api/stream`);
+    let receivedTip = false;
+
+    stream.addEventListener('status', (event) => {
+        const status = JSON.parse(event.data);
+        if (status.status === 'healthy') {
+            console.log('✓ Backend is reachable');
+        } else {
+            console.warn('Backend degraded:', status);
+        }
+    });
+    stream.addEventListener('tip', (event) => {
+        receivedTip = true;
+        showHealthTip(JSON.parse(event.data));
+    });
+    stream.addEventListener('error', () => {
+        if (stream.readyState === EventSource.CLOSED) {
+            console.warn('Event stream unavailable, loading a single tip');
+            testBackendConnection();
+            if (!receivedTip) loadHealthTips();
+        }
+    });
+}
+
+function showHealthTip(tipData) {
+    const tipsContainer = document.getElementById('healthTips');
+
+    if (tipsContainer) {
+        tipsContainer.innerHTML = `
+            <div class="tip-card">
+                <h3>💡 Health Tip</h3>
+                <p>${tipData.tip}</p>
+                <small>Category: ${tipData.category}</small>
+            </div>
+        `;
+    }
+}
+
 async function loadHealthTips() {
     try {
         const response = await fetch(`${API_BASE_URL}/api/tips/random`);
         if (!response.ok) throw new Error('Failed to fetch tips');
 
-        const tipData = await response.json();
-        const tipsContainer = document.getElementById('healthTips');
-
-        if (tipsContainer) {
-            tipsContainer.innerHTML = `
-                <div class="tip-card">
-                    <h3>💡 Health Tip</h3>
-                    <p>${tipData.tip}</p>
-                    <small>Category: ${tipData.category}</small>
-                </div>
-            `;
-        }
+        showHealthTip(await response.json());
 
     } catch (error) {
         console.error('Error loading health tips:', error);
     }
 }
 
+// Used by the "Get Another Tip" button; module scripts do not define globals
+window.loadHealthTips = loadHealthTips;
+
 function setupFormSubmissions() {
     const signupForm = document.getElementById('signupForm');
     if (signupForm) signupForm.addEventListener('submit', handleSignup);
@@ -198,7 +239,7 @@ async function analyzeSymptoms(event) {
     event.preventDefault();
 
     const symptoms = document.getElementById('symptoms').value;
-    const userId = localStorage.getItem('user_id');
+    const token = localStorage.getItem('token');
 
     if (!symptoms.trim()) {
         showMessage('error', 'Please enter your symptoms.');
@@ -215,11 +256,12 @@ async function analyzeSymptoms(event) {
 
         const response = await fetch(`${API_BASE_URL}/symptom/analyze`, {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                symptoms: symptoms,
-                user_id: userId ? parseInt(userId) : null
-            })
+            // Signed-in checks are saved to the user's history
+            headers: {
+                'Content-Type': 'application/json',
+                ...(token ? { 'Authorization': `Bearer ${token}` } : {})
+            },
+            body: JSON.stringify({ symptoms: symptoms })
         });
 
         if (!response.ok) throw new Error('Analysis failed');